@@ -0,0 +1,125 @@
+# pylint: disable=protected-access
+'''
+Ahead of time build of Cerializer codecs.
+Compiles all schemata in a schema directory laid out as <schema_dir>/<schema_identifier>/schema.yaml
+into an importable package of prebuilt extension modules. The package can be shipped with an application
+and loaded with CerializerSchemata(prebuilt_codecs = <package name>) without compiling anything.
+
+Usage:
+	python -m cerializer.build SCHEMA_DIR OUTPUT_DIR [--package NAME] [--shards N] [--workers N]
+'''
+import argparse
+import os
+import pprint
+import shutil
+import sysconfig
+from typing import Any, List, Optional, Tuple
+
+import Cython
+import yaml
+
+import cerializer.compile_cache
+import cerializer.compiler
+import cerializer.schemata
+import cerializer.utils
+
+
+
+PACKAGE_TEMPLATE = """\'\'\'
+Prebuilt Cerializer codecs, generated by `python -m cerializer.build`. Do not edit.
+\'\'\'
+SOABI = {soabi!r}
+CYTHON_VERSION = {cython_version!r}
+
+# schema identifier: (module name, is module shared by multiple schemata)
+CODECS = {codecs}
+
+SCHEMATA = {schemata}
+"""
+
+
+def load_schemata(schema_dir: str) -> List[Tuple[str, Any]]:
+	'''
+	Loads all the schemata from a schema directory.
+	:param schema_dir: directory laid out as <schema_dir>/<schema_identifier>/schema.yaml
+	:return: list of tuples in form of (schema_identifier, schema)
+	'''
+	schemata = []
+	for schema_identifier, schema_root in sorted(cerializer.utils.iterate_over_schemata([schema_dir])):
+		schema_path = os.path.join(schema_root, 'schema.yaml')
+		if not os.path.isfile(schema_path):
+			continue
+		with open(schema_path) as schema_file:
+			schemata.append((schema_identifier, yaml.safe_load(schema_file)))
+	return schemata
+
+
+def build(
+	schema_dir: str,
+	output_dir: str,
+	package_name: str = 'cerializer_codecs',
+	shards: Optional[int] = None,
+	workers: Optional[int] = None,
+	compile_cache: Optional[cerializer.compile_cache.CompileCache] = None,
+) -> str:
+	'''
+	Builds an importable package of prebuilt codecs.
+	:param schema_dir: directory laid out as <schema_dir>/<schema_identifier>/schema.yaml
+	:param output_dir: directory to create the package in
+	:param package_name: name of the package
+	:param shards: if set, schemata are compiled into this many shared modules instead of one module each.
+	:param workers: number of processes running Cython and the C compiler, defaults to the number of CPUs.
+	:param compile_cache: compile cache to build in, defaults to the shared default cache.
+	:return: path to the package
+	'''
+	schemata = load_schemata(schema_dir)
+	cerializer_schemata = cerializer.schemata.CerializerSchemata(
+		[],
+		compile_cache = compile_cache,
+		shards = shards,
+	)
+	for schema_identifier, schema in schemata:
+		cerializer_schemata.add_schema(schema_identifier, schema)
+	modules = cerializer_schemata.render_modules(sorted(cerializer_schemata._schema_database))
+	built_modules = cerializer.compiler.build_codes([code for _, _, code in modules], compile_cache, workers)
+
+	package_dir = os.path.join(output_dir, package_name)
+	if os.path.exists(package_dir):
+		shutil.rmtree(package_dir)
+	os.makedirs(package_dir)
+	codecs = {}
+	for (schema_identifiers, shared, _), (module_name, module_path) in zip(modules, built_modules):
+		shutil.copy(module_path, os.path.join(package_dir, os.path.basename(module_path)))
+		for schema_identifier in schema_identifiers:
+			codecs[schema_identifier] = (module_name, shared)
+	with open(os.path.join(package_dir, '__init__.py'), 'w') as init_file:
+		init_file.write(
+			PACKAGE_TEMPLATE.format(
+				soabi = sysconfig.get_config_var('SOABI'),
+				cython_version = Cython.__version__,
+				codecs = pprint.pformat(codecs),
+				schemata = pprint.pformat(schemata),
+			)
+		)
+	return package_dir
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	'''
+	Command line entry point.
+	:param argv: command line arguments
+	:return: None
+	'''
+	parser = argparse.ArgumentParser(prog = 'python -m cerializer.build', description = __doc__.split('\n\n')[0])
+	parser.add_argument('schema_dir', help = 'directory laid out as <schema_dir>/<schema_identifier>/schema.yaml')
+	parser.add_argument('output_dir', help = 'directory to create the package in')
+	parser.add_argument('--package', default = 'cerializer_codecs', help = 'name of the package')
+	parser.add_argument('--shards', type = int, default = None, help = 'number of shared modules')
+	parser.add_argument('--workers', type = int, default = None, help = 'number of compilation processes')
+	args = parser.parse_args(argv)
+	package_dir = build(args.schema_dir, args.output_dir, args.package, args.shards, args.workers)
+	print(f'codecs written to {package_dir}')
+
+
+if __name__ == '__main__':
+	main()
@@ -1,12 +1,160 @@
-import io
-from typing import Any
+import functools
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import read_buffer
 
 import cerializer.code_generator
 import cerializer.compiler
+import cerializer.constants
+import cerializer.interpreter
 import cerializer.schemata
 import cerializer.utils
 
 
+# per thread scratch buffer shared by all the Cerializers, see Cerializer.serialize_to_scratch
+_SCRATCH = threading.local()
+
+
+class _BufferWriter:
+	'''
+	File like wrapper appending to a bytearray, for code that has no serialize_into.
+	'''
+
+	__slots__ = ('buffer',)
+
+	def __init__(self, buffer: bytearray) -> None:
+		self.buffer = buffer
+
+	def write(self, data: Any) -> None:
+		self.buffer += data
+
+
+def _get_serialize_into(code: Dict[str, Any]) -> Callable[[Any, bytearray], None]:
+	'''
+	Returns the function appending serialized data to a bytearray.
+	:param code: compiled or interpreted code
+	:return: serialize_into function
+	'''
+	if 'serialize_into' in code:
+		serialize_into: Callable[[Any, bytearray], None] = code['serialize_into']
+		return serialize_into
+	serialize = code['serialize']
+	return lambda data, buffer: serialize(data, _BufferWriter(buffer))
+
+
+def _serialize_many_into(
+	serialize_into: Callable[[Any, bytearray], None],
+	records: Iterable[Any],
+	buffer: bytearray,
+) -> List[int]:
+	'''
+	Per record fallback of the compiled serialize_many_into.
+	'''
+	offsets = [len(buffer)]
+	for data in records:
+		serialize_into(data, buffer)
+		offsets.append(len(buffer))
+	return offsets
+
+
+def _serialize_many(serialize_into: Callable[[Any, bytearray], None], records: Iterable[Any]) -> List[bytes]:
+	'''
+	Per record fallback of the compiled serialize_many.
+	'''
+	payloads = []
+	for data in records:
+		buffer = bytearray()
+		serialize_into(data, buffer)
+		payloads.append(bytes(buffer))
+	return payloads
+
+
+def _deserialize_many(deserialize: Callable[[Any], Any], payloads: Any, offsets: Optional[List[int]] = None) -> List[Any]:
+	'''
+	Per record fallback of the compiled deserialize_many.
+	'''
+	if offsets is None:
+		return [deserialize(read_buffer.BufferReader(payload)) for payload in payloads]
+	view = memoryview(payloads).cast('B')
+	return [
+		deserialize(read_buffer.BufferReader(view[offsets[i]:offsets[i + 1]]))
+		for i in range(len(offsets) - 1)
+	]
+
+
+class _ScratchBuffer:
+	'''
+	Per thread arena the serialized data is appended to.
+	Clearing a bytearray gives its memory back to the allocator, so the arena is emptied only once it grows
+	over SCRATCH_BUFFER_SIZE. Until then, serializing reuses the memory already allocated.
+	'''
+
+	__slots__ = ('buffer', 'view', 'base_view')
+
+	def __init__(self) -> None:
+		self.buffer = bytearray()
+		self.view: Optional[memoryview] = None
+		self.base_view: Optional[memoryview] = None
+
+	def serialize(self, serialize_into: Callable[[Any, bytearray], None], data: Any) -> memoryview:
+		'''
+		Serializes data into the arena, invalidating the view returned last time.
+		:param serialize_into: function appending serialized data to a bytearray
+		:param data: Python objects to be serialized.
+		:return: view of the serialized bytes
+		'''
+		self._release_views()
+		buffer = self.buffer
+		if len(buffer) > cerializer.constants.SCRATCH_BUFFER_SIZE:
+			buffer = self._empty()
+		start = len(buffer)
+		try:
+			serialize_into(data, buffer)
+		except BufferError:
+			# someone still holds a view derived from a previous result, the arena is left to them
+			buffer = self._empty()
+			start = 0
+			serialize_into(data, buffer)
+		self.base_view = memoryview(buffer)
+		self.view = self.base_view[start:]
+		return self.view
+
+	def _release_views(self) -> None:
+		'''
+		Releases the views returned last time. If the caller still holds a view exported from them,
+		the arena is left to the caller and a new one is allocated.
+		'''
+		try:
+			if self.view is not None:
+				self.view.release()
+			if self.base_view is not None:
+				self.base_view.release()
+		except BufferError:
+			self.buffer = bytearray()
+		self.view = None
+		self.base_view = None
+
+	def _empty(self) -> bytearray:
+		try:
+			del self.buffer[:]
+		except BufferError:
+			self.buffer = bytearray()
+		return self.buffer
+
+
+def _get_scratch_buffer() -> _ScratchBuffer:
+	'''
+	Returns the scratch buffer of this thread.
+	:return: scratch buffer
+	'''
+	try:
+		scratch_buffer: _ScratchBuffer = _SCRATCH.scratch_buffer
+	except AttributeError:
+		scratch_buffer = _SCRATCH.scratch_buffer = _ScratchBuffer()
+	return scratch_buffer
+
+
 class Cerializer:
 	'''
 	Basic driver Class for the Cerializer project.
@@ -20,28 +168,95 @@ class Cerializer:
 		cerializer_schemata: cerializer.schemata.CerializerSchemata,
 		namespace: str,
 		schema_name: str,
+		interpreted_fallback: bool = False,
+		record_classes: bool = False,
+		from_attributes: bool = False,
 	) -> None:
 		'''
 		Generates a Cerializer instance.
 		:param cerializer_schemata: Cerializer schema database
 		:param namespace: schema namespace
 		:param schema_name: schema name
+		:param interpreted_fallback: if the schema is not compiled yet, start with the pure Python
+		interpreted code, compile the schema in the background and switch to the compiled code once ready.
+		:param record_classes: work with objects instead of dicts. Records are serialized from the attributes
+		of any object, e.g. a dataclass, and deserialized into instances of classes generated for them,
+		see CerializerSchemata.get_record_class_code. Not available with the interpreted fallback.
+		:param from_attributes: serialize records from the attributes of any object, e.g. a dataclass,
+		and deserialize them into dicts, see CerializerSchemata.get_attribute_code. Implied by record_classes.
+		Not available with the interpreted fallback.
 		'''
 		self.schema_identifier = cerializer.utils.get_schema_identifier(namespace, schema_name)
 		# self.code_generator = cerializer.code_generator.CodeGenerator(cerializer_schemata, self.schema_identifier,)
 		self._cerializer_schemata = cerializer_schemata
-		compiled_code = self._cerializer_schemata.get_compiled_code(self.schema_identifier)
-		self._serialization_function = compiled_code['serialize']
-		self._deserialization_function = compiled_code['deserialize']
+		self._record_classes = record_classes
+		self.compiled = False
+		if (record_classes or from_attributes) and interpreted_fallback:
+			raise ValueError('Working with objects is not available with the interpreted fallback.')
+		if record_classes:
+			self._use_compiled_code(self._cerializer_schemata.get_record_class_code(self.schema_identifier))
+		elif from_attributes:
+			self._use_compiled_code(self._cerializer_schemata.get_attribute_code(self.schema_identifier))
+		elif interpreted_fallback and self.schema_identifier not in self._cerializer_schemata.get_known_schemata():
+			self._use_code(cerializer.interpreter.get_interpreted_code(self._cerializer_schemata, self.schema_identifier))
+			self._cerializer_schemata.add_code_listener(self.schema_identifier, self._use_compiled_code)
+			self._cerializer_schemata.compile_in_background(self.schema_identifier)
+		else:
+			self._use_compiled_code(self._cerializer_schemata.get_compiled_code(self.schema_identifier))
+
+	def _use_compiled_code(self, compiled_code: Dict[str, Any]) -> None:
+		'''
+		Switches to the compiled code.
+		:param compiled_code: compiled code
+		:return: None
+		'''
+		self._use_code(compiled_code)
+		self.compiled = True
+
+	def _use_code(self, code: Dict[str, Any]) -> None:
+		'''
+		Switches to the given de/serialization functions.
+		:param code: compiled or interpreted code
+		:return: None
+		'''
+		self._serialization_function = code['serialize']
+		self._serialize_into_function = _get_serialize_into(code)
+		self._deserialization_function = code['deserialize']
+		self._serialize_many_into_function = code.get('serialize_many_into') or functools.partial(
+			_serialize_many_into,
+			self._serialize_into_function,
+		)
+		self._serialize_many_function = code.get('serialize_many') or functools.partial(
+			_serialize_many,
+			self._serialize_into_function,
+		)
+		self._deserialize_many_function = code.get('deserialize_many') or functools.partial(
+			_deserialize_many,
+			self._deserialization_function,
+		)
 
-	def deserialize(self, data: bytes) -> Any:
+	def deserialize(self, data: Any) -> Any:
 		'''
 		Deserialize bytes into Python structures.
+		The data is decoded in place, any object supporting the buffer protocol is accepted.
 		:param data: byte like data to read
 		:return: deserialized data in Python format.
 		'''
-		data_io = io.BytesIO(data)
-		return self._deserialization_function(data_io)
+		return self._deserialization_function(read_buffer.BufferReader(data))
+
+	def deserialize_lazy(self, data: Any) -> Any:
+		'''
+		Returns a read-only mapping over a serialized record, decoding each field only once it is accessed.
+		Useful for wide records of which only a few fields are read. The code of the views is compiled
+		on the first call. Schemata other than records are decoded right away, and so is the data
+		while the interpreted code is in use or with record classes.
+		:param data: byte like data to read, held by the returned view
+		:return: lazy record view
+		'''
+		if not self.compiled or self._record_classes:
+			return self.deserialize(data)
+		lazy_code = self._cerializer_schemata.get_lazy_code(self.schema_identifier)
+		return lazy_code['deserialize_lazy'](data)
 
 	def serialize(self, data: Any) -> bytes:
 		'''
@@ -49,6 +264,117 @@ class Cerializer:
 		:param data: Python objects to be serialized.
 		:return: serialized bytes
 		'''
-		output = io.BytesIO()
-		self._serialization_function(data, output)
-		return output.getvalue()
+		buffer = bytearray()
+		self._serialize_into_function(data, buffer)
+		return bytes(buffer)
+
+	def serialize_into(self, data: Any, buffer: Any, offset: int = 0) -> int:
+		'''
+		Serializes data into a caller owned buffer.
+		If the buffer is a bytearray and offset is its length, the data is appended in place without any copy.
+		Otherwise, the serialized bytes are copied into the buffer at offset. A bytearray grows if needed,
+		any other writable buffer has to be large enough.
+		:param data: Python objects to be serialized.
+		:param buffer: bytearray or any other writable buffer
+		:param offset: position in the buffer to write at, not negative
+		:return: number of bytes written
+		'''
+		if offset < 0:
+			raise ValueError(f'Offset = {offset} is negative.')
+		if type(buffer) is bytearray:
+			size = len(buffer)
+			if offset == size:
+				self._serialize_into_function(data, buffer)
+				return len(buffer) - size
+			if offset > size:
+				raise ValueError(f'Offset = {offset} is past the end of the buffer of size = {size}.')
+		serialized = self.serialize_to_scratch(data)
+		size = len(serialized)
+		if type(buffer) is bytearray:
+			buffer[offset:offset + size] = serialized
+			return size
+		view = memoryview(buffer).cast('B')
+		if offset + size > len(view):
+			raise ValueError(f'Buffer of size = {len(view)} is too small for {size} bytes at offset = {offset}.')
+		view[offset:offset + size] = serialized
+		return size
+
+	def serialize_many(self, records: Iterable[Any]) -> List[bytes]:
+		'''
+		Serializes a batch of records in one call into the compiled code.
+		:param records: Python objects to be serialized.
+		:return: serialized bytes of every record
+		'''
+		return self._serialize_many_function(records)
+
+	def serialize_many_into(self, records: Iterable[Any], buffer: bytearray) -> List[int]:
+		'''
+		Appends a batch of serialized records to a bytearray in one call into the compiled code.
+		:param records: Python objects to be serialized.
+		:param buffer: bytearray to append to
+		:return: offsets delimiting the records, record i is buffer[offsets[i]:offsets[i + 1]]
+		'''
+		return self._serialize_many_into_function(records, buffer)
+
+	def deserialize_many(self, payloads: Any, offsets: Optional[List[int]] = None) -> List[Any]:
+		'''
+		Deserializes a batch of payloads in one call into the compiled code.
+		:param payloads: iterable of byte like objects, or a single buffer if offsets are given
+		:param offsets: offsets delimiting the payloads in the buffer, as returned by serialize_many_into
+		:return: deserialized data of every payload
+		'''
+		return self._deserialize_many_function(payloads, offsets)
+
+	def deserialize_columns(self, payloads: Any, offsets: Optional[List[int]] = None) -> Dict[str, Any]:
+		'''
+		Decodes a batch of records into NumPy arrays, one per field, without creating the records.
+		Numbers, booleans and enum indexes go into arrays of matching dtypes, nullable ones into masked arrays,
+		and any other field into an object array. Nested fields are named by their paths, e.g. `address.city`.
+		The code is compiled on the first call. Requires NumPy.
+		:param payloads: iterable of byte like objects, or a single buffer if offsets are given
+		:param offsets: offsets delimiting the payloads in the buffer, as returned by serialize_many_into
+		:return: dict of column name to array
+		'''
+		columnar_code = self._cerializer_schemata.get_columnar_code(self.schema_identifier)
+		columns: Dict[str, Any] = columnar_code['deserialize_columns'](payloads, offsets)
+		return columns
+
+	def serialize_columns(self, columns: Dict[str, Any], n_rows: Optional[int] = None) -> List[bytes]:
+		'''
+		Serializes every row of a dict of columns, e.g. as returned by deserialize_columns, into its own payload.
+		Numeric columns are read through typed buffers, nullable ones may be masked arrays.
+		The code is compiled on the first call. Requires NumPy.
+		:param columns: dict of column name to array or any other sequence, all of the same length
+		:param n_rows: number of rows, a column of another length raises ValueError. Defaults to the length
+		of the columns, it is needed only for records without fields.
+		:return: serialized bytes of every row
+		'''
+		columnar_code = self._cerializer_schemata.get_columnar_code(self.schema_identifier)
+		payloads: List[bytes] = columnar_code['serialize_columns'](columns, n_rows)
+		return payloads
+
+	def serialize_columns_into(
+		self,
+		columns: Dict[str, Any],
+		buffer: bytearray,
+		n_rows: Optional[int] = None,
+	) -> List[int]:
+		'''
+		Appends the serialized rows of a dict of columns to a bytearray, see serialize_columns.
+		:param columns: dict of column name to array or any other sequence, all of the same length
+		:param buffer: bytearray to append to
+		:param n_rows: number of rows, defaults to the length of the columns
+		:return: offsets delimiting the records, record i is buffer[offsets[i]:offsets[i + 1]]
+		'''
+		columnar_code = self._cerializer_schemata.get_columnar_code(self.schema_identifier)
+		offsets: List[int] = columnar_code['serialize_columns_into'](columns, buffer, n_rows)
+		return offsets
+
+	def serialize_to_scratch(self, data: Any) -> memoryview:
+		'''
+		Serializes data into a scratch buffer reused by all Cerializers on the current thread.
+		The returned memoryview is valid only until the next call on the same thread.
+		:param data: Python objects to be serialized.
+		:return: view of the serialized bytes
+		'''
+		return _get_scratch_buffer().serialize(self._serialize_into_function, data)
@@ -1,10 +1,29 @@
+import concurrent.futures
 import json
+import logging
 import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import requests
+import requests.adapters
 
-import cerializer.code_generator
-import cerializer.compiler
+import cerializer.constants
+
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_schema_identifier(subject: str, version: int) -> str:
+	'''
+	Returns the schema identifier of a version of a schema registry subject.
+	:param subject: subject name
+	:param version: version of the subject
+	:return: schema identifier
+	'''
+	# getting rid of the -value added by Kafka
+	schema_name = ''.join(subject.split('-')[:-1])
+	return f'{schema_name}:{version}'
 
 
 class CerializerDaemon(threading.Thread):
@@ -15,12 +34,24 @@ class CerializerDaemon(threading.Thread):
 
 	started_threads = []
 
-	def __init__(self, cerializer_schemata, schemata_url, refresh_time = 10) -> None:
+	def __init__(
+		self,
+		cerializer_schemata,
+		schemata_url,
+		refresh_time = 10,
+		fetch_workers: int = cerializer.constants.SCHEMA_REGISTRY_FETCH_WORKERS,
+		compilation_workers: int = cerializer.constants.DAEMON_COMPILATION_WORKERS,
+		compile_fetched: bool = True,
+	) -> None:
 		'''
 		Initialises a daemon to run in the background and fetch schemata and compile them.
 		:param cerializer_schemata: An instance of schemata that this daemon should be responsible for.
 		:param schemata_url: Kafka repo url
 		:param refresh_time: Period of refreshes and fetching.
+		:param fetch_workers: Number of concurrent requests to the schema registry.
+		:param compilation_workers: Number of threads compiling fetched schemata.
+		:param compile_fetched: whether to compile fetched schemata. Otherwise, as in the lazy mode of
+		CerializerSchemata, the schemata and their registry ids are only added and compiled on first use.
 		'''
 		super().__init__(daemon = True)
 		self._compiling = False
@@ -28,6 +59,22 @@ class CerializerDaemon(threading.Thread):
 		self._schema_url = schemata_url
 		self._cerializer_schemata = cerializer_schemata
 		self._stop_requested = threading.Event()
+		self._fetch_workers = fetch_workers
+		self._compile_fetched = compile_fetched
+		# keep-alive connections are reused by all the requests to the registry
+		self._session = requests.Session()
+		adapter = requests.adapters.HTTPAdapter(pool_connections = 1, pool_maxsize = fetch_workers)
+		self._session.mount('http://', adapter)
+		self._session.mount('https://', adapter)
+		# last version of each subject that was already fetched
+		self._latest_versions: Dict[str, int] = {}
+		# compilation runs off the polling thread, finished codecs are published by CerializerSchemata
+		self._compiler = concurrent.futures.ThreadPoolExecutor(
+			max_workers = compilation_workers,
+			thread_name_prefix = 'cerializer-daemon-compiler',
+		)
+		self._pending_compilations: Set[concurrent.futures.Future] = set()
+		self._pending_compilations_lock = threading.Lock()
 
 	def start(self) -> None:
 		'''
@@ -42,42 +89,152 @@ class CerializerDaemon(threading.Thread):
 		Stops the daemon.
 		:return: None
 		'''
-		self._stop_requested.set()
+		with self._pending_compilations_lock:
+			self._stop_requested.set()
+			self._compiler.shutdown(wait = False)
 
 	def update_with_schema_repo(self):
 		'''
-		Fetches all the schemata from Kafka and renders missing code if necessary.
+		Fetches new schemata from Kafka and schedules compilation of the new ones, unless compile_fetched is False.
+		Only versions newer than the last seen version of each subject are fetched, concurrently.
+		Compilation does not block polling, use wait_for_compilation to wait for it.
 		:return: None
 		'''
-		print('updating with schema repo')
+		logger.debug('Updating with the schema registry.')
 		known_schemata = self._cerializer_schemata.get_known_schemata()
-		subjects = requests.get(f'{self._schema_url}/subjects').json()
-		waiting_to_be_rendered = []
+		subjects = self._get_json('/subjects')
+		# tasks for the fetched versions, in form of (subject, version, task, task arguments)
+		waiting_to_be_submitted: List[Tuple[str, int, Optional[Callable[..., None]], Tuple[Any, ...]]] = []
 		self._compiling = True
-		for subject in subjects:
-			versions = requests.get(f'{self._schema_url}/subjects/{subject}/versions').json()
-			for version in versions:
-				record = requests.get(f'{self._schema_url}/subjects/{subject}/versions/{version}').json()
-				schema = json.loads(record['schema'])
-				# getting rid of the -value added by Kafka
-				schema_name = ''.join(record['subject'].split('-')[:-1])
-				schema_version = record['version']
-				schema_identifier = f'{schema_name}:{schema_version}'
-				if schema_identifier in known_schemata:
-					# we dont need to add this schema to schemata since we know it already
-					continue
-				# we first add all the new schemata into the repo since in case there was a cross reference
-				# between two new schemata, code generation would fail if one of them was not in the database.
-				self._cerializer_schemata.add_schema(schema_identifier, schema)
-				waiting_to_be_rendered.append((schema_identifier, schema))
-		for schema_identifier, schema in waiting_to_be_rendered:
-			# compiles the code and adds it to Schema repo via a callback
-			code_generator = cerializer.code_generator.CodeGenerator(self._cerializer_schemata, schema_identifier)
-			code = code_generator.render_code_with_wraparounds(schema)
-			compiled_code = cerializer.compiler.compile_code(code)
-			print(f'finished compiling {schema_identifier}')
-			self._cerializer_schemata.add_code(schema_identifier, compiled_code)
-		self._compiling = False
+		try:
+			with concurrent.futures.ThreadPoolExecutor(max_workers = self._fetch_workers) as executor:
+				all_versions = list(executor.map(lambda subject: self._get_json(f'/subjects/{subject}/versions'), subjects))
+				new_versions = []
+				# versions of schemata known already, e.g. loaded from disk, are fetched only for their registry ids
+				known_versions = []
+				for subject, versions in zip(subjects, all_versions):
+					latest_version = self._latest_versions.get(subject, 0)
+					for version in versions:
+						if version <= latest_version:
+							continue
+						if get_schema_identifier(subject, version) in known_schemata:
+							known_versions.append((subject, version))
+						else:
+							new_versions.append((subject, version))
+				records = executor.map(
+					lambda args: self._get_json('/subjects/{}/versions/{}'.format(*args)),
+					new_versions + known_versions,
+				)
+				for index, ((subject, version), record) in enumerate(zip(new_versions + known_versions, records)):
+					schema_identifier = get_schema_identifier(record['subject'], record['version'])
+					schema = json.loads(record['schema'])
+					if index < len(new_versions):
+						# we first add all the new schemata into the repo since in case there was a cross reference
+						# between two new schemata, code generation would fail if one of them was not in the database.
+						self._cerializer_schemata.add_schema(schema_identifier, schema)
+					if not self._compile_fetched:
+						# the schema is compiled once it is used, framed payloads find it by the registry id
+						if record.get('id') is not None:
+							self._cerializer_schemata.add_schema_id_schemata({record['id']: (schema_identifier, schema)})
+						waiting_to_be_submitted.append((subject, version, None, ()))
+					elif index < len(new_versions):
+						task_args: Tuple[Any, ...] = (schema_identifier, schema, record.get('id'))
+						waiting_to_be_submitted.append((subject, version, self._compile_schema, task_args))
+					else:
+						task_args = (schema_identifier, record.get('id'))
+						waiting_to_be_submitted.append((subject, version, self._add_schema_id, task_args))
+			for subject, version, task, task_args in waiting_to_be_submitted:
+				# compiles the code and adds it to Schema repo, unless it has been compiled on demand meanwhile
+				if task is not None and not self._submit(task, *task_args):
+					break
+				# a version is seen only once its task is scheduled, a failed poll fetches it again next time
+				self._latest_versions[subject] = max(self._latest_versions.get(subject, 0), version)
+		finally:
+			self._compiling = False
+
+	def _submit(self, function: Callable[..., None], *args: Any) -> bool:
+		'''
+		Schedules a task on the compilation pool, unless the daemon has been stopped.
+		:param function: task
+		:param args: arguments of the task
+		:return: whether the task was scheduled
+		'''
+		# the check and the submission are atomic with respect to stop shutting the pool down
+		with self._pending_compilations_lock:
+			if self._stop_requested.is_set():
+				return False
+			future = self._compiler.submit(function, *args)
+			self._pending_compilations.add(future)
+		future.add_done_callback(self._compilation_done)
+		return True
+
+	def _compile_schema(self, schema_identifier: str, schema: Any, schema_id: Optional[int]) -> None:
+		'''
+		Compiles a fetched schema. Runs on the compilation pool.
+		:param schema_identifier: schema identifier
+		:param schema: schema to compile
+		:param schema_id: schema registry id of the schema, used to dispatch framed payloads
+		:return: None
+		'''
+		schema_code = self._cerializer_schemata.compile_schema(schema_identifier, schema)
+		if schema_id is not None:
+			self._cerializer_schemata.add_schema_ids({schema_id: schema_code})
+		logger.info('Finished compiling %s.', schema_identifier)
+
+	def _add_schema_id(self, schema_identifier: str, schema_id: Optional[int]) -> None:
+		'''
+		Registers the schema registry id of an already known schema. Runs on the compilation pool.
+		:param schema_identifier: schema identifier
+		:param schema_id: schema registry id of the schema, used to dispatch framed payloads
+		:return: None
+		'''
+		if schema_id is not None:
+			self._cerializer_schemata.add_schema_ids({schema_id: self._cerializer_schemata.get_compiled_code(schema_identifier)})
+
+	def _compilation_done(self, future: concurrent.futures.Future) -> None:
+		'''
+		Forgets a finished compilation and logs its failure.
+		:param future: finished compilation
+		:return: None
+		'''
+		with self._pending_compilations_lock:
+			self._pending_compilations.discard(future)
+		exception = future.exception()
+		if exception is not None:
+			logger.error('Compilation of a fetched schema failed.', exc_info = exception)
+
+	def wait_for_compilation(self, timeout: Optional[float] = None) -> bool:
+		'''
+		Waits for compilation of all the fetched schemata.
+		:param timeout: maximal time to wait in seconds, None for no limit
+		:return: whether all the compilations have finished
+		'''
+		with self._pending_compilations_lock:
+			pending = set(self._pending_compilations)
+		_, not_done = concurrent.futures.wait(pending, timeout)
+		return not not_done
+
+	def fetch_schema(self, schema_id: int) -> Any:
+		'''
+		Fetches a schema by its schema registry id.
+		:param schema_id: schema registry id
+		:return: schema, None if the registry does not know the id
+		'''
+		response = self._session.get(f'{self._schema_url}/schemas/ids/{schema_id}')
+		if response.status_code == 404:
+			return None
+		response.raise_for_status()
+		return json.loads(response.json()['schema'])
+
+	def _get_json(self, path: str) -> Any:
+		'''
+		Fetches a document from the schema registry.
+		:param path: path relative to the registry url
+		:return: decoded JSON document
+		'''
+		response = self._session.get(f'{self._schema_url}{path}')
+		response.raise_for_status()
+		return response.json()
 
 	def run(self) -> None:
 		'''
@@ -86,5 +243,9 @@ class CerializerDaemon(threading.Thread):
 		'''
 		while not self._stop_requested.is_set():
 			if not self._compiling:
-				self.update_with_schema_repo()
+				try:
+					self.update_with_schema_repo()
+				except Exception:  # pylint: disable=broad-except
+					# the registry may be unavailable for a while, the next poll tries again
+					logger.exception('Updating with the schema registry failed.')
 			self._stop_requested.wait(self._refresh_time)
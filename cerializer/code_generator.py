@@ -1,12 +1,70 @@
+import functools
 import os
-from typing import Any, Dict, List, Optional, Set, Union
+import textwrap
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
 
 import jinja2
 
+import cerializer.dependency_graph
 import cerializer.utils
 from cerializer import constants
 
 
+
+# types a writer type is promoted to when the reader schema asks for them
+_PROMOTIONS = {
+	constants.INT: (constants.LONG, constants.FLOAT, constants.DOUBLE),
+	constants.LONG: (constants.FLOAT, constants.DOUBLE),
+	constants.FLOAT: (constants.DOUBLE,),
+	constants.STRING: (constants.BYTES,),
+	constants.BYTES: (constants.STRING,),
+}
+# number of bytes of types encoded in a fixed number of bytes
+_ENCODED_SIZES = {constants.BOOLEAN: 1, constants.FLOAT: 4, constants.DOUBLE: 8}
+_NAMED_TYPES = (constants.RECORD, constants.ENUM, constants.FIXED)
+# NumPy dtype, C type of the memoryview, reading and writing function of the types held in numeric columns
+_COLUMN_TYPES = {
+	constants.BOOLEAN: ('bool_', 'unsigned char', 'read_buffer.read_boolean(fo)', 'write.write_boolean'),
+	constants.INT: ('int64', 'long long', 'read_buffer.read_int(fo)', 'write.write_long64'),
+	constants.LONG: ('int64', 'long long', 'read_buffer.read_int(fo)', 'write.write_long64'),
+	constants.FLOAT: ('float32', 'float', 'read_buffer.read_float(fo)', 'write.write_float'),
+	constants.DOUBLE: ('float64', 'double', 'read_buffer.read_double(fo)', 'write.write_double'),
+	constants.ENUM: ('int32', 'int', 'read_buffer.read_int(fo)', 'write.write_long64'),
+}
+
+
+class _Column(NamedTuple):
+	'''
+	Column of the values of a field, see ColumnarCodeGenerator.
+	'''
+	name: str
+	# schema of the field for object columns, normalised schema of the values for numeric columns
+	schema: Any
+	# key of _COLUMN_TYPES, None for object columns
+	column_type: Optional[str]
+	# index of null in the union of null and the values, None if the column is not nullable
+	null_index: Optional[int]
+
+
+def render_shared_code_with_wraparounds(codes: List[Tuple[str, str]]) -> str:
+	'''
+	Renders code of multiple schemata into a single module.
+	Invoking the compiled module returns a dict of schema identifier to the compiled code of that schema.
+	:param codes: list of tuples in form of (schema_identifier, code rendered by CodeGenerator.render_code)
+	:return: rendered code string with wraparounds
+	'''
+	jinja_env = jinja2.Environment(
+		loader = jinja2.FileSystemLoader(searchpath = os.path.join(constants.PROJECT_ROOT, 'cerializer', 'templates')),
+	)
+	jinja_env.globals['quantlane'] = constants.QUANTLANE
+	factory_names = [f'_schema_{i}' for i in range(len(codes))]
+	meta_template = jinja_env.get_template('shared_meta_template.jinja2')
+	return meta_template.render(
+		codes = [(factory_name, code) for factory_name, (_, code) in zip(factory_names, codes)],
+		factories = [(repr(schema_identifier), factory_name) for factory_name, (schema_identifier, _) in zip(factory_names, codes)],
+	)
+
+
 class CodeGenerator:
 	'''
 	Driver class for code generation.
@@ -39,6 +97,14 @@ class CodeGenerator:
 		self._jinja_env.globals['quantlane'] = constants.QUANTLANE
 		self._necessary_defs: Set[str] = set()
 		self._handled_cycles: Set[str] = set()
+		# named types defined within the rendered schema and the ones starting cycles, used by the skipping code
+		self._named_types: Dict[str, Any] = {}
+		self._local_cycle_starting_nodes: Set[str] = set()
+		self._skipping_function_name_generator = cerializer.utils.name_generator('skip')
+		# functions skipping recursive records, by the name of the record
+		self._skipping_functions: Dict[str, str] = {}
+		# functions added by _add_function, kept in order so that a schema always renders the same code
+		self._function_defs: List[str] = []
 
 	def _prepare(
 		self,
@@ -287,7 +353,7 @@ class CodeGenerator:
 		elif isinstance(schema, dict):
 			name = schema['name']
 			types = schema['type']
-			new_location = f"{location}['{name}']"
+			new_location = self._get_field_location(location, name)
 		else:
 			raise NotImplementedError(f'Cant handle schema = {schema}')
 		template = self._jinja_env.get_template('union_deserialization.jinja2')
@@ -339,6 +405,15 @@ class CodeGenerator:
 			index_name = index_name,
 		)
 
+	def render_code(self, schema: Union[str, List[Any], Dict[str, Any]]) -> str:
+		'''
+		Renders the code for the given schema without the module wraparounds.
+		Used when multiple schemata are rendered into one shared module.
+		:param schema: schema to render the code for.
+		:return: rendered code string
+		'''
+		return self._render_code(schema = schema)
+
 	def render_code_with_wraparounds(self, schema: Union[str, List[Any], Dict[str, Any]]) -> str:
 		'''
 		Add Cython compiler directives to speed up the code and adds imports.
@@ -350,10 +425,11 @@ class CodeGenerator:
 		rendered_code = meta_template.render(code = code,)
 		return rendered_code
 
-	def _render_code(self, schema: Union[str, List, Dict[str, Any]]) -> str:
+	def _render_code(self, schema: Union[str, List, Dict[str, Any]], batch_entry_points: bool = True) -> str:
 		'''
 		Renders Cython code for the given schema.
 		:param schema: schema to render the code for.
+		:param batch_entry_points: whether to render serialize_many and deserialize_many as well
 		:return: rendered code string
 		'''
 		self._jinja_env.globals['correct_type'] = cerializer.utils.correct_type
@@ -368,6 +444,7 @@ class CodeGenerator:
 		self._cdefs = []
 		deserialization_code = self._generate_deserialization_code(schema = schema, location = location)
 		deserialization_code = '\n'.join(self._cdefs) + '\n' + deserialization_code
+		self._cdefs = []
 
 		template = self._jinja_env.get_template('template.jinja2')
 		rendered_body = template.render(
@@ -375,10 +452,12 @@ class CodeGenerator:
 			buffer_name = self._buffer_name,
 			serialization_code = serialization_code,
 			deserialization_code = deserialization_code,
-			necessary_defs = '\n\n\n\n'.join([i for i in self._necessary_defs if i != '']),
+			necessary_defs = '\n\n\n\n'.join([i for i in self._necessary_defs if i != ''] + self._function_defs),
+			batch_entry_points = batch_entry_points,
 		)
 		self._cdefs = []
 		self._necessary_defs = set()
+		self._function_defs = []
 		return rendered_body
 
 	def _generate_serialization_code(self, schema: Union[str, List, Dict[str, Any]], location: str) -> str:
@@ -474,8 +553,7 @@ class CodeGenerator:
 					(self._generate_deserialization_code(field, location))
 					for field in schema['fields']
 				)
-				init_location = location if location != 'data' else 'cdef dict data'
-				return init_location + ' = {}\n' + field_deserialization
+				return self._get_record_initialisation(schema, location) + '\n' + field_deserialization
 			elif type_ == constants.ARRAY:
 				return self._get_array_deserialization(schema, location)
 			elif type_ == constants.ENUM:
@@ -486,14 +564,14 @@ class CodeGenerator:
 				return self._get_deserialization_function(type_, location, schema = schema)
 			elif type(type_) is dict:
 				name = schema['name']
-				new_location = f"{location}['{name}']"
+				new_location = self._get_field_location(location, name)
 				return self._generate_deserialization_code(type_, new_location)
 			elif type(type_) is list:
 				return self._get_union_deserialization(schema, location)
 			elif type(type_) is str and type_ in constants.BASIC_TYPES:
 				name = schema.get('name')
 				if name:
-					location = f"{location}['{name}']"
+					location = self._get_field_location(location, name)
 				return self._get_deserialization_function(type_, location, schema = schema)
 			elif type(type_) is str and type_ in self._schemata:
 				loaded_schema = self._load_with_context(type_)
@@ -502,12 +580,32 @@ class CodeGenerator:
 				if self._schemata.is_cycle_starting(type_):
 					return self._handle_cycle(constants.SerializationMode.MODE_DESERIALIZE, type_, location)
 				name = schema['name']
-				new_location = f"{location}['{name}']"
+				new_location = self._get_field_location(location, name)
 				code = self._generate_deserialization_code(loaded_schema, new_location)
 				self._context_schema = old_context
 				return code
 		raise NotImplementedError(f'Cant handle schema = {schema}')
 
+	def _get_record_initialisation(self, schema: Dict[str, Any], location: str) -> str:
+		'''
+		Returns the code creating an empty record the fields are deserialized into.
+		:param schema: record
+		:param location: location
+		:return: record initialisation string
+		'''
+		init_location = location if location != 'data' else 'cdef dict data'
+		return init_location + ' = {}'
+
+	@staticmethod
+	def _get_field_location(location: str, name: str) -> str:
+		'''
+		Returns the location a field of a deserialized record is stored at.
+		:param location: location of the record
+		:param name: field name
+		:return: field location
+		'''
+		return f"{location}['{name}']"
+
 	def _handle_cycle(self, mode: constants.SerializationMode, schema: str, location: str) -> str:
 		'''
 		For a cycle starting node, adds a function representing this schema that starts the cycle.
@@ -521,12 +619,22 @@ class CodeGenerator:
 		serialization_function = (
 			f'{constants.SerializationMode.MODE_SERIALIZE.value}_{normalised_type}(data, output)'
 		)
+		serialization_into_function = f'{constants.SERIALIZE_INTO}_{normalised_type}(data, buffer)'
 		deserialization_function = f'{constants.SerializationMode.MODE_DESERIALIZE.value}_{normalised_type}(fo)'
 		if schema not in self._handled_cycles:
 			self._handled_cycles.add(schema)
-			code = self._render_code(self._load_with_context(schema))
+			# the batch entry points of the cycle would shadow the ones of the schema
+			code = self._render_code(self._load_with_context(schema), batch_entry_points = False)
 			self._necessary_defs.add(
 				code.replace(
+					f'def {constants.SERIALIZE_INTO}(data, bytearray buffer not None)',
+					f'def {constants.SERIALIZE_INTO}_{normalised_type}(data, bytearray buffer not None)',
+				)
+				.replace(
+					f'{constants.SERIALIZE_INTO}(data, buffer)',
+					serialization_into_function,
+				)
+				.replace(
 					f'cpdef {constants.SerializationMode.MODE_SERIALIZE.value}(data, output)',
 					f'def {serialization_function}',
 				)
@@ -543,12 +651,130 @@ class CodeGenerator:
 					f'def {deserialization_function}',
 				)
 			)
-		serialization_function_call = serialization_function.replace('(data,', f'({location},')
 		if mode is constants.SerializationMode.MODE_SERIALIZE:
-			return f'output.write(buffer)\nbuffer = bytearray()\n{serialization_function_call}'
+			# the cycle appends to the same buffer, no need to flush it to the output first
+			return serialization_into_function.replace('(data,', f'({location},')
 		else:
 			return f'{location} = {deserialization_function}'
 
+	def _normalise(self, schema: Any, named_types: Dict[str, Any]) -> Any:
+		'''
+		Replaces references to named types by their definitions and unwraps schemata wrapped in objects,
+		e.g. record fields, so that only primitive type names, unions and type definitions remain.
+		:param schema: schema
+		:param named_types: named types defined within the schema the data is read with, or within the reader schema
+		:return: normalised schema
+		'''
+		while True:
+			if isinstance(schema, str):
+				if schema in constants.BASIC_TYPES or schema == 'null':
+					return schema
+				if schema in named_types:
+					return named_types[schema]
+				return self._load_with_context(schema)
+			if isinstance(schema, list) or 'logicalType' in schema:
+				return schema
+			if isinstance(schema['type'], str) and schema['type'] in constants.COMPLEX_TYPES:
+				return schema
+			schema = schema['type']
+
+	@staticmethod
+	def _get_type(schema: Any) -> str:
+		return schema if isinstance(schema, str) else schema['type']
+
+	def _generate_skipping_code(self, schema: Any) -> str:
+		'''
+		Generates code moving past data of a schema without decoding it.
+		:param schema: schema
+		:return: skipping code
+		'''
+		schema = self._normalise(schema, self._named_types)
+		if isinstance(schema, list):
+			index_name = next(self._int_name_generator)
+			self._add_cdef('long', index_name)
+			lines = [f'{index_name} = read.read_int(fo)']
+			for index, branch in enumerate(schema):
+				lines.append(f'{"if" if index == 0 else "elif"} {index_name} == {index}:')
+				lines.append(textwrap.indent(self._generate_skipping_code(branch), '    '))
+			return '\n'.join(lines)
+		type_ = self._get_type(schema)
+		if type_ == 'null':
+			return 'pass'
+		if type_ in _ENCODED_SIZES:
+			return f'read.skip_fixed(fo, {_ENCODED_SIZES[type_]})'
+		if type_ == constants.FIXED:
+			return f"read.skip_fixed(fo, {schema['size']})"
+		if type_ in (constants.INT, constants.LONG, constants.ENUM):
+			return 'read.read_long(fo)'
+		if type_ in (constants.STRING, constants.BYTES):
+			return 'read.skip_bytes(fo)'
+		if type_ == constants.RECORD:
+			return self._get_record_skipping(schema)
+		index_name = next(self._int_name_generator)
+		block_count_name = next(self._int_name_generator)
+		self._add_cdef('long long', index_name)
+		self._add_cdef('long long', block_count_name)
+		is_map = type_ == constants.MAP
+		template = self._jinja_env.get_template('blocks_skipping.jinja2')
+		return template.render(
+			block_count_name = block_count_name,
+			index_name = index_name,
+			is_map = is_map,
+			item_skipping_code = self._generate_skipping_code(schema['values' if is_map else 'items']),
+		)
+
+	def _get_record_skipping(self, schema: Dict[str, Any]) -> str:
+		'''
+		Returns record skipping string. Recursive records are skipped by a function calling itself.
+		:param schema: record
+		:return: record skipping string
+		'''
+		name = schema['name']
+		if not self._is_cycle_starting(name):
+			return '\n'.join(self._generate_skipping_code(field) for field in schema['fields']) or 'pass'
+		function_name = self._skipping_functions.get(name)
+		if function_name is None:
+			function_name = self._skipping_functions[name] = next(self._skipping_function_name_generator)
+			self._add_function(
+				function_name,
+				lambda: '\n'.join(self._generate_skipping_code(field) for field in schema['fields']) or 'pass',
+				returns_data = False,
+			)
+		return f'{function_name}(fo)'
+
+	def _add_function(self, function_name: str, generate_body: Callable[[], str], returns_data: bool = True) -> None:
+		'''
+		Adds a function reading from fo.
+		:param function_name: function name
+		:param generate_body: callback generating the body, with its own cdefs
+		:param returns_data: whether the function returns the data local variable of the body
+		:return: None
+		'''
+		cdefs = self._cdefs
+		self._cdefs = []
+		try:
+			body = generate_body()
+			body = '\n'.join(self._cdefs) + '\n' + body
+		finally:
+			self._cdefs = cdefs
+		if returns_data:
+			body += '\nreturn data'
+		self._function_defs.append(f'def {function_name}(fo):\n{textwrap.indent(body, "    ")}')
+
+	def _is_cycle_starting(self, name: str) -> bool:
+		return name in self._local_cycle_starting_nodes or self._schemata.is_cycle_starting(name)
+
+	def _index_schema(self, schema: Union[str, List, Dict[str, Any]]) -> None:
+		'''
+		Collects the named types defined within a parsed schema and the ones starting cycles.
+		:param schema: parsed schema
+		:return: None
+		'''
+		_collect_named_types(schema, self._named_types)
+		dependency_graph = cerializer.dependency_graph.DependencyGraph()
+		changed_nodes = dependency_graph.add_schemata([schema])
+		self._local_cycle_starting_nodes |= dependency_graph.find_cycle_starting_nodes(changed_nodes)
+
 	def _add_cdef(self, type_: str, name: str) -> None:
 		'''
 		Adds a cdef
@@ -617,3 +843,820 @@ class CodeGenerator:
 		if constraint:
 			return f'{"if" if first else "elif"} {constraint}:'
 		raise RuntimeError(f'invalid constraint for type == {type_}')
+
+
+class AttributeCodeGenerator(CodeGenerator):
+	'''
+	Generates code serializing records from the attributes of any object, e.g. a dataclass, a class with slots
+	or a cdef class with public attributes, instead of from dicts. Fields named as Python keywords are read
+	from attributes with an underscore appended. A field missing on an object is serialized as its default,
+	if the field has one. A record within a union is serialized from any object that is not a primitive value,
+	a list or a dict. If the union has more records, the name of the class of the object has to match
+	the unqualified record name. Deserialization and the other types are handled as by CodeGenerator.
+	'''
+
+	def __init__(self, schemata: Any, schema_identifier: str) -> None:
+		'''
+		:param schemata: Cerializer schema database
+		:param schema_identifier: schema identifier
+		'''
+		super().__init__(schemata, schema_identifier)
+		# whether the union being rendered has more than one record, records are then told apart by class names
+		self._in_union_of_records = False
+
+	def _generate_serialization_code(self, schema: Union[str, List, Dict[str, Any]], location: str) -> str:
+		'''
+		Generates the serialization part of code, records are read by attribute access.
+		:param schema: schema to render the code for.
+		:param location: location
+		:return: serialization string
+		'''
+		if isinstance(schema, dict) and schema['type'] == constants.RECORD and 'logicalType' not in schema:
+			return '\n'.join(self._get_field_serialization(field, location) for field in schema['fields']) or 'pass'
+		return super()._generate_serialization_code(schema, location)
+
+	def _get_field_serialization(self, field: Dict[str, Any], location: str) -> str:
+		'''
+		Returns the code reading a field into a local variable and serializing it.
+		:param field: record field
+		:param location: location of the record
+		:return: field serialization string
+		'''
+		attribute = cerializer.utils.get_record_attribute_name(field['name'])
+		value_name = next(self._val_name_generator)
+		if 'default' not in field:
+			lines = [f'{value_name} = {location}.{attribute}']
+		else:
+			lines = [f'{value_name} = getattr({location}, {attribute!r}, None)']
+			if field['default'] is not None:
+				lines.append(f'if {value_name} is None:\n    {value_name} = {field["default"]!r}')
+		lines.append(self._generate_serialization_code(field['type'], value_name))
+		return '\n'.join(lines)
+
+	def _get_union_serialization(
+		self,
+		schema: Union[List, Dict[str, Any]],
+		location: str,
+		is_from_array: bool = False,
+	) -> str:
+		# a union from an array is given as the list of its types
+		types: List[Any] = schema if isinstance(schema, list) else schema['type']
+		record_count = sum(
+			1 for type_ in types if self._get_type(self._normalise(type_, self._named_types)) == constants.RECORD
+		)
+		outer_in_union_of_records = self._in_union_of_records
+		self._in_union_of_records = record_count > 1
+		try:
+			return super()._get_union_serialization(schema, location, is_from_array)
+		finally:
+			self._in_union_of_records = outer_in_union_of_records
+
+	def _correct_constraint(
+		self,
+		type_: Union[Dict[str, Any], str, List],
+		location: str,
+		key: str,
+		first: bool,
+		value: Optional[str] = None,
+	) -> str:
+		normalised_type = self._normalise(type_, self._named_types)
+		if self._get_type(normalised_type) != constants.RECORD or 'logicalType' in normalised_type:
+			return super()._correct_constraint(type_, location, key, first, value)
+		full_location = value or f'{location}.{cerializer.utils.get_record_attribute_name(key)}'
+		if self._in_union_of_records:
+			constraint = f'type({full_location}).__name__ == {_get_unqualified_name(normalised_type["name"])!r}'
+		else:
+			constraint = f'not isinstance({full_location}, (bool, int, float, str, bytes, list, dict))'
+		return f'{"if" if first else "elif"} {constraint}:'
+
+
+class RecordClassCodeGenerator(AttributeCodeGenerator):
+	'''
+	Generates code working with objects instead of dicts.
+	Records are serialized from the attributes of any object as by AttributeCodeGenerator, and deserialized
+	into instances of classes generated for them. The classes are made by read_buffer.make_record_class and hold
+	the fields in slots, so that a record takes a fraction of the memory of a dict. Fields named as Python keywords
+	are held in attributes with an underscore appended.
+	Arrays, maps and the other types are handled as by CodeGenerator.
+	'''
+
+	def __init__(self, schemata: Any, schema_identifier: str) -> None:
+		'''
+		:param schemata: Cerializer schema database
+		:param schema_identifier: schema identifier
+		'''
+		super().__init__(schemata, schema_identifier)
+		# names of the variables holding the record classes, by the name of the record
+		self._record_classes: Dict[str, str] = {}
+		# definitions of the record classes created while rendering the current code
+		self._record_class_defs: List[str] = []
+
+	def _render_code(self, schema: Union[str, List, Dict[str, Any]], batch_entry_points: bool = True) -> str:
+		'''
+		Renders Cython code for the given schema, preceded by the record classes it needs.
+		:param schema: schema to render the code for.
+		:param batch_entry_points: whether to render the batch entry points and the record_classes dict as well
+		:return: rendered code string
+		'''
+		# the classes of recursive records are defined by the code of the cycle they start
+		outer_record_class_defs = self._record_class_defs
+		self._record_class_defs = []
+		try:
+			rendered_body = super()._render_code(schema, batch_entry_points)
+			record_class_defs = '\n'.join(self._record_class_defs)
+		finally:
+			self._record_class_defs = outer_record_class_defs
+		if batch_entry_points:
+			record_classes = ''.join(
+				f'\n    {name!r}: {class_name},' for name, class_name in self._record_classes.items()
+			)
+			rendered_body += f'\n\n\nrecord_classes = {{{record_classes}\n}}\n'
+		return record_class_defs + '\n\n\n\n' + rendered_body
+
+	def _get_record_initialisation(self, schema: Dict[str, Any], location: str) -> str:
+		'''
+		Returns the code creating an empty instance of the record class, defining the class if needed.
+		:param schema: record
+		:param location: location
+		:return: record initialisation string
+		'''
+		name = schema['name']
+		class_name = self._record_classes.get(name)
+		if class_name is None:
+			fields = tuple(field['name'] for field in schema['fields'])
+			attributes = tuple(cerializer.utils.get_record_attribute_name(field) for field in fields)
+			if len(set(attributes)) != len(attributes):
+				colliding = [field for field, attribute in zip(fields, attributes) if attributes.count(attribute) > 1]
+				raise ValueError(f'Fields {colliding} of record {name} map to the same attribute of its record class.')
+			class_name = self._record_classes[name] = 'record_class_' + name.replace('.', '_')
+			self._record_class_defs.append(
+				f'{class_name} = read_buffer.make_record_class({name!r}, {fields!r}, {attributes!r})'
+			)
+		return f'{location} = {class_name}.__new__({class_name})'
+
+	@staticmethod
+	def _get_field_location(location: str, name: str) -> str:
+		return f'{location}.{cerializer.utils.get_record_attribute_name(name)}'
+
+
+class LazyRecordCodeGenerator(CodeGenerator):
+	'''
+	Generates code of the lazy record views returned by deserialize_lazy.
+	Every field of a record gets a function skipping it and a function reading it the same way as within
+	the whole record, so that a view decodes a field only once it is accessed.
+	Schemata other than records are decoded right away.
+	'''
+
+	def _render_code(self, schema: Union[str, List, Dict[str, Any]], batch_entry_points: bool = True) -> str:
+		'''
+		Renders Cython code of the lazy record view of the given schema.
+		:param schema: schema to render the code for.
+		:param batch_entry_points: False when rendering the code of a cycle, which is de/serialized by the regular code
+		:return: rendered code string
+		'''
+		if not batch_entry_points:
+			# the code of a cycle is rendered in the middle of generating the field functions, keep them
+			cdefs, necessary_defs, function_defs = self._cdefs, self._necessary_defs, self._function_defs
+			self._cdefs, self._necessary_defs, self._function_defs = [], set(), []
+			try:
+				return super()._render_code(schema, batch_entry_points)
+			finally:
+				self._cdefs, self._necessary_defs, self._function_defs = cdefs, necessary_defs, function_defs
+		self._jinja_env.globals['correct_type'] = cerializer.utils.correct_type
+		self._jinja_env.globals['correct_constraint'] = self._correct_constraint
+		self._jinja_env.globals['generate_serialization_code'] = self._generate_serialization_code
+		self._jinja_env.globals['generate_deserialization_code'] = self._generate_deserialization_code
+		self._jinja_env.globals['get_type_name'] = cerializer.utils.get_type_name
+		schema = cerializer.utils.parse_schema(schema)
+		location = 'data'
+		lazy_fields = self._generate_lazy_fields(schema)
+		deserialization_code = ''
+		if not lazy_fields:
+			deserialization_code = self._generate_deserialization_code(schema = schema, location = location)
+			deserialization_code = '\n'.join(self._cdefs) + '\n' + deserialization_code
+			self._cdefs = []
+		template = self._jinja_env.get_template('lazy_template.jinja2')
+		rendered_body = template.render(
+			location = location,
+			deserialization_code = deserialization_code,
+			necessary_defs = '\n\n\n\n'.join([i for i in self._necessary_defs if i != ''] + self._function_defs),
+			lazy_fields = lazy_fields,
+		)
+		self._necessary_defs = set()
+		self._function_defs = []
+		return rendered_body
+
+	def _generate_lazy_fields(self, schema: Union[str, List, Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+		'''
+		Adds functions skipping and reading each field of a record, used by the lazy record views.
+		A field is read the same way as within the whole record.
+		:param schema: parsed schema
+		:return: list of tuples in form of (field name, skipping function, reading function),
+		empty if the schema is not a record
+		'''
+		self._index_schema(schema)
+		schema = self._normalise(schema, self._named_types)
+		if not isinstance(schema, dict) or schema['type'] != constants.RECORD:
+			return []
+		lazy_fields = []
+		for index, field in enumerate(schema['fields']):
+			skipping_function = f'skip_field_{index}'
+			reading_function = f'read_field_{index}'
+			single_field_schema = {**schema, 'fields': [field]}
+			self._add_function(
+				skipping_function,
+				functools.partial(self._generate_skipping_code, field),
+				returns_data = False,
+			)
+			self._add_function(
+				reading_function,
+				functools.partial(self._get_lazy_field_reading, single_field_schema, field['name']),
+			)
+			lazy_fields.append((field['name'], skipping_function, reading_function))
+		return lazy_fields
+
+	def _get_lazy_field_reading(self, single_field_schema: Dict[str, Any], name: str) -> str:
+		'''
+		Returns the body of a function reading a field the same way as within the whole record.
+		:param single_field_schema: the record with only the field to read
+		:param name: field name
+		:return: field reading string
+		'''
+		return self._generate_deserialization_code(single_field_schema, 'record') + f'\ndata = record[{name!r}]'
+
+
+class ColumnarCodeGenerator(CodeGenerator):
+	'''
+	Generates code converting between batches of records and NumPy arrays, one per field, without creating
+	the records. Booleans, ints, longs, floats and doubles are held in arrays of the matching dtype and enums in
+	int32 arrays of symbol indexes. Fields of nested records get their own columns, named by the path
+	of the field, e.g. `address.city`. Unions of null and one of these types are held in masked arrays
+	masking the nulls. Any other field, e.g. a string, an array or a recursive record, is held in an object array
+	and de/serialized as by CodeGenerator.
+	The fields are written in the order of their columns, so the records are serialized column by column.
+	'''
+
+	def _render_code(self, schema: Union[str, List, Dict[str, Any]], batch_entry_points: bool = True) -> str:
+		'''
+		Renders Cython code converting between the given record schema and columns.
+		:param schema: schema to render the code for.
+		:param batch_entry_points: False when rendering the code of a cycle, which is de/serialized by the regular code
+		:return: rendered code string
+		'''
+		if not batch_entry_points:
+			# the code of a cycle is rendered in the middle of generating the columns, keep their cdefs
+			cdefs = self._cdefs
+			self._cdefs = []
+			try:
+				return super()._render_code(schema, batch_entry_points)
+			finally:
+				self._cdefs = cdefs
+		self._jinja_env.globals['correct_type'] = cerializer.utils.correct_type
+		self._jinja_env.globals['correct_constraint'] = self._correct_constraint
+		self._jinja_env.globals['generate_serialization_code'] = self._generate_serialization_code
+		self._jinja_env.globals['generate_deserialization_code'] = self._generate_deserialization_code
+		self._jinja_env.globals['get_type_name'] = cerializer.utils.get_type_name
+		schema = cerializer.utils.parse_schema(schema)
+		self._index_schema(schema)
+		normalised_schema = self._normalise(schema, self._named_types)
+		if not isinstance(normalised_schema, dict) or normalised_schema['type'] != constants.RECORD:
+			raise ValueError(f'Only records can be converted to columns, got {schema}.')
+		columns = self._get_record_columns(normalised_schema, '')
+		allocations, deserialization_code = self._get_columns_deserialization(columns)
+		deserialization_prelude = '\n'.join(allocations + self._cdefs)
+		self._cdefs = []
+		conversions, serialization_code = self._get_columns_serialization(columns)
+		serialization_prelude = '\n'.join(conversions + self._cdefs)
+		self._cdefs = []
+		template = self._jinja_env.get_template('columnar_template.jinja2')
+		rendered_body = template.render(
+			buffer_name = self._buffer_name,
+			columns = columns,
+			column_symbols = {
+				column.name: column.schema['symbols'] for column in columns if column.column_type == constants.ENUM
+			},
+			deserialization_prelude = deserialization_prelude,
+			deserialization_code = deserialization_code or 'pass',
+			serialization_prelude = serialization_prelude,
+			serialization_code = serialization_code or 'pass',
+			necessary_defs = '\n\n\n\n'.join(i for i in self._necessary_defs if i != ''),
+		)
+		self._necessary_defs = set()
+		return rendered_body
+
+	def _get_record_columns(self, schema: Dict[str, Any], prefix: str) -> List[_Column]:
+		'''
+		Returns the columns of the fields of a record, in the order the fields are serialized in.
+		:param schema: normalised record
+		:param prefix: path of the record followed by a dot, empty for the top level record
+		:return: list of columns
+		'''
+		columns = []
+		for field in schema['fields']:
+			columns.extend(self._get_columns(field['type'], prefix + field['name']))
+		return columns
+
+	def _get_columns(self, schema: Any, name: str) -> List[_Column]:
+		'''
+		Returns the columns of a field, more than one for a nested record.
+		:param schema: schema of the field
+		:param name: column name
+		:return: list of columns
+		'''
+		normalised_schema = self._normalise(schema, self._named_types)
+		if isinstance(normalised_schema, list):
+			branches = [self._normalise(branch, self._named_types) for branch in normalised_schema]
+			if len(branches) == 2 and 'null' in branches:
+				null_index = branches.index('null')
+				value_schema = branches[1 - null_index]
+				column_type = self._get_column_type(value_schema)
+				if column_type is not None:
+					return [_Column(name, value_schema, column_type, null_index)]
+		elif self._get_column_type(normalised_schema) is not None:
+			return [_Column(name, normalised_schema, self._get_column_type(normalised_schema), None)]
+		elif (
+			isinstance(normalised_schema, dict)
+			and normalised_schema['type'] == constants.RECORD
+			and 'logicalType' not in normalised_schema
+			and not self._is_cycle_starting(normalised_schema['name'])
+		):
+			return self._get_record_columns(normalised_schema, name + '.')
+		return [_Column(name, schema, None, None)]
+
+	@staticmethod
+	def _get_column_type(schema: Any) -> Optional[str]:
+		'''
+		:param schema: normalised schema
+		:return: type of the numeric column holding the schema, None for an object column
+		'''
+		if isinstance(schema, list) or (isinstance(schema, dict) and 'logicalType' in schema):
+			return None
+		type_ = CodeGenerator._get_type(schema)
+		return type_ if type_ in _COLUMN_TYPES else None
+
+	def _get_columns_deserialization(self, columns: List[_Column]) -> Tuple[List[str], str]:
+		'''
+		Returns the code allocating the arrays of the columns for all the records and the code decoding a record.
+		:param columns: columns
+		:return: tuple in form of (allocations, record decoding string)
+		'''
+		allocations = []
+		lines = []
+		for index, column in enumerate(columns):
+			array_name = f'column_{index}'
+			values_name = f'{array_name}_values'
+			if column.column_type is None:
+				allocations.append(f'{array_name} = numpy.empty(count, dtype = object)')
+				allocations.append(f'cdef object[::1] {values_name} = {array_name}')
+				value_name = next(self._val_name_generator)
+				lines.append(self._generate_deserialization_code(column.schema, value_name))
+				lines.append(f'{values_name}[row] = {value_name}')
+				continue
+			dtype, c_type, reading, _ = _COLUMN_TYPES[column.column_type]
+			allocations.append(f'{array_name} = numpy.zeros(count, dtype = numpy.{dtype})')
+			allocations.append(f'cdef {c_type}[::1] {values_name} = {self._get_view(column, array_name)}')
+			if column.null_index is None:
+				lines.append(self._get_value_reading(column, reading, values_name))
+				continue
+			allocations.append(f'{array_name}_mask = numpy.zeros(count, dtype = numpy.bool_)')
+			allocations.append(f'cdef unsigned char[::1] {array_name}_nulls = {array_name}_mask.view(numpy.uint8)')
+			index_name = next(self._int_name_generator)
+			self._add_cdef('long', index_name)
+			lines.append(f'{index_name} = read_buffer.read_int(fo)')
+			lines.append(f'if {index_name} == {column.null_index}:\n    {array_name}_nulls[row] = 1\nelse:')
+			lines.append(textwrap.indent(self._get_value_reading(column, reading, values_name), '    '))
+		return allocations, '\n'.join(lines)
+
+	def _get_columns_serialization(self, columns: List[_Column]) -> Tuple[List[str], str]:
+		'''
+		Returns the code converting the given columns into arrays that can be read by index
+		and the code serializing a record.
+		:param columns: columns
+		:return: tuple in form of (conversions, record serialization string)
+		'''
+		conversions = []
+		lines = []
+		for index, column in enumerate(columns):
+			array_name = f'column_{index}'
+			values_name = f'{array_name}_values'
+			column_lookup = f'columns[{column.name!r}]'
+			if column.column_type is None:
+				conversions.append(f'{array_name} = get_object_column({column_lookup})')
+			else:
+				dtype, c_type, _, writing = _COLUMN_TYPES[column.column_type]
+				conversions.append(
+					f'{array_name} = numpy.ascontiguousarray(numpy.ma.getdata({column_lookup}), dtype = numpy.{dtype})'
+				)
+				conversions.append(f'cdef {c_type}[::1] {values_name} = {self._get_view(column, array_name)}')
+			conversions.append(
+				f'if len({array_name}) != count:\n'
+				f"    raise ValueError(f'Column {column.name} has {{len({array_name})}} rows, expected {{count}}.')"
+			)
+			if column.column_type is None:
+				value_name = next(self._val_name_generator)
+				lines.append(f'{value_name} = {array_name}[row]')
+				lines.append(self._generate_serialization_code(column.schema, value_name))
+				continue
+			if column.null_index is None:
+				lines.append(self._get_value_writing(column, writing, values_name))
+				continue
+			conversions.append(f'{array_name}_mask = numpy.ascontiguousarray(numpy.ma.getmaskarray({column_lookup}))')
+			conversions.append(f'cdef unsigned char[::1] {array_name}_nulls = {array_name}_mask.view(numpy.uint8)')
+			lines.append(f'if {array_name}_nulls[row]:')
+			lines.append(f'    write.write_long64({self._buffer_name}, {column.null_index})')
+			lines.append('else:')
+			lines.append(f'    write.write_long64({self._buffer_name}, {1 - column.null_index})')
+			lines.append(textwrap.indent(self._get_value_writing(column, writing, values_name), '    '))
+		return conversions, '\n'.join(lines)
+
+	@staticmethod
+	def _get_view(column: _Column, array_name: str) -> str:
+		# memoryviews of NumPy booleans are taken as bytes
+		return f'{array_name}.view(numpy.uint8)' if column.column_type == constants.BOOLEAN else array_name
+
+	@staticmethod
+	def _get_value_reading(column: _Column, reading: str, values_name: str) -> str:
+		'''
+		Returns the code decoding a value into a numeric column.
+		:param column: numeric column
+		:param reading: code reading a value of the column type
+		:param values_name: name of the memoryview of the values
+		:return: value decoding string
+		'''
+		code = f'{values_name}[row] = {reading}'
+		if column.column_type == constants.ENUM:
+			code += '\n' + ColumnarCodeGenerator._get_symbol_check(column, values_name)
+		return code
+
+	def _get_value_writing(self, column: _Column, writing: str, values_name: str) -> str:
+		'''
+		Returns the code serializing a value of a numeric column.
+		:param column: numeric column
+		:param writing: name of the function writing a value of the column type
+		:param values_name: name of the memoryview of the values
+		:return: value serialization string
+		'''
+		code = f'{writing}({self._buffer_name}, {values_name}[row])'
+		if column.column_type == constants.ENUM:
+			code = self._get_symbol_check(column, values_name) + '\n' + code
+		return code
+
+	@staticmethod
+	def _get_symbol_check(column: _Column, values_name: str) -> str:
+		symbol_count = len(column.schema['symbols'])
+		return (
+			f'if not 0 <= {values_name}[row] < {symbol_count}:\n'
+			f"    raise ValueError(f'Index {{{values_name}[row]}} is out of the symbols of enum {column.schema['name']}.')"
+		)
+
+
+class ResolvingCodeGenerator(CodeGenerator):
+	'''
+	Generates code reading data written with a writer schema into the shape of a reader schema,
+	following the schema resolution rules of the Avro specification.
+	Fields are matched by name or by the aliases of the reader field, fields missing in the writer schema
+	get their default and fields missing in the reader schema are skipped without being decoded.
+	Incompatible schemata raise ValueError when the code is rendered, unless the incompatibility is limited
+	to a branch of a writer union or to enum symbols, in which case ValueError is raised once such data is read.
+	Logical types of the reader schema are applied when the writer schema has the same underlying type.
+	'''
+
+	def __init__(self, schemata: Any, schema_identifier: str, writer_schema: Any) -> None:
+		'''
+		:param schemata: Cerializer schema database, named types not defined within the schemata are loaded from it
+		:param schema_identifier: schema identifier of the reader schema
+		:param writer_schema: schema the data was written with
+		'''
+		super().__init__(schemata, schema_identifier)
+		self._writer_schema = cerializer.utils.parse_schema(writer_schema)
+		self._reader_named_types: Dict[str, Any] = {}
+		self._resolving_function_name_generator = cerializer.utils.name_generator('resolve')
+		# functions resolving recursive records, by the names of the writer and the reader record
+		self._resolving_functions: Dict[Tuple[str, str], str] = {}
+
+	def _render_code(self, schema: Union[str, List, Dict[str, Any]], batch_entry_points: bool = True) -> str:
+		'''
+		Renders Cython code resolving the writer schema to the given reader schema.
+		:param schema: reader schema
+		:param batch_entry_points: whether to render deserialize_many as well
+		:return: rendered code string
+		'''
+		reader_schema = cerializer.utils.parse_schema(schema)
+		self._index_schema(self._writer_schema)
+		_collect_named_types(reader_schema, self._reader_named_types)
+		location = 'data'
+		deserialization_code = self._generate_resolving_code(self._writer_schema, reader_schema, location)
+		deserialization_code = '\n'.join(self._cdefs) + '\n' + deserialization_code
+		template = self._jinja_env.get_template('resolving_template.jinja2')
+		rendered_body = template.render(
+			location = location,
+			deserialization_code = deserialization_code,
+			necessary_defs = '\n\n\n\n'.join(self._function_defs),
+			batch_entry_points = batch_entry_points,
+		)
+		self._cdefs = []
+		self._function_defs = []
+		return rendered_body
+
+	def _matches(self, writer_schema: Any, reader_schema: Any, exact: bool) -> bool:
+		'''
+		Checks whether a normalised writer schema resolves to a normalised reader schema, neither being a union.
+		:param writer_schema: writer schema
+		:param reader_schema: reader schema
+		:param exact: whether to disallow promotions of primitive types
+		:return: bool, match
+		'''
+		writer_type = self._get_type(writer_schema)
+		reader_type = self._get_type(reader_schema)
+		if writer_type in _NAMED_TYPES:
+			return (
+				writer_type == reader_type
+				and _get_unqualified_name(writer_schema['name']) in {
+					_get_unqualified_name(name)
+					for name in [reader_schema['name'], *reader_schema.get('aliases', ())]
+				}
+				and writer_schema.get('size') == reader_schema.get('size')
+			)
+		if writer_type == reader_type:
+			return True
+		return not exact and reader_type in _PROMOTIONS.get(writer_type, ())
+
+	def _find_union_branch(self, writer_schema: Any, reader_union: List[Any]) -> Optional[Any]:
+		'''
+		Returns the branch of the reader union a writer schema resolves to.
+		A branch of the same type is preferred to one the writer type is promoted to.
+		:param writer_schema: normalised writer schema, not a union
+		:param reader_union: reader union
+		:return: normalised reader branch, None if there is none
+		'''
+		branches = [self._normalise(branch, self._reader_named_types) for branch in reader_union]
+		for exact in (True, False):
+			for branch in branches:
+				if not isinstance(branch, list) and self._matches(writer_schema, branch, exact):
+					return branch
+		return None
+
+	def _generate_resolving_code(self, writer_schema: Any, reader_schema: Any, location: str) -> str:
+		'''
+		Generates code reading data of the writer schema into the location in the shape of the reader schema.
+		:param writer_schema: writer schema
+		:param reader_schema: reader schema
+		:param location: location
+		:return: resolving code
+		'''
+		writer_schema = self._normalise(writer_schema, self._named_types)
+		reader_schema = self._normalise(reader_schema, self._reader_named_types)
+		if isinstance(writer_schema, list):
+			return self._get_union_resolution(writer_schema, reader_schema, location)
+		if isinstance(reader_schema, list):
+			branch = self._find_union_branch(writer_schema, reader_schema)
+			if branch is None:
+				raise ValueError(f'Writer schema {writer_schema} does not match any branch of {reader_schema}.')
+			return self._generate_resolving_code(writer_schema, branch, location)
+		if not self._matches(writer_schema, reader_schema, exact = False):
+			raise ValueError(f'Writer schema {writer_schema} cannot be resolved to {reader_schema}.')
+		writer_type = self._get_type(writer_schema)
+		reader_type = self._get_type(reader_schema)
+		if writer_type == constants.RECORD:
+			return self._get_record_resolution(writer_schema, reader_schema, location)
+		if writer_type == constants.ENUM:
+			return self._get_enum_resolution(writer_schema, reader_schema, location)
+		if writer_type == constants.ARRAY:
+			return self._get_array_resolution(writer_schema, reader_schema, location)
+		if writer_type == constants.MAP:
+			return self._get_map_resolution(writer_schema, reader_schema, location)
+		if writer_type == reader_type and 'logicalType' in reader_schema:
+			return self._prepare(
+				constants.SerializationMode.MODE_DESERIALIZE,
+				reader_schema['logicalType'],
+				reader_type,
+				location,
+				reader_schema,
+			)
+		if writer_type == constants.FIXED:
+			return f"{location} = read.read_fixed(fo, {{'size': {writer_schema['size']}}})"
+		if writer_type == 'null':
+			return f'{location} = None'
+		if reader_type in (constants.FLOAT, constants.DOUBLE) and writer_type in (constants.INT, constants.LONG):
+			return f'{location} = float(read.read_long(fo))'
+		if reader_type == constants.DOUBLE and writer_type == constants.FLOAT:
+			return f'{location} = read.read_float(fo)'
+		# int to long and string to bytes or back share the encoding
+		return f'{location} = read.read_{reader_type}(fo)'
+
+	def _get_union_resolution(self, writer_union: List[Any], reader_schema: Any, location: str) -> str:
+		'''
+		Returns resolution string of a writer union. Branches that do not resolve raise ValueError when read.
+		:param writer_union: writer union
+		:param reader_schema: normalised reader schema
+		:param location: location
+		:return: union resolution string
+		'''
+		index_name = next(self._int_name_generator)
+		self._add_cdef('long', index_name)
+		lines = [f'{index_name} = read.read_int(fo)']
+		for index, branch in enumerate(writer_union):
+			try:
+				code = self._generate_resolving_code(branch, reader_schema, location)
+			except ValueError as error:
+				code = f'raise ValueError({str(error)!r})'
+			lines.append(f'{"if" if index == 0 else "elif"} {index_name} == {index}:')
+			lines.append(textwrap.indent(code, '    '))
+		return '\n'.join(lines)
+
+	def _get_record_resolution(self, writer_schema: Dict[str, Any], reader_schema: Dict[str, Any], location: str) -> str:
+		'''
+		Returns record resolution string. Recursive records are resolved by a function calling itself.
+		:param writer_schema: writer record
+		:param reader_schema: reader record
+		:param location: location
+		:return: record resolution string
+		'''
+		writer_name = writer_schema['name']
+		if not self._is_cycle_starting(writer_name):
+			return self._get_record_resolution_body(writer_schema, reader_schema, location)
+		key = (writer_name, reader_schema['name'])
+		function_name = self._resolving_functions.get(key)
+		if function_name is None:
+			function_name = self._resolving_functions[key] = next(self._resolving_function_name_generator)
+			try:
+				self._add_function(
+					function_name,
+					lambda: self._get_record_resolution_body(writer_schema, reader_schema, 'data'),
+				)
+			except ValueError:
+				del self._resolving_functions[key]
+				raise
+		return f'{location} = {function_name}(fo)'
+
+	def _get_record_resolution_body(
+		self,
+		writer_schema: Dict[str, Any],
+		reader_schema: Dict[str, Any],
+		location: str,
+	) -> str:
+		'''
+		Returns record resolution string, the fields are read in the order of the writer schema.
+		:param writer_schema: writer record
+		:param reader_schema: reader record
+		:param location: location
+		:return: record resolution string
+		'''
+		reader_fields: Dict[str, Dict[str, Any]] = {}
+		for field in reader_schema['fields']:
+			for name in (field['name'], *field.get('aliases', ())):
+				reader_fields.setdefault(name, field)
+		lines = [f'{location} = {{}}']
+		resolved_fields = set()
+		for writer_field in writer_schema['fields']:
+			reader_field = reader_fields.get(writer_field['name'])
+			if reader_field is None:
+				lines.append(self._generate_skipping_code(writer_field))
+				continue
+			resolved_fields.add(reader_field['name'])
+			field_location = f"{location}['{reader_field['name']}']"
+			lines.append(self._generate_resolving_code(writer_field, reader_field, field_location))
+		for reader_field in reader_schema['fields']:
+			if reader_field['name'] in resolved_fields:
+				continue
+			if 'default' not in reader_field:
+				raise ValueError(
+					f"Field {reader_field['name']} of {reader_schema['name']} is missing in the writer schema "
+					'and has no default.'
+				)
+			default = self._get_default(reader_field, reader_field['default'])
+			lines.append(f"{location}['{reader_field['name']}'] = {default}")
+		return '\n'.join(lines)
+
+	def _get_enum_resolution(self, writer_schema: Dict[str, Any], reader_schema: Dict[str, Any], location: str) -> str:
+		'''
+		Returns enum resolution string. Symbols missing in the reader enum are replaced by its default.
+		:param writer_schema: writer enum
+		:param reader_schema: reader enum
+		:param location: location
+		:return: enum resolution string
+		'''
+		reader_symbols = reader_schema['symbols']
+		if writer_schema['symbols'] == reader_symbols:
+			return f'{location} = {reader_symbols}[read.read_int(fo)]'
+		default = reader_schema.get('default')
+		symbols = tuple(symbol if symbol in reader_symbols else default for symbol in writer_schema['symbols'])
+		code = f'{location} = {symbols}[read.read_int(fo)]'
+		if None in symbols:
+			message = f"A symbol of {writer_schema['name']} is missing in {reader_schema['name']} which has no default."
+			code += f'\nif {location} is None:\n    raise ValueError({message!r})'
+		return code
+
+	def _get_array_resolution(self, writer_schema: Dict[str, Any], reader_schema: Dict[str, Any], location: str) -> str:
+		'''
+		Returns array resolution string.
+		:param writer_schema: writer array
+		:param reader_schema: reader array
+		:param location: location
+		:return: array resolution string
+		'''
+		index_name = next(self._int_name_generator)
+		block_count_name = next(self._int_name_generator)
+		self._add_cdef('long long', index_name)
+		self._add_cdef('long long', block_count_name)
+		template = self._jinja_env.get_template('array_deserialization.jinja2')
+		return template.render(
+			location = location,
+			items = (writer_schema['items'], reader_schema['items']),
+			index_name = index_name,
+			block_count_name = block_count_name,
+			potential_item_name = next(self._val_name_generator),
+			generate_deserialization_code = self._generate_pair_resolving_code,
+		)
+
+	def _get_map_resolution(self, writer_schema: Dict[str, Any], reader_schema: Dict[str, Any], location: str) -> str:
+		'''
+		Returns map resolution string.
+		:param writer_schema: writer map
+		:param reader_schema: reader map
+		:param location: location
+		:return: map resolution string
+		'''
+		key_name = next(self._key_name_generator)
+		block_count_name = next(self._int_name_generator)
+		index_name = next(self._int_name_generator)
+		self._add_cdef('unicode', key_name)
+		self._add_cdef('long', block_count_name)
+		self._add_cdef('long', index_name)
+		template = self._jinja_env.get_template('map_deserialization.jinja2')
+		return template.render(
+			location = location,
+			values = (writer_schema['values'], reader_schema['values']),
+			key_name = key_name,
+			block_count_name = block_count_name,
+			index_name = index_name,
+			generate_deserialization_code = self._generate_pair_resolving_code,
+		)
+
+	def _generate_pair_resolving_code(self, schemata: Tuple[Any, Any], location: str) -> str:
+		'''
+		Generates resolving code for a tuple of writer and reader schema, used from within templates.
+		'''
+		writer_schema, reader_schema = schemata
+		return self._generate_resolving_code(writer_schema, reader_schema, location)
+
+	def _get_default(self, schema: Any, default: Any) -> str:
+		'''
+		Returns a Python expression of a default value of the reader schema.
+		Defaults of unions are of the first branch, bytes and fixed defaults are strings of code points 0-255.
+		:param schema: reader schema
+		:param default: default as given in the schema
+		:return: default expression
+		'''
+		schema = self._normalise(schema, self._reader_named_types)
+		if isinstance(schema, list):
+			return self._get_default(schema[0], default)
+		type_ = self._get_type(schema)
+		if type_ == constants.RECORD:
+			fields = ', '.join(
+				f"{field['name']!r}: {self._get_default(field, default.get(field['name'], field.get('default')))}"
+				for field in schema['fields']
+			)
+			return f'{{{fields}}}'
+		if type_ == constants.ARRAY:
+			return '[' + ', '.join(self._get_default(schema['items'], item) for item in default) + ']'
+		if type_ == constants.MAP:
+			items = ', '.join(f'{key!r}: {self._get_default(schema["values"], value)}' for key, value in default.items())
+			return f'{{{items}}}'
+		if type_ in (constants.BYTES, constants.FIXED):
+			value = repr(default.encode('latin-1'))
+		elif type_ in (constants.FLOAT, constants.DOUBLE):
+			value = repr(float(default))
+		else:
+			value = repr(default)
+		if 'logicalType' not in schema:
+			return value
+		logical_type = schema['logicalType'].replace('-', '_').lower()
+		if logical_type == 'decimal':
+			params = {'scale': schema.get('scale', 0), 'size': schema.get('size', 0), 'precision': schema.get('precision')}
+			return f'prepare.read_decimal({value}, {params})'
+		return f'prepare.read_{logical_type}({value})'
+
+
+def _get_unqualified_name(name: str) -> str:
+	return name.rpartition('.')[2]
+
+
+def _collect_named_types(schema: Any, named_types: Dict[str, Any]) -> None:
+	'''
+	Collects the named types defined within a parsed schema by their names as they are referenced.
+	:param schema: parsed schema
+	:param named_types: named types collected so far
+	:return: None
+	'''
+	if isinstance(schema, list):
+		for subschema in schema:
+			_collect_named_types(subschema, named_types)
+	elif isinstance(schema, dict):
+		if schema.get('type') in _NAMED_TYPES and 'name' in schema:
+			named_types.setdefault(schema['name'], schema)
+		for key in ('type', 'items', 'values'):
+			if key in schema:
+				_collect_named_types(schema[key], named_types)
+		for field in schema.get('fields', ()):
+			_collect_named_types(field, named_types)
@@ -0,0 +1,197 @@
+import dataclasses
+import hashlib
+import os
+import sys
+import sysconfig
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import Cython
+import Cython.Utils
+
+import cerializer.constants
+
+
+
+MODULE_PREFIX = '_cython_inline_'
+
+
+@dataclasses.dataclass
+class CacheStatistics:
+	'''
+	Hit/miss statistics of a CompileCache.
+	'''
+	hits: int = 0
+	misses: int = 0
+	evictions: int = 0
+
+	@property
+	def hit_rate(self) -> float:
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+
+class CompileCache:
+	'''
+	Persistent, content addressed cache of compiled extension modules.
+	A module is keyed by the generated code, the Cython version, the interpreter ABI and the contents of
+	the .pxd files the generated code cimports. If a module with the same key was already built
+	(possibly by a different process), it is loaded directly and neither Cython nor the C compiler runs.
+	The cache is bounded both by total size and by age of its entries. Least recently used entries are
+	evicted first.
+	'''
+
+	def __init__(
+		self,
+		lib_dir: Optional[str] = None,
+		max_size: Optional[int] = cerializer.constants.COMPILE_CACHE_MAX_SIZE,
+		max_age: Optional[float] = cerializer.constants.COMPILE_CACHE_MAX_AGE,
+	) -> None:
+		'''
+		Creates a compile cache.
+		:param lib_dir: directory to store the compiled modules in, defaults to a directory in the Cython cache.
+		:param max_size: maximal total size of the cache in bytes, None for unbounded.
+		:param max_age: maximal time in seconds since the last use of an entry, None for unbounded.
+		'''
+		self.lib_dir = lib_dir or os.path.join(Cython.Utils.get_cython_cache_dir(), 'cerializer')
+		self.max_size = max_size
+		self.max_age = max_age
+		self.statistics = CacheStatistics()
+		self._lock = threading.Lock()
+
+	def get_module_name(self, code: str) -> str:
+		'''
+		Returns the content addressed module name for the given code.
+		:param code: complete code of the module
+		:return: module name
+		'''
+		key = code, _get_abi_key(), Cython.__version__, _get_pxd_digest()
+		return MODULE_PREFIX + hashlib.md5(str(key).encode('utf-8')).hexdigest()
+
+	def get_module_path(self, module_name: str) -> str:
+		'''
+		Returns the path of the compiled extension for the given module name.
+		:param module_name: module name
+		:return: path to the extension
+		'''
+		return os.path.join(self.lib_dir, module_name + sysconfig.get_config_var('EXT_SUFFIX'))
+
+	def lookup(self, module_name: str) -> Optional[str]:
+		'''
+		Looks up an already compiled module and records a hit or a miss.
+		:param module_name: module name
+		:return: path to the extension on hit, None on miss
+		'''
+		module_path = self.get_module_path(module_name)
+		with self._lock:
+			if os.path.exists(module_path):
+				self.statistics.hits += 1
+				try:
+					# marks the entry as recently used for the eviction policy
+					os.utime(module_path)
+				except OSError:
+					pass
+				return module_path
+			self.statistics.misses += 1
+			return None
+
+	def evict(self, keep: Tuple[str, ...] = ()) -> List[str]:
+		'''
+		Evicts entries older than max_age and then least recently used entries until the cache fits max_size.
+		:param keep: module names that must not be evicted
+		:return: evicted module names
+		'''
+		with self._lock:
+			entries = self._get_entries()
+			now = time.time()
+			evicted = []
+			total_size = sum(size for _, size, _ in entries.values())
+			# least recently used first
+			for module_name, (last_used, size, paths) in sorted(entries.items(), key = lambda item: item[1][0]):
+				if module_name in keep:
+					continue
+				too_old = self.max_age is not None and now - last_used > self.max_age
+				too_big = self.max_size is not None and total_size > self.max_size
+				if not too_old and not too_big:
+					continue
+				for path in paths:
+					try:
+						os.remove(path)
+					except OSError:
+						pass
+				total_size -= size
+				evicted.append(module_name)
+			self.statistics.evictions += len(evicted)
+			return evicted
+
+	def clear(self) -> None:
+		'''
+		Removes all entries from the cache.
+		:return: None
+		'''
+		max_size, max_age = self.max_size, self.max_age
+		self.max_size, self.max_age = 0, None
+		try:
+			self.evict()
+		finally:
+			self.max_size, self.max_age = max_size, max_age
+
+	def _get_entries(self) -> Dict[str, Tuple[float, int, List[str]]]:
+		'''
+		Groups files in the cache dir by the module they belong to.
+		:return: dict of module name to (last use, total size, file paths)
+		'''
+		entries: Dict[str, Tuple[float, int, List[str]]] = {}
+		if not os.path.isdir(self.lib_dir):
+			return entries
+		for file_name in os.listdir(self.lib_dir):
+			if not file_name.startswith(MODULE_PREFIX):
+				continue
+			path = os.path.join(self.lib_dir, file_name)
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			module_name = file_name.split('.')[0]
+			last_used, size, paths = entries.get(module_name, (0.0, 0, []))
+			entries[module_name] = (max(last_used, stat.st_mtime), size + stat.st_size, paths + [path])
+		return entries
+
+
+def _get_abi_key() -> Tuple[str, ...]:
+	'''
+	Returns the part of the cache key identifying the interpreter ABI.
+	:return: ABI key
+	'''
+	return (
+		sys.implementation.cache_tag or '',
+		sysconfig.get_config_var('EXT_SUFFIX') or '',
+		sysconfig.get_config_var('SOABI') or '',
+		str(sys.version_info),
+		sys.executable,
+	)
+
+
+_PXD_DIGEST: Optional[str] = None
+
+
+def _get_pxd_digest() -> str:
+	'''
+	Returns a digest of the .pxd files cimported by the generated code.
+	Their inline functions are compiled into every module, so a change in them has to invalidate the cache.
+	:return: hex digest
+	'''
+	global _PXD_DIGEST
+	if _PXD_DIGEST is None:
+		digest = hashlib.md5()
+		for file_name in cerializer.constants.CIMPORTED_PXD_FILES:
+			path = os.path.join(cerializer.constants.PROJECT_ROOT, file_name)
+			if os.path.exists(path):
+				with open(path, 'rb') as f:
+					digest.update(f.read())
+		_PXD_DIGEST = digest.hexdigest()
+	return _PXD_DIGEST
+
+
+DEFAULT_COMPILE_CACHE = CompileCache()
@@ -1,84 +1,255 @@
 # pylint: disable=protected-access, deprecated-method, no-value-for-parameter
+import concurrent.futures
+import dataclasses
 import distutils.core
-import hashlib
+import importlib
 import importlib.machinery
 import os.path
-import sys
-from typing import Any, List
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import Cython
 import Cython.Build.Dependencies
 import Cython.Build.Inline
 import Cython.Compiler.Main
-import Cython.Utils
 
+import cerializer.compile_cache
+import cerializer.constants
 
-def compile_code(code: str) -> Any:
+
+_LOADED_MODULES: Dict[str, Any] = {}
+_LOADED_MODULES_LOCK = threading.Lock()
+
+
+@dataclasses.dataclass
+class BuildMetrics:
+	'''
+	Timings in seconds and sizes in bytes of building and loading one extension module.
+	'''
+	module_name: str = ''
+	cache_hit: bool = False
+	cythonize_time: float = 0.0
+	c_compile_time: float = 0.0
+	load_time: float = 0.0
+	source_size: int = 0
+	module_size: int = 0
+
+	@property
+	def total_time(self) -> float:
+		return self.cythonize_time + self.c_compile_time + self.load_time
+
+
+def compile_code(
+	code: str,
+	cache: Optional[cerializer.compile_cache.CompileCache] = None,
+	metrics: Optional[BuildMetrics] = None,
+) -> Any:
 	'''
 	Public function for code compilation.
 	:param code: string representation of the code to be compiled.
+	:param cache: compile cache to use, defaults to cerializer.compile_cache.DEFAULT_COMPILE_CACHE.
+	:param metrics: if given, filled in with the metrics of the compilation.
 	:return: Compiled code.
 	'''
-	return _cython_inline(code)
+	return _cython_inline(code, cache or cerializer.compile_cache.DEFAULT_COMPILE_CACHE, metrics or BuildMetrics())
+
+
+def compile_codes(
+	codes: List[str],
+	cache: Optional[cerializer.compile_cache.CompileCache] = None,
+	workers: Optional[int] = None,
+	metrics: Optional[List[BuildMetrics]] = None,
+) -> List[Any]:
+	'''
+	Compiles multiple codes at once. Cython and the C compiler run in a pool of worker processes,
+	the compiled modules are then loaded back into this process.
+	:param codes: string representations of the code to be compiled.
+	:param cache: compile cache to use, defaults to cerializer.compile_cache.DEFAULT_COMPILE_CACHE.
+	:param workers: number of worker processes, defaults to the number of CPUs.
+	:param metrics: if given, filled in with the metrics of the compilation of each of the codes.
+	:return: Compiled code for each of the codes, in the same order.
+	'''
+	metrics = metrics or [BuildMetrics() for _ in codes]
+	compiled_codes = []
+	for (module_name, module_path), code_metrics in zip(build_codes(codes, cache, workers, metrics), metrics):
+		start = time.perf_counter()
+		compiled_codes.append(_load_dynamic(module_name, module_path).__invoke())
+		code_metrics.load_time = time.perf_counter() - start
+	return compiled_codes
+
+
+def build_codes(
+	codes: List[str],
+	cache: Optional[cerializer.compile_cache.CompileCache] = None,
+	workers: Optional[int] = None,
+	metrics: Optional[List[BuildMetrics]] = None,
+) -> List[Tuple[str, str]]:
+	'''
+	Builds extension modules for multiple codes without loading them.
+	Modules missing in the cache are built in a pool of worker processes.
+	:param codes: string representations of the code to be compiled.
+	:param cache: compile cache to use, defaults to cerializer.compile_cache.DEFAULT_COMPILE_CACHE.
+	:param workers: number of worker processes, defaults to the number of CPUs.
+	:param metrics: if given, filled in with the metrics of the build of each of the codes.
+	:return: tuples in form of (module_name, module_path) for each of the codes, in the same order.
+	'''
+	cache = cache or cerializer.compile_cache.DEFAULT_COMPILE_CACHE
+	metrics = metrics or [BuildMetrics() for _ in codes]
+	module_names = [cache.get_module_name(code) for code in codes]
+	module_paths: Dict[str, str] = {}
+	build_times: Dict[str, Tuple[float, float]] = {}
+	to_build: Dict[str, str] = {}
+	for module_name, code in zip(module_names, codes):
+		if module_name in module_paths or module_name in to_build:
+			continue
+		module_path = cache.lookup(module_name)
+		if module_path is None:
+			to_build[module_name] = code
+		else:
+			module_paths[module_name] = module_path
+	if to_build:
+		with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+			futures = {
+				module_name: executor.submit(_build_module, code, module_name, cache.lib_dir)
+				for module_name, code in to_build.items()
+			}
+			for module_name, future in futures.items():
+				module_path, cythonize_time, c_compile_time = future.result()
+				module_paths[module_name] = module_path
+				build_times[module_name] = (cythonize_time, c_compile_time)
+		cache.evict(keep = tuple(module_paths))
+	for module_name, code, code_metrics in zip(module_names, codes, metrics):
+		code_metrics.cythonize_time, code_metrics.c_compile_time = build_times.get(module_name, (0.0, 0.0))
+		_fill_build_metrics(code_metrics, module_name, module_paths[module_name], code, module_name not in to_build)
+	return [(module_name, module_paths[module_name]) for module_name in module_names]
+
+
+def load_prebuilt_code(package: str, module_name: str) -> Any:
+	'''
+	Imports a module built ahead of time by cerializer.build.
+	:param package: name of the package with prebuilt modules
+	:param module_name: name of the module within the package
+	:return: Compiled code.
+	'''
+	return importlib.import_module(f'{package}.{module_name}').__invoke()
+
+
+def _fill_build_metrics(
+	metrics: BuildMetrics,
+	module_name: str,
+	module_path: str,
+	code: str,
+	cache_hit: bool,
+) -> None:
+	'''
+	Fills in the metrics known once a module is built.
+	:return: None
+	'''
+	metrics.module_name = module_name
+	metrics.cache_hit = cache_hit
+	metrics.source_size = len(code.encode('utf-8'))
+	try:
+		metrics.module_size = os.path.getsize(module_path)
+	except OSError:
+		metrics.module_size = 0
 
 
 def _load_dynamic(name: str, module_path: str) -> Any:
 	'''
 	Function for dynamic loading of extensions.
+	An extension can only be initialised once per process, so loaded modules are remembered.
 	:param name: name of extension
 	:param module_path: path to module
 	:return: imported extension
 	'''
-	# mypy does not understand ExtensionFileLoader init
-	return importlib.machinery.ExtensionFileLoader(name, module_path).load_module()  # type: ignore
+	with _LOADED_MODULES_LOCK:
+		if module_path not in _LOADED_MODULES:
+			loader = importlib.machinery.ExtensionFileLoader(name, module_path)
+			_LOADED_MODULES[module_path] = loader.load_module()
+		return _LOADED_MODULES[module_path]
 
 
 def _cython_inline(
 	complete_code: str,
-	lib_dir: str = os.path.join(Cython.Utils.get_cython_cache_dir(), 'inline'),
+	cache: cerializer.compile_cache.CompileCache,
+	metrics: BuildMetrics,
 ) -> Any:
 	'''
 	Compiles any Cython code at runtime.
-	:param complete_code: code to copile
-	:param lib_dir: cash dir
+	If the compile cache already holds a module for the code, it is loaded without running Cython or gcc.
+	:param complete_code: code to compile
+	:param cache: compile cache
+	:param metrics: metrics to fill in
 	:return: Compiled code.
 	'''
-	key = complete_code, sys.version_info, sys.executable, 3, Cython.__version__
-	module_name = '_cython_inline_' + hashlib.md5(str(key).encode('utf-8')).hexdigest()
+	module_name = cache.get_module_name(complete_code)
+	module_path = cache.lookup(module_name)
+	cache_hit = module_path is not None
+	if module_path is None:
+		module_path, metrics.cythonize_time, metrics.c_compile_time = _build_module(
+			complete_code,
+			module_name,
+			cache.lib_dir,
+		)
+		cache.evict(keep = (module_name,))
+	_fill_build_metrics(metrics, module_name, module_path, complete_code, cache_hit)
+	start = time.perf_counter()
+	compiled_code = _load_dynamic(module_name, module_path).__invoke()
+	metrics.load_time = time.perf_counter() - start
+	return compiled_code
 
-	build_extension = Cython.Build.Inline._get_build_extension()
-	module_path = os.path.join(lib_dir, module_name + build_extension.get_ext_filename(''))
 
-	code = []
-	for line in complete_code.split('\n'):
-		code.append('    ' + line)
+def _build_module(complete_code: str, module_name: str, lib_dir: str) -> Tuple[str, float, float]:
+	'''
+	Runs Cython and the C compiler for the code.
+	The module is built in a private directory and moved into lib_dir once linked,
+	so that concurrent builders never load or overwrite a partially written extension.
+	:param complete_code: code to compile
+	:param module_name: name of the module to build
+	:param lib_dir: directory to build the module in
+	:return: tuple in form of (path to the built extension, Cython time, C compiler time)
+	'''
+	build_extension = Cython.Build.Inline._get_build_extension()
+	module_file_name = module_name + build_extension.get_ext_filename('')
+	module_path = os.path.join(lib_dir, module_file_name)
 
 	if not os.path.exists(lib_dir):
-		os.makedirs(lib_dir)
+		os.makedirs(lib_dir, exist_ok = True)
 	# -w silences gcc
 	cflags: List[str] = ['-w']
 	c_include_dirs: List[str] = []
-	pyx_file = os.path.join(lib_dir, module_name + '.pyx')
-	fh = open(pyx_file, 'w')
+	# sources and object files are of no use once the extension is linked, they would only grow the cache
+	build_dir = tempfile.mkdtemp(prefix = '.build-', dir = lib_dir)
 	try:
-		fh.write(complete_code)
+		pyx_file = os.path.join(build_dir, module_name + '.pyx')
+		fh = open(pyx_file, 'w')
+		try:
+			fh.write(complete_code)
+		finally:
+			fh.close()
+		extension = distutils.core.Extension(
+			name = module_name,
+			sources = [pyx_file],
+			include_dirs = c_include_dirs,
+			extra_compile_args = cflags,
+		)
+		start = time.perf_counter()
+		build_extension.extensions = Cython.Build.Dependencies.cythonize(
+			[extension],
+			include_path = ['.', cerializer.constants.PROJECT_ROOT],
+			quiet = True,
+		)
+		cythonize_time = time.perf_counter() - start
+		start = time.perf_counter()
+		build_extension.build_lib = build_dir
+		build_extension.build_temp = os.path.join(build_dir, 'temp')
+		build_extension.run()
+		c_compile_time = time.perf_counter() - start
+		# the rename is atomic, other processes see either no module or the complete one
+		os.replace(os.path.join(build_dir, module_file_name), module_path)
 	finally:
-		fh.close()
-	extension = distutils.core.Extension(
-		name = module_name,
-		sources = [pyx_file],
-		include_dirs = c_include_dirs,
-		extra_compile_args = cflags,
-	)
-	if build_extension is None:
-		build_extension = Cython.Build.Inline._get_build_extension()
-	build_extension.extensions = Cython.Build.Dependencies.cythonize(
-		[extension],
-		include_path = ['.'],
-		quiet = True,
-	)
-	build_extension.build_temp = os.path.dirname(pyx_file)
-	build_extension.build_lib = lib_dir
-	build_extension.run()
-	module = _load_dynamic(module_name, module_path)
-	return module.__invoke()
+		shutil.rmtree(build_dir, ignore_errors = True)
+	return module_path, cythonize_time, c_compile_time
@@ -33,11 +33,42 @@ TEST_SCHEMATA_ROOTS = [
 ]
 
 
+# bounds of the on-disk cache of compiled schemata
+COMPILE_CACHE_MAX_SIZE = 1024 ** 3  # bytes
+COMPILE_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # seconds since last use
+
+# .pxd files cimported by the generated code, their inline functions end up in every compiled module
+CIMPORTED_PXD_FILES = ('read.pxd', 'read_buffer.pxd', 'write.pxd', 'prepare.pxd')
+
+# number of concurrent requests the daemon sends to the schema registry
+SCHEMA_REGISTRY_FETCH_WORKERS = 8
+# number of threads compiling schemata fetched by the daemon
+DAEMON_COMPILATION_WORKERS = 2
+# seconds for which a schema registry id unknown to the registry is not fetched again
+SCHEMA_ID_NEGATIVE_CACHE_TIME = 60
+
+
 class SerializationMode(enum.Enum):
 	MODE_SERIALIZE = 'serialize'
 	MODE_DESERIALIZE = 'deserialize'
 
 
+# name of the generated function appending serialized data to a bytearray
+SERIALIZE_INTO = 'serialize_into'
+# size in bytes after which the per thread scratch buffer of serialize_to_scratch is emptied
+SCRATCH_BUFFER_SIZE = 64 * 1024
+
+# identifier under which self contained schemata, e.g. the ones embedded in container files, are compiled
+EMBEDDED_SCHEMA_IDENTIFIER = 'cerializer.embedded_schema'
+# size in bytes of the serialized records after which a container file block is written
+CONTAINER_BLOCK_SIZE = 64 * 1024
+# number of threads compressing and decompressing container file blocks
+CONTAINER_COMPRESSION_WORKERS = 2
+
+# NumPy is an optional dependency, needed only to decode records into columns
+NUMPY = importlib.util.find_spec('numpy') is not None
+
+
 QUANTLANE = False
 
 # developed solely for Quantlane purposes
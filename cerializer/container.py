@@ -0,0 +1,394 @@
+import collections
+import concurrent.futures
+import importlib
+import json
+import os
+import struct
+import types
+import zlib
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+import read_buffer
+
+import cerializer.cerializer
+import cerializer.constants
+import cerializer.fingerprint
+import cerializer.interpreter
+import cerializer.schemata
+
+
+
+MAGIC = b'Obj\x01'
+SYNC_MARKER_SIZE = 16
+SCHEMA_KEY = 'avro.schema'
+CODEC_KEY = 'avro.codec'
+NULL_CODEC = 'null'
+DEFLATE_CODEC = 'deflate'
+SNAPPY_CODEC = 'snappy'
+ZSTANDARD_CODEC = 'zstandard'
+
+
+def _import_optional(name: str) -> Optional[types.ModuleType]:
+	'''
+	Imports an optional dependency.
+	:param name: module name
+	:return: the module, None if it is not installed
+	'''
+	try:
+		return importlib.import_module(name)
+	except ImportError:
+		return None
+
+
+snappy = _import_optional('snappy')
+zstandard = _import_optional('zstandard')
+
+
+class Codec(NamedTuple):
+	'''
+	Block compression of container files.
+	'''
+	# takes the data and the compression level, None for the default one
+	compress: Callable[[bytearray, Optional[int]], Union[bytes, bytearray]]
+	decompress: Callable[[bytes], bytes]
+
+
+def _deflate(data: Union[bytes, bytearray], level: Optional[int]) -> bytes:
+	# Avro uses raw deflate, without the zlib header and checksum
+	compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15)
+	return compressor.compress(data) + compressor.flush()
+
+
+def _inflate(data: bytes) -> bytes:
+	return zlib.decompress(data, -15)
+
+
+def _get_snappy_codec(snappy_module: types.ModuleType) -> Codec:
+	'''
+	Returns the snappy codec.
+	:param snappy_module: imported snappy module
+	:return: codec
+	'''
+	def compress(data: Union[bytes, bytearray], level: Optional[int]) -> bytes:
+		# Avro appends the big endian CRC32 of the uncompressed data
+		compressed: bytes = snappy_module.compress(data)
+		return compressed + struct.pack('>I', zlib.crc32(data))
+
+	def decompress(data: bytes) -> bytes:
+		decompressed: bytes = snappy_module.decompress(data[:-4])
+		if struct.pack('>I', zlib.crc32(decompressed)) != data[-4:]:
+			raise ValueError('Checksum of a snappy compressed block does not match.')
+		return decompressed
+
+	return Codec(compress, decompress)
+
+
+def _get_zstandard_codec(zstandard_module: types.ModuleType) -> Codec:
+	'''
+	Returns the zstandard codec.
+	:param zstandard_module: imported zstandard module
+	:return: codec
+	'''
+	def compress(data: Union[bytes, bytearray], level: Optional[int]) -> bytes:
+		compressed: bytes = zstandard_module.ZstdCompressor(level = 3 if level is None else level).compress(data)
+		return compressed
+
+	def decompress(data: bytes) -> bytes:
+		# other writers may not store the content size in the frame, which ZstdDecompressor.decompress requires
+		decompressed: bytes = zstandard_module.ZstdDecompressor().decompressobj().decompress(data)
+		return decompressed
+
+	return Codec(compress, decompress)
+
+
+# codecs available in this environment, snappy and zstandard are optional dependencies
+CODECS: Dict[str, Codec] = {
+	NULL_CODEC: Codec(lambda data, level: data, lambda data: data),
+	DEFLATE_CODEC: Codec(_deflate, _inflate),
+}
+if snappy is not None:
+	CODECS[SNAPPY_CODEC] = _get_snappy_codec(snappy)
+if zstandard is not None:
+	CODECS[ZSTANDARD_CODEC] = _get_zstandard_codec(zstandard)
+
+
+def get_codec(codec: str) -> Codec:
+	'''
+	Returns the implementation of a codec.
+	:param codec: codec name as stored in the file header
+	:return: codec
+	'''
+	if codec not in CODECS:
+		raise ValueError(f'Codec = {codec} is not supported, supported codecs are {sorted(CODECS)}.')
+	return CODECS[codec]
+
+
+class ContainerWriter:
+	'''
+	Writes records of one schema into an Avro Object Container File.
+	The header embeds the schema with all the referenced schemata expanded, so that any Avro reader can read the file.
+	Records are serialized into a block in memory, the block is written out once it reaches block_size bytes.
+	Blocks are compressed on a thread pool while the next block is being serialized.
+	'''
+
+	def __init__(
+		self,
+		fo: BinaryIO,
+		cerializer_schemata: cerializer.schemata.CerializerSchemata,
+		namespace: str,
+		schema_name: str,
+		block_size: int = cerializer.constants.CONTAINER_BLOCK_SIZE,
+		metadata: Optional[Dict[str, bytes]] = None,
+		sync_marker: Optional[bytes] = None,
+		codec: str = NULL_CODEC,
+		compression_level: Optional[int] = None,
+		compression_workers: int = cerializer.constants.CONTAINER_COMPRESSION_WORKERS,
+	) -> None:
+		'''
+		Writes the header of the file.
+		:param fo: binary file like object to write to
+		:param cerializer_schemata: Cerializer schema database
+		:param namespace: schema namespace
+		:param schema_name: schema name
+		:param block_size: size in bytes of the serialized records after which a block is written
+		:param metadata: additional file metadata
+		:param sync_marker: 16 bytes separating the blocks, random by default
+		:param codec: block compression, one of CODECS
+		:param compression_level: codec specific compression level, None for the default one
+		:param compression_workers: number of threads compressing blocks, 0 to compress on the calling thread
+		'''
+		self._fo = fo
+		self._codec = get_codec(codec)
+		self._compression_level = compression_level
+		self._cerializer = cerializer.cerializer.Cerializer(cerializer_schemata, namespace, schema_name)
+		self._block_size = block_size
+		self._sync_marker = os.urandom(SYNC_MARKER_SIZE) if sync_marker is None else sync_marker
+		if len(self._sync_marker) != SYNC_MARKER_SIZE:
+			raise ValueError(f'Sync marker has to be {SYNC_MARKER_SIZE} bytes long.')
+		self._block = bytearray()
+		self._block_count = 0
+		schema = cerializer_schemata.load_schema(self._cerializer.schema_identifier)
+		header_metadata = {
+			**(metadata or {}),
+			SCHEMA_KEY: cerializer.fingerprint.get_codec_form(schema, cerializer_schemata.load_schema).encode('utf-8'),
+			CODEC_KEY: codec.encode('utf-8'),
+		}
+		self._fo.write(_get_header(header_metadata, self._sync_marker))
+		# blocks being compressed, written out in order
+		self._pending_blocks: Deque[Tuple[int, concurrent.futures.Future]] = collections.deque()
+		self._max_pending_blocks = 2 * compression_workers
+		self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+		if compression_workers and codec != NULL_CODEC:
+			self._executor = concurrent.futures.ThreadPoolExecutor(
+				max_workers = compression_workers,
+				thread_name_prefix = 'cerializer-compression',
+			)
+
+	def write(self, record: Any) -> None:
+		'''
+		Writes a record.
+		:param record: record to write
+		:return: None
+		'''
+		self._cerializer.serialize_into(record, self._block, len(self._block))
+		self._block_count += 1
+		if len(self._block) >= self._block_size:
+			self._submit_block()
+
+	def write_many(self, records: Iterable[Any]) -> None:
+		'''
+		Writes a batch of records. The whole batch ends up in one block.
+		:param records: records to write
+		:return: None
+		'''
+		offsets = self._cerializer.serialize_many_into(records, self._block)
+		self._block_count += len(offsets) - 1
+		if len(self._block) >= self._block_size:
+			self._submit_block()
+
+	def flush(self) -> None:
+		'''
+		Writes out the records in memory as a block and waits for all the blocks to be written.
+		:return: None
+		'''
+		self._submit_block()
+		self._write_blocks(wait = True)
+		self._fo.flush()
+
+	def close(self) -> None:
+		'''
+		Flushes the file and stops the compression threads. The file object itself is left open.
+		:return: None
+		'''
+		self.flush()
+		if self._executor is not None:
+			self._executor.shutdown()
+			self._executor = None
+
+	def _submit_block(self) -> None:
+		'''
+		Hands the records in memory over for compression and starts a new block.
+		:return: None
+		'''
+		if not self._block_count:
+			return
+		block, block_count = self._block, self._block_count
+		self._block = bytearray()
+		self._block_count = 0
+		if self._executor is None:
+			self._write_block(block_count, self._codec.compress(block, self._compression_level))
+			return
+		self._pending_blocks.append((
+			block_count,
+			self._executor.submit(self._codec.compress, block, self._compression_level),
+		))
+		self._write_blocks(wait = False)
+
+	def _write_blocks(self, wait: bool) -> None:
+		'''
+		Writes out compressed blocks in order.
+		:param wait: wait for all the blocks, otherwise only for the ones over the limit of pending blocks
+		:return: None
+		'''
+		while self._pending_blocks:
+			block_count, future = self._pending_blocks[0]
+			if not (wait or future.done() or len(self._pending_blocks) > self._max_pending_blocks):
+				return
+			self._pending_blocks.popleft()
+			self._write_block(block_count, future.result())
+
+	def _write_block(self, block_count: int, block: Union[bytes, bytearray]) -> None:
+		block_header = bytearray()
+		cerializer.interpreter.write_long(block_count, block_header)
+		cerializer.interpreter.write_long(len(block), block_header)
+		self._fo.write(block_header)
+		self._fo.write(block)
+		self._fo.write(self._sync_marker)
+
+	def __enter__(self) -> 'ContainerWriter':
+		return self
+
+	def __exit__(self, *args: Any) -> None:
+		self.close()
+
+
+class ContainerReader:
+	'''
+	Reads records from an Avro Object Container File.
+	The code for the embedded schema is looked up by its fingerprint or compiled.
+	Iterating over the reader yields the records. The following blocks are decompressed on a thread pool
+	while the current one is being deserialized, so only a few blocks are held in memory at a time.
+	'''
+
+	def __init__(
+		self,
+		fo: BinaryIO,
+		cerializer_schemata: cerializer.schemata.CerializerSchemata,
+		decompression_workers: int = cerializer.constants.CONTAINER_COMPRESSION_WORKERS,
+		reader_schema_identifier: Optional[str] = None,
+	) -> None:
+		'''
+		Reads the header of the file.
+		:param fo: binary file like object to read from
+		:param cerializer_schemata: Cerializer schema database used to find or compile the code for the file schema
+		:param decompression_workers: number of threads decompressing blocks, 0 to decompress on the iterating thread
+		:param reader_schema_identifier: if given, records are resolved from the file schema to this schema
+		'''
+		self._fo = fo
+		self._decompression_workers = decompression_workers
+		self.metadata, self._sync_marker = _read_header(fo)
+		self.schema = json.loads(self.metadata[SCHEMA_KEY].decode('utf-8'))
+		self.codec = self.metadata.get(CODEC_KEY, NULL_CODEC.encode('utf-8')).decode('utf-8')
+		self._decompress = get_codec(self.codec).decompress
+		if reader_schema_identifier is None:
+			self._deserialize = cerializer_schemata.get_code_for_schema(self.schema)['deserialize']
+		else:
+			self._deserialize = cerializer_schemata.get_resolving_code(self.schema, reader_schema_identifier)['deserialize']
+
+	def __iter__(self) -> Iterator[Any]:
+		deserialize = self._deserialize
+		for block_count, block in self._iterate_decompressed_blocks():
+			reader = read_buffer.BufferReader(block)
+			for _ in range(block_count):
+				yield deserialize(reader)
+
+	def _iterate_decompressed_blocks(self) -> Iterator[Tuple[int, bytes]]:
+		'''
+		Decompresses the blocks of the file, a few blocks ahead of the consumer.
+		:return: iterator of tuples in form of (number of records, serialized records)
+		'''
+		if self.codec == NULL_CODEC or not self._decompression_workers:
+			for block_count, block in self.iterate_blocks():
+				yield block_count, self._decompress(block)
+			return
+		max_pending_blocks = 2 * self._decompression_workers
+		with concurrent.futures.ThreadPoolExecutor(
+			max_workers = self._decompression_workers,
+			thread_name_prefix = 'cerializer-decompression',
+		) as executor:
+			pending_blocks: Deque[Tuple[int, concurrent.futures.Future]] = collections.deque()
+			for block_count, block in self.iterate_blocks():
+				pending_blocks.append((block_count, executor.submit(self._decompress, block)))
+				if len(pending_blocks) > max_pending_blocks:
+					block_count, future = pending_blocks.popleft()
+					yield block_count, future.result()
+			while pending_blocks:
+				block_count, future = pending_blocks.popleft()
+				yield block_count, future.result()
+
+	def iterate_blocks(self) -> Iterator[Tuple[int, bytes]]:
+		'''
+		Reads the blocks of the file one by one.
+		:return: iterator of tuples in form of (number of records, serialized records compressed by the file codec)
+		'''
+		while True:
+			try:
+				block_count = cerializer.interpreter.read_long(self._fo)
+			except StopIteration:
+				return
+			block_size = cerializer.interpreter.read_long(self._fo)
+			block = self._fo.read(block_size)
+			if len(block) != block_size:
+				raise EOFError(f'Block of {block_size} bytes is truncated to {len(block)} bytes.')
+			if self._fo.read(SYNC_MARKER_SIZE) != self._sync_marker:
+				raise ValueError('Sync marker after a block does not match the one in the header.')
+			yield block_count, block
+
+
+def _get_header(metadata: Dict[str, bytes], sync_marker: bytes) -> bytearray:
+	'''
+	Serializes the header of a container file.
+	:param metadata: file metadata
+	:param sync_marker: sync marker
+	:return: serialized header
+	'''
+	header = bytearray(MAGIC)
+	cerializer.interpreter.write_long(len(metadata), header)
+	for key, value in metadata.items():
+		cerializer.interpreter.write_string(key, header)
+		cerializer.interpreter.write_bytes(value, header)
+	cerializer.interpreter.write_long(0, header)
+	header += sync_marker
+	return header
+
+
+def _read_header(fo: BinaryIO) -> Tuple[Dict[str, bytes], bytes]:
+	'''
+	Reads the header of a container file.
+	:param fo: binary file like object positioned at the start of the file
+	:return: tuple in form of (file metadata, sync marker)
+	'''
+	if fo.read(len(MAGIC)) != MAGIC:
+		raise ValueError('Not an Avro Object Container File.')
+	metadata = {}
+	block_count = cerializer.interpreter.read_long(fo)
+	while block_count != 0:
+		if block_count < 0:
+			block_count = -block_count
+			# size of the block in bytes
+			cerializer.interpreter.read_long(fo)
+		for _ in range(block_count):
+			key = cerializer.interpreter.read_string(fo)
+			metadata[key] = cerializer.interpreter.read_bytes(fo)
+		block_count = cerializer.interpreter.read_long(fo)
+	return metadata, fo.read(SYNC_MARKER_SIZE)
@@ -0,0 +1,127 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import cerializer.constants
+
+
+
+# type names that never refer to a named type
+_KEYWORDS = cerializer.constants.BASIC_TYPES | cerializer.constants.COMPLEX_TYPES | {'null', 'error'}
+_NAMED_TYPES = {cerializer.constants.RECORD, cerializer.constants.ENUM, cerializer.constants.FIXED, 'error'}
+
+
+class DependencyGraph:
+	'''
+	Graph of named types, with an edge from each named type to every named type it defines or references.
+	A named type starts a cycle if it belongs to a strongly connected component with more than one node
+	or references itself. The graph is only ever extended, so cycles are searched for only among
+	the nodes reachable from the ones whose edges changed.
+	'''
+
+	def __init__(self) -> None:
+		self._edges: Dict[str, Set[str]] = {}
+
+	def add_schemata(self, schemata: Iterable[Any]) -> Set[str]:
+		'''
+		Adds named types defined within the given parsed schemata and their dependencies.
+		:param schemata: parsed schemata
+		:return: named types whose dependencies changed
+		'''
+		new_edges: Dict[str, Set[str]] = {}
+		for schema in schemata:
+			_scan(schema, None, new_edges)
+		changed = set()
+		for name, dependencies in new_edges.items():
+			edges = self._edges.setdefault(name, set())
+			if name not in changed and not dependencies <= edges:
+				changed.add(name)
+			edges |= dependencies
+		return changed
+
+	def find_cycle_starting_nodes(self, start_nodes: Iterable[str]) -> Set[str]:
+		'''
+		Finds the named types in cycles reachable from the given nodes.
+		Iterative version of Tarjan's algorithm, so that deep schemata do not hit the recursion limit.
+		:param start_nodes: nodes to start the search from
+		:return: cycle starting nodes
+		'''
+		index: Dict[str, int] = {}
+		lowlink: Dict[str, int] = {}
+		stack: List[str] = []
+		on_stack: Set[str] = set()
+		cycle_starting_nodes: Set[str] = set()
+		for start_node in start_nodes:
+			if start_node in index:
+				continue
+			work: List[Tuple[str, Iterator[str]]] = [(start_node, self._visit(start_node, index, lowlink, stack, on_stack))]
+			while work:
+				node, dependencies = work[-1]
+				for dependency in dependencies:
+					if dependency not in index:
+						work.append((dependency, self._visit(dependency, index, lowlink, stack, on_stack)))
+						break
+					if dependency in on_stack:
+						lowlink[node] = min(lowlink[node], index[dependency])
+				else:
+					work.pop()
+					if work:
+						parent = work[-1][0]
+						lowlink[parent] = min(lowlink[parent], lowlink[node])
+					if lowlink[node] == index[node]:
+						component = []
+						while True:
+							member = stack.pop()
+							on_stack.discard(member)
+							component.append(member)
+							if member == node:
+								break
+						if len(component) > 1 or node in self._edges.get(node, ()):
+							cycle_starting_nodes.update(component)
+		return cycle_starting_nodes
+
+	def _visit(
+		self,
+		node: str,
+		index: Dict[str, int],
+		lowlink: Dict[str, int],
+		stack: List[str],
+		on_stack: Set[str],
+	) -> Iterator[str]:
+		'''
+		Numbers a newly discovered node and pushes it on the stack.
+		:return: iterator over dependencies of the node
+		'''
+		index[node] = lowlink[node] = len(index)
+		stack.append(node)
+		on_stack.add(node)
+		return iter(self._edges.get(node, ()))
+
+
+def _scan(schema: Any, owner: Optional[str], edges: Dict[str, Set[str]]) -> None:
+	'''
+	Collects edges of the dependency graph from a parsed schema.
+	:param schema: schema to scan
+	:param owner: innermost named type the schema is part of
+	:param edges: edges collected so far
+	:return: None
+	'''
+	if isinstance(schema, str):
+		if owner is not None and schema not in _KEYWORDS:
+			edges[owner].add(schema)
+	elif isinstance(schema, list):
+		for element in schema:
+			_scan(element, owner, edges)
+	elif isinstance(schema, dict):
+		type_ = schema.get('type')
+		name = schema.get('name')
+		if name and type_ in _NAMED_TYPES:
+			edges.setdefault(name, set())
+			if owner is not None:
+				edges[owner].add(name)
+			owner = name
+		if not isinstance(type_, str) or type_ not in _KEYWORDS:
+			_scan(type_, owner, edges)
+		for field in schema.get('fields', ()):
+			_scan(field['type'], owner, edges)
+		for key in ('items', 'values'):
+			if key in schema:
+				_scan(schema[key], owner, edges)
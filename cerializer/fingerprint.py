@@ -0,0 +1,193 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+
+PRIMITIVE_TYPES = ('null', 'boolean', 'int', 'long', 'float', 'double', 'bytes', 'string')
+NAMED_TYPES = ('record', 'error', 'enum', 'fixed')
+COMPLEX_TYPES = NAMED_TYPES + ('array', 'map')
+# attributes kept by the Parsing Canonical Form, in this order
+CANONICAL_ATTRIBUTES = ('name', 'type', 'fields', 'symbols', 'items', 'values', 'size')
+# attributes that do not change the wire format but do change the generated code
+CODEC_ATTRIBUTES = ('logicalType', 'precision', 'scale', 'default')
+# attributes that do not change the generated code of a schema but do change how other schemata are resolved to it
+RESOLUTION_ATTRIBUTES = CODEC_ATTRIBUTES + ('aliases',)
+
+CRC_64_AVRO_EMPTY = 0xc15d213aa4d7a795
+
+
+def _get_crc_64_avro_table() -> List[int]:
+	table = []
+	for i in range(256):
+		fingerprint = i
+		for _ in range(8):
+			fingerprint = (fingerprint >> 1) ^ (CRC_64_AVRO_EMPTY & -(fingerprint & 1))
+		table.append(fingerprint)
+	return table
+
+
+_CRC_64_AVRO_TABLE = _get_crc_64_avro_table()
+
+
+def get_parsing_canonical_form(
+	schema: Any,
+	load_schema: Optional[Callable[[str], Any]] = None,
+	extra_attributes: Tuple[str, ...] = (),
+) -> str:
+	'''
+	Returns the Avro Parsing Canonical Form of a schema.
+	Named types referenced but not defined in the schema are expanded in place using load_schema,
+	so that schemata referencing other schemata in the database are fingerprinted by their full content.
+	:param schema: schema, parsed or not
+	:param load_schema: callback returning the schema of a fullname, raising RuntimeError if unknown
+	:param extra_attributes: attributes to keep on top of the ones defined by the specification
+	:return: canonical form
+	'''
+	return _canonicalise(schema, '', set(), load_schema, extra_attributes)
+
+
+def get_codec_form(schema: Any, load_schema: Optional[Callable[[str], Any]] = None) -> str:
+	'''
+	Returns the Parsing Canonical Form extended with all the attributes the generated code depends on.
+	Schemata with the same codec form share compiled code.
+	:param schema: schema, parsed or not
+	:param load_schema: callback returning the schema of a fullname, raising RuntimeError if unknown
+	:return: codec form
+	'''
+	return get_parsing_canonical_form(schema, load_schema, CODEC_ATTRIBUTES)
+
+
+def get_resolution_form(schema: Any, load_schema: Optional[Callable[[str], Any]] = None) -> str:
+	'''
+	Returns the codec form extended with the attributes used by schema resolution.
+	Pairs of writer and reader schemata with the same resolution forms share compiled resolving code.
+	:param schema: schema, parsed or not
+	:param load_schema: callback returning the schema of a fullname, raising RuntimeError if unknown
+	:return: resolution form
+	'''
+	return get_parsing_canonical_form(schema, load_schema, RESOLUTION_ATTRIBUTES)
+
+
+def get_crc_64_avro_fingerprint(canonical_form: str) -> int:
+	'''
+	Returns the 64 bit Rabin fingerprint (CRC-64-AVRO) of a canonical form.
+	:param canonical_form: Parsing Canonical Form
+	:return: fingerprint
+	'''
+	fingerprint = CRC_64_AVRO_EMPTY
+	for byte in canonical_form.encode('utf-8'):
+		fingerprint = (fingerprint >> 8) ^ _CRC_64_AVRO_TABLE[(fingerprint ^ byte) & 0xff]
+	return fingerprint
+
+
+def get_sha_256_fingerprint(canonical_form: str) -> bytes:
+	'''
+	Returns the SHA-256 fingerprint of a canonical form.
+	:param canonical_form: Parsing Canonical Form
+	:return: fingerprint
+	'''
+	return hashlib.sha256(canonical_form.encode('utf-8')).digest()
+
+
+def _get_fullname(name: str, namespace: str) -> str:
+	if '.' in name or not namespace:
+		return name
+	return f'{namespace}.{name}'
+
+
+def _dumps(value: Any) -> str:
+	return json.dumps(value, separators = (',', ':'), ensure_ascii = False, sort_keys = True)
+
+
+def _canonicalise(
+	schema: Any,
+	namespace: str,
+	defined: Set[str],
+	load_schema: Optional[Callable[[str], Any]],
+	extra_attributes: Tuple[str, ...],
+) -> str:
+	'''
+	Canonicalises a schema.
+	:param schema: schema to canonicalise
+	:param namespace: enclosing namespace
+	:param defined: fullnames of named types already written out
+	:param load_schema: callback returning the schema of a fullname
+	:param extra_attributes: attributes to keep on top of the canonical ones
+	:return: canonical form
+	'''
+	if isinstance(schema, list):
+		return '[' + ','.join(
+			_canonicalise(element, namespace, defined, load_schema, extra_attributes)
+			for element in schema
+		) + ']'
+	if isinstance(schema, str):
+		if schema in PRIMITIVE_TYPES:
+			return _dumps(schema)
+		fullname = _get_fullname(schema, namespace)
+		if fullname in defined or load_schema is None:
+			return _dumps(fullname)
+		try:
+			named_schema = load_schema(fullname)
+		except RuntimeError:
+			return _dumps(fullname)
+		return _canonicalise(named_schema, namespace, defined, load_schema, extra_attributes)
+	type_ = schema['type']
+	kept_extra_attributes = tuple(attribute for attribute in extra_attributes if attribute in schema)
+	attributes: Dict[str, str] = {}
+	if isinstance(type_, str) and type_ in COMPLEX_TYPES:
+		if type_ in NAMED_TYPES:
+			if '.' in schema['name']:
+				namespace = schema['name'].rpartition('.')[0]
+			else:
+				namespace = schema.get('namespace', namespace)
+			fullname = _get_fullname(schema['name'], namespace)
+			defined.add(fullname)
+			attributes['name'] = _dumps(fullname)
+		attributes['type'] = _dumps('record' if type_ == 'error' else type_)
+	elif not kept_extra_attributes:
+		# a primitive written as an object or a schema wrapped in another object
+		return _canonicalise(type_, namespace, defined, load_schema, extra_attributes)
+	else:
+		attributes['type'] = _canonicalise(type_, namespace, defined, load_schema, extra_attributes)
+	if 'fields' in schema:
+		attributes['fields'] = '[' + ','.join(
+			_canonicalise_field(field, namespace, defined, load_schema, extra_attributes)
+			for field in schema['fields']
+		) + ']'
+	if 'symbols' in schema:
+		attributes['symbols'] = _dumps(list(schema['symbols']))
+	for attribute in ('items', 'values'):
+		if attribute in schema:
+			attributes[attribute] = _canonicalise(schema[attribute], namespace, defined, load_schema, extra_attributes)
+	if 'size' in schema:
+		attributes['size'] = str(int(schema['size']))
+	for attribute in kept_extra_attributes:
+		attributes[attribute] = _dumps(schema[attribute])
+	return '{' + ','.join(
+		f'{_dumps(attribute)}:{attributes[attribute]}'
+		for attribute in CANONICAL_ATTRIBUTES + kept_extra_attributes
+		if attribute in attributes
+	) + '}'
+
+
+def _canonicalise_field(
+	field: Dict[str, Any],
+	namespace: str,
+	defined: Set[str],
+	load_schema: Optional[Callable[[str], Any]],
+	extra_attributes: Tuple[str, ...],
+) -> str:
+	'''
+	Canonicalises a record field. Field names are not namespaced.
+	'''
+	attributes = [
+		f'"name":{_dumps(field["name"])}',
+		f'"type":{_canonicalise(field["type"], namespace, defined, load_schema, extra_attributes)}',
+	]
+	attributes.extend(
+		f'{_dumps(attribute)}:{_dumps(field[attribute])}'
+		for attribute in extra_attributes
+		if attribute in field
+	)
+	return '{' + ','.join(attributes) + '}'
@@ -0,0 +1,703 @@
+'''
+Pure Python, schema walking implementation of the code Cerializer generates.
+It is slower than the compiled code but produces the same bytes and objects. It is used as a fallback
+while a schema is being compiled and on hosts without a C compiler.
+
+The schema is walked only once per CerializerSchemata and schema identifier, the result is a tree of
+closures that mirrors the structure of the generated Cython code.
+'''
+import datetime
+import decimal
+import struct
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, List, Tuple, Union
+
+import pytz
+
+import cerializer.utils
+from cerializer import constants
+
+
+
+Writer = Callable[[Any, bytearray], None]
+Reader = Callable[[BinaryIO], Any]
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo = pytz.utc)
+DAYS_SHIFT = datetime.date(1970, 1, 1).toordinal()
+
+MCS_PER_SECOND = 1000000
+MCS_PER_MINUTE = 60000000
+MCS_PER_HOUR = 3600000000
+
+MLS_PER_SECOND = 1000
+MLS_PER_MINUTE = 60000
+MLS_PER_HOUR = 3600000
+
+_FLOAT = struct.Struct('<f')
+_DOUBLE = struct.Struct('<d')
+
+# python types corresponding to Avro types, used to pick a union branch the same way the generated code does
+_PYTHON_TYPES: Dict[str, Any] = {
+	'string': str,
+	'boolean': bool,
+	'int': int,
+	'long': int,
+	'float': float,
+	'double': float,
+	'bytes': bytes,
+	'fixed': (bytes, bytearray),
+}
+
+
+def get_interpreted_code(cerializer_schemata: Any, schema_identifier: str) -> Dict[str, Callable]:
+	'''
+	Returns interpreted code for a schema with the same interface as the compiled code.
+	:param cerializer_schemata: Cerializer schema database
+	:param schema_identifier: schema identifier
+	:return: dict with serialize and deserialize functions
+	'''
+	builder = _InterpreterBuilder(cerializer_schemata, schema_identifier)
+	schema = cerializer.utils.parse_schema(cerializer_schemata.load_schema(schema_identifier))
+	write = builder.get_writer(schema)
+	read = builder.get_reader(schema)
+
+	def serialize_into(data: Any, buffer: bytearray) -> None:
+		write(data, buffer)
+
+	def serialize(data: Any, output: Any) -> None:
+		buffer = bytearray()
+		write(data, buffer)
+		output.write(buffer)
+
+	def deserialize(fo: BinaryIO) -> Any:
+		return read(fo)
+
+	return {
+		'serialize_into': serialize_into,
+		'serialize': serialize,
+		'deserialize': deserialize,
+	}
+
+
+class _InterpreterBuilder:
+	'''
+	Walks a schema and builds reader and writer closures for it.
+	'''
+
+	def __init__(self, cerializer_schemata: Any, schema_identifier: str) -> None:
+		'''
+		:param cerializer_schemata: Cerializer schema database
+		:param schema_identifier: schema identifier, used as the context for loading named types.
+		'''
+		self._schemata = cerializer_schemata
+		self._context_schema = schema_identifier
+		self._named_writers: Dict[str, Writer] = {}
+		self._named_readers: Dict[str, Reader] = {}
+
+	def _load_named(self, name: str, build: Callable[[Any], Callable]) -> Callable:
+		'''
+		Builds a reader or a writer for a named type in the context of that type.
+		:param name: name of the type
+		:param build: get_writer or get_reader
+		:return: reader or writer
+		'''
+		schema = self._schemata.load_schema(name, self._context_schema)
+		old_context = self._context_schema
+		self._context_schema = name
+		try:
+			return build(schema)
+		finally:
+			self._context_schema = old_context
+
+	def _is_named(self, type_: Any) -> bool:
+		return isinstance(type_, str) and type_ not in constants.BASIC_TYPES and type_ in self._schemata
+
+	def get_writer(self, schema: Union[str, List, Dict[str, Any]]) -> Writer:
+		'''
+		Builds a writer for a schema. Writers of fields take the record as datum.
+		:param schema: schema
+		:return: writer
+		'''
+		if isinstance(schema, str):
+			return self._get_type_writer(schema)
+		if isinstance(schema, list):
+			return self._get_union_writer(schema)
+		type_ = schema['type']
+		if 'logicalType' in schema:
+			return self._get_logical_writer(schema)
+		if type_ == constants.RECORD:
+			field_writers = [self._get_field_writer(field) for field in schema['fields']]
+
+			def write_record(datum: Any, buffer: bytearray) -> None:
+				for field_writer in field_writers:
+					field_writer(datum, buffer)
+			return write_record
+		if type_ == constants.ARRAY:
+			item_writer = self.get_writer(schema['items'])
+
+			def write_array(datum: Any, buffer: bytearray) -> None:
+				if len(datum) > 0:
+					write_long(len(datum), buffer)
+					for item in datum:
+						item_writer(item, buffer)
+				write_long(0, buffer)
+			return write_array
+		if type_ == constants.MAP:
+			value_writer = self.get_writer(schema['values'])
+
+			def write_map(datum: Any, buffer: bytearray) -> None:
+				if len(datum) > 0:
+					write_long(len(datum), buffer)
+					for key, value in datum.items():
+						write_string(key, buffer)
+						value_writer(value, buffer)
+				write_long(0, buffer)
+			return write_map
+		if type_ == constants.ENUM:
+			symbols = schema['symbols']
+			return lambda datum, buffer: write_long(symbols.index(datum), buffer)
+		if type_ == constants.FIXED:
+			return write_fixed
+		name = schema.get('name')
+		if name is None:
+			return self.get_writer(type_)
+		# the schema is a field of a record
+		if isinstance(type_, list):
+			union_writer = self._get_union_writer(type_)
+			if 'null' in type_:
+				return lambda datum, buffer: union_writer(datum.get(name), buffer)
+			return lambda datum, buffer: union_writer(datum[name], buffer)
+		value_writer = self.get_writer(type_)
+		default = schema.get('default')
+		if default is None or self._is_named(type_):
+			return lambda datum, buffer: value_writer(datum[name], buffer)
+		default = None if default == 'null' else default
+
+		def write_field_with_default(datum: Any, buffer: bytearray) -> None:
+			# like the compiled code, a missing field is written as its default
+			value = datum.get(name)
+			value_writer(default if value is None else value, buffer)
+		return write_field_with_default
+
+	def _get_field_writer(self, field: Dict[str, Any]) -> Writer:
+		'''
+		Returns a writer for a record field, taking the record as datum.
+		:param field: field schema
+		:return: writer
+		'''
+		if 'logicalType' in field:
+			name = field['name']
+			value_writer = self._get_logical_writer(field)
+			return lambda datum, buffer: value_writer(datum[name], buffer)
+		return self.get_writer(field)
+
+	def _get_type_writer(self, type_: str) -> Writer:
+		'''
+		Returns a writer for a primitive or a named type.
+		:param type_: type name
+		:return: writer
+		'''
+		if type_ in _PRIMITIVE_WRITERS:
+			return _PRIMITIVE_WRITERS[type_]
+		if self._is_named(type_):
+			if type_ not in self._named_writers:
+				# the placeholder makes recursive types refer to the writer being built
+				writers: List[Writer] = []
+				self._named_writers[type_] = lambda datum, buffer: writers[0](datum, buffer)
+				writers.append(self._load_named(type_, self.get_writer))
+				self._named_writers[type_] = writers[0]
+			return self._named_writers[type_]
+		raise NotImplementedError(f'Cant handle schema = {type_}')
+
+	def _get_logical_writer(self, schema: Dict[str, Any]) -> Writer:
+		'''
+		Returns a writer preparing a logical type first.
+		:param schema: schema with a logical type
+		:return: writer
+		'''
+		data_type = schema['type']
+		prepare = self._get_prepare(schema)
+		value_writer = write_fixed if data_type == constants.FIXED else self._get_type_writer(data_type)
+		return lambda datum, buffer: value_writer(prepare(datum), buffer)
+
+	def _get_prepare(self, schema: Dict[str, Any]) -> Callable[[Any], Any]:
+		'''
+		Returns the function preparing a value of a logical type for writing.
+		:param schema: schema with a logical type
+		:return: preparation function
+		'''
+		logical_type = schema['logicalType'].replace('-', '_').lower()
+		if 'nano_time' in logical_type:
+			raise RuntimeError('Nano Time logical type is not supported by the interpreted code.')
+		if logical_type == 'decimal':
+			prepare_decimal = prepare_fixed_decimal if schema['type'] == constants.FIXED else prepare_bytes_decimal
+			return lambda datum: prepare_decimal(datum, schema)
+		return _PREPARE_FUNCTIONS[logical_type]
+
+	def _get_union_writer(self, types: List[Any]) -> Writer:
+		'''
+		Returns a writer for a union. The branch is picked exactly like in the generated code,
+		either by an explicit (type name, value) tuple or by the type of the value, null first.
+		:param types: union types
+		:return: writer
+		'''
+		branches: List[Tuple[int, Any, Callable[[Any], bool], Writer]] = []
+		ordered_types = (['null'] if 'null' in types else []) + [type_ for type_ in types if type_ != 'null']
+		for type_ in ordered_types:
+			branches.append((types.index(type_), type_, self._get_constraint(type_), self.get_writer(type_)))
+		names = [(cerializer.utils.get_type_name(type_), index, writer) for index, type_, _, writer in branches]
+
+		def write_union(datum: Any, buffer: bytearray) -> None:
+			if type(datum) is tuple:
+				type_name, value = datum
+				for name, index, writer in names:
+					if type_name == name:
+						write_long(index, buffer)
+						writer(value, buffer)
+						return
+				raise ValueError(f'{type_name} is not a type of union {types}')
+			for index, _, constraint, writer in branches:
+				if constraint(datum):
+					write_long(index, buffer)
+					writer(datum, buffer)
+					return
+			raise ValueError(f'{datum!r} does not match any type of union {types}')
+		return write_union
+
+	def _get_constraint(self, type_: Any) -> Callable[[Any], bool]:
+		'''
+		Returns a predicate deciding whether a value belongs to a union branch.
+		:param type_: union branch
+		:return: predicate
+		'''
+		if type_ == 'null':
+			return lambda datum: datum is None
+		if isinstance(type_, str) and type_ in _PYTHON_TYPES and type_ != 'fixed':
+			python_type = _PYTHON_TYPES[type_]
+			return lambda datum: type(datum) is python_type
+		if isinstance(type_, dict) and type_.get('type') == constants.FIXED:
+			return lambda datum: type(datum) is bytes
+		if isinstance(type_, dict) and type_.get('type') == constants.ARRAY:
+			return lambda datum: type(datum) is list
+		if isinstance(type_, dict) and type_.get('type') == constants.MAP:
+			return lambda datum: type(datum) is dict
+		if isinstance(type_, dict) and type_.get('type') == constants.ENUM:
+			symbols = type_['symbols']
+			return lambda datum: type(datum) is str and datum in symbols
+		if isinstance(type_, dict) and type_.get('logicalType') is not None:
+			prepare = self._get_prepare(type_)
+			python_type = _PYTHON_TYPES[type_['type']]
+			return lambda datum: isinstance(prepare(datum), python_type) and type(prepare(datum)) is not bool
+		if self._is_named(type_):
+			return self._load_named(type_, self._get_constraint)
+		if isinstance(type_, dict) and type_['type'] == constants.RECORD:
+			return lambda datum: type(datum) is dict
+		raise RuntimeError(f'invalid constraint for type == {type_}')
+
+	def get_reader(self, schema: Union[str, List, Dict[str, Any]]) -> Reader:
+		'''
+		Builds a reader for a schema.
+		:param schema: schema
+		:return: reader
+		'''
+		if isinstance(schema, str):
+			return self._get_type_reader(schema)
+		if isinstance(schema, list):
+			return self._get_union_reader(schema)
+		type_ = schema['type']
+		if 'logicalType' in schema:
+			return self._get_logical_reader(schema)
+		if type_ == constants.RECORD:
+			field_readers = [(field['name'], self._get_field_reader(field)) for field in schema['fields']]
+
+			def read_record(fo: BinaryIO) -> Dict[str, Any]:
+				record = {}
+				for name, field_reader in field_readers:
+					record[name] = field_reader(fo)
+				return record
+			return read_record
+		if type_ == constants.ARRAY:
+			item_reader = self.get_reader(schema['items'])
+
+			def read_array(fo: BinaryIO) -> List[Any]:
+				items = []
+				block_count = read_long(fo)
+				while block_count != 0:
+					if block_count < 0:
+						block_count = -block_count
+						read_long(fo)
+					for _ in range(block_count):
+						items.append(item_reader(fo))
+					block_count = read_long(fo)
+				return items
+			return read_array
+		if type_ == constants.MAP:
+			value_reader = self.get_reader(schema['values'])
+
+			def read_map(fo: BinaryIO) -> Dict[str, Any]:
+				values = {}
+				block_count = read_long(fo)
+				while block_count != 0:
+					if block_count < 0:
+						block_count = -block_count
+						read_long(fo)
+					for _ in range(block_count):
+						key = read_string(fo)
+						values[key] = value_reader(fo)
+					block_count = read_long(fo)
+				return values
+			return read_map
+		if type_ == constants.ENUM:
+			symbols = schema['symbols']
+			return lambda fo: symbols[read_long(fo)]
+		if type_ == constants.FIXED:
+			size = schema['size']
+			return lambda fo: fo.read(size)
+		if schema.get('name') is None:
+			return self.get_reader(type_)
+		name = schema['name']
+		field_reader = self._get_field_reader(schema)
+
+		def read_field(fo: BinaryIO) -> Dict[str, Any]:
+			return {name: field_reader(fo)}
+		return read_field
+
+	def _get_field_reader(self, field: Dict[str, Any]) -> Reader:
+		'''
+		Returns a reader for the value of a record field.
+		:param field: field schema
+		:return: reader
+		'''
+		if 'logicalType' in field:
+			return self._get_logical_reader(field)
+		return self.get_reader(field['type'])
+
+	def _get_type_reader(self, type_: str) -> Reader:
+		'''
+		Returns a reader for a primitive or a named type.
+		:param type_: type name
+		:return: reader
+		'''
+		if type_ in _PRIMITIVE_READERS:
+			return _PRIMITIVE_READERS[type_]
+		if self._is_named(type_):
+			if type_ not in self._named_readers:
+				# the placeholder makes recursive types refer to the reader being built
+				readers: List[Reader] = []
+				self._named_readers[type_] = lambda fo: readers[0](fo)
+				readers.append(self._load_named(type_, self.get_reader))
+				self._named_readers[type_] = readers[0]
+			return self._named_readers[type_]
+		raise NotImplementedError(f'Cant handle schema = {type_}')
+
+	def _get_logical_reader(self, schema: Dict[str, Any]) -> Reader:
+		'''
+		Returns a reader converting a logical type after reading it.
+		:param schema: schema with a logical type
+		:return: reader
+		'''
+		logical_type = schema['logicalType'].replace('-', '_').lower()
+		data_type = schema['type']
+		if 'nano_time' in logical_type:
+			raise RuntimeError('Nano Time logical type is not supported by the interpreted code.')
+		if data_type == constants.FIXED:
+			size = schema['size']
+			value_reader: Reader = lambda fo: fo.read(size)
+		else:
+			value_reader = self._get_type_reader(data_type)
+		if logical_type == 'decimal':
+			return lambda fo: read_decimal(value_reader(fo), schema)
+		convert = _READ_FUNCTIONS[logical_type]
+		return lambda fo: convert(value_reader(fo))
+
+	def _get_union_reader(self, types: List[Any]) -> Reader:
+		'''
+		Returns a reader for a union.
+		:param types: union types
+		:return: reader
+		'''
+		readers = [self.get_reader(type_) for type_ in types]
+
+		def read_union(fo: BinaryIO) -> Any:
+			return readers[read_long(fo)](fo)
+		return read_union
+
+
+def write_null(datum: Any, buffer: bytearray) -> None:
+	pass
+
+
+def write_boolean(datum: Any, buffer: bytearray) -> None:
+	buffer.append(1 if datum else 0)
+
+
+def write_long(datum: int, buffer: bytearray) -> None:
+	'''
+	int and long values are written using variable-length, zig-zag coding.
+	'''
+	n = ((datum << 1) ^ (datum >> 63)) & 0xFFFFFFFFFFFFFFFF
+	while n & ~0x7F:
+		buffer.append((n & 0x7F) | 0x80)
+		n >>= 7
+	buffer.append(n)
+
+
+def write_float(datum: float, buffer: bytearray) -> None:
+	buffer += _FLOAT.pack(datum)
+
+
+def write_double(datum: float, buffer: bytearray) -> None:
+	buffer += _DOUBLE.pack(datum)
+
+
+def write_bytes(datum: bytes, buffer: bytearray) -> None:
+	write_long(len(datum), buffer)
+	buffer += datum
+
+
+def write_string(datum: str, buffer: bytearray) -> None:
+	write_bytes(datum.encode('utf-8'), buffer)
+
+
+def write_fixed(datum: bytes, buffer: bytearray) -> None:
+	buffer += datum
+
+
+def read_null(fo: BinaryIO) -> None:
+	return None
+
+
+def read_boolean(fo: BinaryIO) -> bool:
+	return fo.read(1)[0] != 0
+
+
+def read_long(fo: BinaryIO) -> int:
+	'''
+	int and long values are written using variable-length, zig-zag coding.
+	'''
+	c = fo.read(1)
+	if not c:
+		raise StopIteration
+	b = c[0]
+	n = b & 0x7F
+	shift = 7
+	while b & 0x80:
+		b = fo.read(1)[0]
+		n |= (b & 0x7F) << shift
+		shift += 7
+	return (n >> 1) ^ -(n & 1)
+
+
+def read_float(fo: BinaryIO) -> float:
+	value: float = _FLOAT.unpack(fo.read(4))[0]
+	return value
+
+
+def read_double(fo: BinaryIO) -> float:
+	value: float = _DOUBLE.unpack(fo.read(8))[0]
+	return value
+
+
+def read_bytes(fo: BinaryIO) -> bytes:
+	return fo.read(read_long(fo))
+
+
+def read_string(fo: BinaryIO) -> str:
+	return read_bytes(fo).decode('utf-8')
+
+
+_PRIMITIVE_WRITERS: Dict[str, Writer] = {
+	'null': write_null,
+	'boolean': write_boolean,
+	'int': write_long,
+	'long': write_long,
+	'float': write_float,
+	'double': write_double,
+	'bytes': write_bytes,
+	'string': write_string,
+}
+
+_PRIMITIVE_READERS: Dict[str, Reader] = {
+	'null': read_null,
+	'boolean': read_boolean,
+	'int': read_long,
+	'long': read_long,
+	'float': read_float,
+	'double': read_double,
+	'bytes': read_bytes,
+	'string': read_string,
+}
+
+
+def prepare_timestamp_millis(data: Any) -> Any:
+	if isinstance(data, datetime.datetime):
+		return int(data.timestamp() * MLS_PER_SECOND)
+	return data
+
+
+def prepare_timestamp_micros(data: Any) -> Any:
+	if isinstance(data, datetime.datetime):
+		return int(data.timestamp() * MCS_PER_SECOND)
+	return data
+
+
+def prepare_date(data: Any) -> Any:
+	if isinstance(data, datetime.date):
+		return data.toordinal() - DAYS_SHIFT
+	if isinstance(data, str):
+		return datetime.datetime.strptime(data, '%Y-%m-%d').toordinal() - DAYS_SHIFT
+	return data
+
+
+def prepare_uuid(data: Any) -> Any:
+	if isinstance(data, uuid.UUID):
+		return str(data)
+	return data
+
+
+def prepare_time_millis(data: Any) -> Any:
+	if isinstance(data, datetime.time):
+		return int(
+			data.hour * MLS_PER_HOUR + data.minute * MLS_PER_MINUTE
+			+ data.second * MLS_PER_SECOND + int(data.microsecond / 1000)
+		)
+	return data
+
+
+def prepare_time_micros(data: Any) -> Any:
+	if isinstance(data, datetime.time):
+		return int(
+			data.hour * MCS_PER_HOUR + data.minute * MCS_PER_MINUTE
+			+ data.second * MCS_PER_SECOND + data.microsecond
+		)
+	return data
+
+
+def prepare_bytes_decimal(data: Any, schema: Dict[str, Any]) -> Any:
+	'''
+	Converts decimal.Decimal to bytes.
+	'''
+	if not isinstance(data, decimal.Decimal):
+		return data
+	scale = schema.get('scale', 0)
+	sign, digits, exp = data.as_tuple()
+	if not isinstance(exp, int):
+		raise ValueError('Infinite and NaN decimals cannot be serialized')
+	delta = exp + scale
+	if delta < 0:
+		raise ValueError('Scale provided in schema does not match the decimal')
+	unscaled_datum = 0
+	for digit in digits:
+		unscaled_datum = (unscaled_datum * 10) + digit
+	unscaled_datum = 10 ** delta * unscaled_datum
+	bytes_req = (unscaled_datum.bit_length() + 8) // 8
+	if sign:
+		unscaled_datum = -unscaled_datum
+	return unscaled_datum.to_bytes(bytes_req, byteorder = 'big', signed = True)
+
+
+def prepare_fixed_decimal(data: Any, schema: Dict[str, Any]) -> Any:
+	'''
+	Converts decimal.Decimal to fixed size bytes.
+	'''
+	if not isinstance(data, decimal.Decimal):
+		return data
+	scale = schema.get('scale', 0)
+	size = schema['size']
+	sign, digits, exp = data.as_tuple()
+	if not isinstance(exp, int):
+		raise ValueError('Infinite and NaN decimals cannot be serialized')
+	if -exp > scale:
+		raise ValueError('Scale provided in schema does not match the decimal')
+	delta = exp + scale
+	if delta > 0:
+		digits = digits + (0,) * delta
+	unscaled_datum = 0
+	for digit in digits:
+		unscaled_datum = (unscaled_datum * 10) + digit
+	bits_req = unscaled_datum.bit_length() + 1
+	size_in_bits = size * 8
+	offset_bits = size_in_bits - bits_req
+	mask = 2 ** size_in_bits - 1
+	bit = 1
+	for _ in range(bits_req):
+		mask ^= bit
+		bit <<= 1
+	if bits_req < 8:
+		bytes_req = 1
+	else:
+		bytes_req = bits_req // 8
+		if bits_req % 8 != 0:
+			bytes_req += 1
+	tmp = bytearray()
+	if sign:
+		unscaled_datum = (1 << bits_req) - unscaled_datum
+		unscaled_datum = mask | unscaled_datum
+		for index in range(size - 1, -1, -1):
+			tmp.append((unscaled_datum >> (8 * index)) & 0xff)
+	else:
+		for _ in range(offset_bits // 8):
+			tmp.append(0)
+		for index in range(bytes_req - 1, -1, -1):
+			tmp.append((unscaled_datum >> (8 * index)) & 0xff)
+	return tmp
+
+
+def read_timestamp_millis(data: int) -> datetime.datetime:
+	return EPOCH + datetime.timedelta(seconds = data / float(1000))
+
+
+def read_timestamp_micros(data: int) -> datetime.datetime:
+	return EPOCH + datetime.timedelta(seconds = data / float(1000000))
+
+
+def read_date(data: int) -> datetime.date:
+	return datetime.date.fromordinal(data + DAYS_SHIFT)
+
+
+def read_uuid(data: str) -> uuid.UUID:
+	return uuid.UUID(data)
+
+
+def read_decimal(data: bytes, schema: Dict[str, Any]) -> decimal.Decimal:
+	scale = schema.get('scale', 0)
+	precision = schema['precision']
+	unscaled_datum = int.from_bytes(data, byteorder = 'big', signed = True)
+	decimal_context = decimal.Context()
+	decimal_context.prec = precision
+	return decimal_context.create_decimal(unscaled_datum).scaleb(-scale, decimal_context)
+
+
+def read_time_millis(data: int) -> datetime.time:
+	h = int(data / MLS_PER_HOUR)
+	m = int(data / MLS_PER_MINUTE) % 60
+	s = int(data / MLS_PER_SECOND) % 60
+	mcs = int(data % MLS_PER_SECOND) * 1000
+	return datetime.time(h, m, s, mcs)
+
+
+def read_time_micros(data: int) -> datetime.time:
+	h = int(data / MCS_PER_HOUR)
+	m = int(data / MCS_PER_MINUTE) % 60
+	s = int(data / MCS_PER_SECOND) % 60
+	mcs = data % MCS_PER_SECOND
+	return datetime.time(h, m, s, mcs)
+
+
+_PREPARE_FUNCTIONS: Dict[str, Callable[[Any], Any]] = {
+	'timestamp_millis': prepare_timestamp_millis,
+	'timestamp_micros': prepare_timestamp_micros,
+	'date': prepare_date,
+	'uuid': prepare_uuid,
+	'time_millis': prepare_time_millis,
+	'time_micros': prepare_time_micros,
+}
+
+_READ_FUNCTIONS: Dict[str, Callable[[Any], Any]] = {
+	'timestamp_millis': read_timestamp_millis,
+	'timestamp_micros': read_timestamp_micros,
+	'date': read_date,
+	'uuid': read_uuid,
+	'time_millis': read_time_millis,
+	'time_micros': read_time_micros,
+}
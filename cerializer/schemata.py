@@ -1,13 +1,116 @@
 # pylint: disable=protected-access
-import copy
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+import concurrent.futures
+import dataclasses
+import importlib
+import logging
+import struct
+import sysconfig
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple, Type, Union
+import read_buffer
 import cerializer.utils
 import cerializer.code_generator
+import cerializer.compile_cache
 import cerializer.compiler
+import cerializer.constants
+import cerializer.dependency_graph
+import cerializer.fingerprint
 import cerializer.cerializer_daemon
 import tqdm
 
 
+logger = logging.getLogger(__name__)
+
+
+def _log_background_compilation_failure(future: concurrent.futures.Future) -> None:
+	'''
+	Logs an exception raised by a background compilation.
+	:param future: finished compilation
+	:return: None
+	'''
+	exception = future.exception()
+	if exception is not None:
+		logger.error('Background compilation failed.', exc_info = exception)
+
+
+# framed payloads start with a magic byte and the big endian schema registry id
+CONFLUENT_MAGIC = 0
+CONFLUENT_HEADER_SIZE = 5
+# or with two magic bytes and the little endian CRC-64-AVRO fingerprint of the schema
+SINGLE_OBJECT_MAGIC = b'\xc3\x01'
+SINGLE_OBJECT_HEADER_SIZE = 10
+_CONFLUENT_HEADER = struct.Struct('>BI')
+_SINGLE_OBJECT_HEADER = struct.Struct('<2sQ')
+
+
+class SchemataSnapshot(NamedTuple):
+	'''
+	Immutable state of CerializerSchemata. Every change publishes a new snapshot with a higher version.
+	'''
+	version: int
+	schema_database: Dict[str, Any]
+	schema_code_database: Dict[str, Any]
+	cycle_starting_nodes: FrozenSet[str]
+	# named types defined within each schema, used to resolve references in the context of a schema
+	named_type_index: Dict[str, Dict[str, Any]]
+	# compiled code by the SHA-256 fingerprint of the codec form, shared by identical schemata
+	codec_database: Dict[bytes, Any]
+	# compiled code by the CRC-64-AVRO fingerprint of the Parsing Canonical Form
+	fingerprint_database: Dict[int, Any]
+	# CRC-64-AVRO fingerprint of the Parsing Canonical Form of each compiled schema
+	schema_fingerprints: Dict[str, int]
+	# compiled code by the schema registry id
+	schema_id_database: Dict[int, Any]
+	# schema identifiers and schemata by the schema registry id, for schemata not compiled yet in lazy mode
+	schema_id_schemata: Dict[int, Tuple[str, Any]]
+	# compiled resolving code by the SHA-256 fingerprints of the resolution forms of the writer and the reader schema
+	resolving_database: Dict[Tuple[bytes, bytes], Any]
+	# compiled projecting code by the schema identifier and the sorted field paths
+	projection_database: Dict[Tuple[str, Tuple[str, ...]], Any]
+	# compiled code of the lazy record views by the schema identifier
+	lazy_database: Dict[str, Any]
+	# compiled code serializing records from object attributes by the schema identifier
+	attribute_database: Dict[str, Any]
+	# compiled code deserializing into record classes by the schema identifier
+	record_class_database: Dict[str, Any]
+	# compiled code decoding batches of records into columns by the schema identifier
+	columnar_database: Dict[str, Any]
+
+
+@dataclasses.dataclass
+class CompileMetrics:
+	'''
+	Timings in seconds and sizes in bytes of the compilation pipeline of one schema.
+	Schemata compiled into one shared module share its build metrics.
+	'''
+	schema_identifier: str
+	parse_time: float = 0.0
+	render_time: float = 0.0
+	rendered_size: int = 0
+	build: Optional[cerializer.compiler.BuildMetrics] = None
+
+	@property
+	def total_time(self) -> float:
+		return self.parse_time + self.render_time + (self.build.total_time if self.build else 0.0)
+
+	def as_record(self) -> Dict[str, Any]:
+		'''
+		Returns the metrics as a flat dict, suitable for structured logging.
+		:return: metrics
+		'''
+		record = {
+			'schema_identifier': self.schema_identifier,
+			'parse_time': self.parse_time,
+			'render_time': self.render_time,
+			'rendered_size': self.rendered_size,
+			'total_time': self.total_time,
+		}
+		if self.build:
+			record.update(dataclasses.asdict(self.build))
+		return record
+
 
 class CerializerSchemata:
 	'''
@@ -19,7 +122,19 @@ class CerializerSchemata:
 	You can init CerializerSchemata either with list of schemata or a schema url pointing to Kafka schema repo.
 	'''
 
-	def __init__(self, schemata: List[Tuple[str, Any]] = None, schemata_url: str = None, verbose = False) -> None:
+	def __init__(
+		self,
+		schemata: List[Tuple[str, Any]] = None,
+		schemata_url: str = None,
+		verbose = False,
+		compile_cache: Optional[cerializer.compile_cache.CompileCache] = None,
+		compilation_workers: int = 1,
+		shards: Optional[int] = None,
+		prebuilt_codecs: Optional[str] = None,
+		lazy: bool = False,
+		warm_up: Optional[List[str]] = None,
+		compile_metrics_hook: Optional[Callable[[CompileMetrics], None]] = None,
+	) -> None:
 		'''
 		Produces an instance of CerializerSchemata.
 		On init, it compiles all the schemata either from the list of schemata or the schema ulr.
@@ -27,30 +142,378 @@ class CerializerSchemata:
 		You can either supply a list of schemata or Kafka repo url or both.
 		:param schemata: list of tuples in form of (schema_identifier, schema)
 		:param schemata_url: url to Kafka schema repo.
+		:param verbose: show compilation progress.
+		:param compile_cache: on-disk cache of compiled schemata, defaults to the shared default cache.
+		:param compilation_workers: number of processes running Cython and the C compiler on init.
+		:param shards: if set, schemata are compiled into this many shared modules instead of one module each.
+		:param prebuilt_codecs: name of a package built by `python -m cerializer.build`. Its schemata are added
+		to the database and its codecs are imported instead of compiled.
+		:param lazy: do not compile on init, compile each schema the first time its code is asked for.
+		This includes the schemata fetched from the schema registry, which are compiled once their code is asked for
+		by their identifier or by their registry id.
+		:param warm_up: in lazy mode, schema identifiers to compile on a background thread, in this order.
+		:param compile_metrics_hook: called with the metrics of every compiled schema, e.g. for structured logging.
 		'''
-		self._schema_database = cerializer.utils.get_subschemata(schemata) if schemata else {}
-		self._schema_code_database = {}
+		self._compile_metrics: Dict[str, CompileMetrics] = {}
+		self._compile_metrics_hook = compile_metrics_hook
+		prebuilt_package = importlib.import_module(prebuilt_codecs) if prebuilt_codecs else None
+		if prebuilt_package:
+			schemata = list(prebuilt_package.SCHEMATA) + list(schemata or [])
+		schema_database: Dict[str, Any] = {}
+		for schema_identifier, schema in schemata or []:
+			start = time.perf_counter()
+			subschemata = cerializer.utils.get_subschemata([(schema_identifier, schema)])
+			self._get_metrics(schema_identifier).parse_time = time.perf_counter() - start
+			# the first definition of a named type wins
+			for subschema_identifier, subschema in subschemata.items():
+				schema_database.setdefault(subschema_identifier, subschema)
+		# writers only, guarded by the write lock
+		self._dependency_graph = cerializer.dependency_graph.DependencyGraph()
+		changed_nodes = self._dependency_graph.add_schemata(schema_database.values())
+		# readers only ever read this attribute once, writers replace it under the write lock
+		self._snapshot = SchemataSnapshot(
+			version = 0,
+			schema_database = schema_database,
+			schema_code_database = {},
+			cycle_starting_nodes = frozenset(self._dependency_graph.find_cycle_starting_nodes(changed_nodes)),
+			named_type_index = self._index_named_types(schema_database),
+			codec_database = {},
+			fingerprint_database = {},
+			schema_fingerprints = {},
+			schema_id_database = {},
+			schema_id_schemata = {},
+			resolving_database = {},
+			projection_database = {},
+			lazy_database = {},
+			attribute_database = {},
+			record_class_database = {},
+			columnar_database = {},
+		)
+		# schema registry ids unknown to the registry, with the time until which they are not fetched again
+		self._unknown_schema_ids: Dict[int, float] = {}
+		self._write_lock = threading.RLock()
 		self._schemata_url = schemata_url
-		self._cycle_starting_nodes: Set[str] = set()
-		self._init_cycles()
 		self._verbose = verbose
+		self._compile_cache = compile_cache or cerializer.compile_cache.DEFAULT_COMPILE_CACHE
+		self._compilation_workers = compilation_workers
+		self._shards = shards
+		self._lazy = lazy
+		self._compile_locks: Dict[Hashable, threading.Lock] = {}
+		self._compile_locks_lock = threading.Lock()
+		self._warm_up_thread: Optional[threading.Thread] = None
+		self._background_compiler: Optional[concurrent.futures.ThreadPoolExecutor] = None
+		self._code_listeners: Dict[str, List[Callable[[Any], None]]] = {}
+		if prebuilt_package:
+			self._load_prebuilt_codecs(prebuilt_package)
 		# fetching and compiling all the schemata from Kafka
 		if self._schemata_url:
-			self._cerializer_daemon = cerializer.cerializer_daemon.CerializerDaemon(self, self._schemata_url)
+			self._cerializer_daemon = cerializer.cerializer_daemon.CerializerDaemon(
+				self,
+				self._schemata_url,
+				compile_fetched = not self._lazy,
+			)
 			# downloads and compiles schemata in a snapshot way
 			self._cerializer_daemon.update_with_schema_repo()
+			if not self._lazy:
+				# lazy mode never waits on compilation, the daemon does not compile in it anyway
+				self._cerializer_daemon.wait_for_compilation()
 			# checks periodically for new schemata
 			self._cerializer_daemon.start()
+		if self._lazy:
+			if warm_up:
+				self._warm_up_thread = threading.Thread(target = self._warm_up, args = (list(warm_up),), daemon = True)
+				self._warm_up_thread.start()
+			return
 		# compiling all the code for schemata from schema list
-		for schema_identifier, schema in tqdm.tqdm(
-				self._schema_database.items(),
-				desc = 'Compiling schemata',
+		self._compile_schemata([
+			schema_identifier
+			for schema_identifier in self._schema_database
+			if schema_identifier not in self._schema_code_database
+		])
+
+	def _warm_up(self, schema_identifiers: List[str]) -> None:
+		'''
+		Compiles the given schemata one by one. Runs on the background warm up thread.
+		:param schema_identifiers: schema identifiers in order of priority
+		:return: None
+		'''
+		for schema_identifier in schema_identifiers:
+			try:
+				self.compile_schema(schema_identifier)
+			except Exception:  # pylint: disable=broad-except
+				logger.exception('Warming up schema %s failed.', schema_identifier)
+
+	def wait_for_warm_up(self, timeout: Optional[float] = None) -> bool:
+		'''
+		Waits for the background warm up to finish.
+		:param timeout: maximal time to wait in seconds, None for no limit
+		:return: whether the warm up has finished
+		'''
+		if self._warm_up_thread is None:
+			return True
+		self._warm_up_thread.join(timeout)
+		return not self._warm_up_thread.is_alive()
+
+	def compile_schema(self, schema_identifier: str, schema: Any = None) -> Any:
+		'''
+		Compiles the code for a schema unless it has been compiled already.
+		Concurrent calls for the same schema compile it only once. If an identical schema has been compiled
+		under a different identifier, its code is reused.
+		:param schema_identifier: schema identifier to compile
+		:param schema: schema to compile, defaults to the one stored in the database under schema_identifier
+		:return: compiled code
+		'''
+		snapshot = self._snapshot
+		if schema_identifier in snapshot.schema_code_database:
+			return snapshot.schema_code_database[schema_identifier]
+		if schema is None and schema_identifier not in snapshot.schema_database:
+			raise RuntimeError(f'Schema with identifier = {schema_identifier} not found in schema database.')
+		if schema is None:
+			schema = snapshot.schema_database[schema_identifier]
+		fingerprints = self._get_fingerprints(schema)
+		_, codec_fingerprint = fingerprints
+		# locking by the codec so that identical schemata are not compiled concurrently
+		with self._compile_locks_lock:
+			compile_lock = self._compile_locks.setdefault(codec_fingerprint, threading.Lock())
+		with compile_lock:
+			if schema_identifier not in self._schema_code_database:
+				schema_code = self._snapshot.codec_database.get(codec_fingerprint)
+				if schema_code is None:
+					code = self._render_code(schema_identifier, schema, shared = False)
+					build_metrics = cerializer.compiler.BuildMetrics()
+					schema_code = self.compile_code(code, build_metrics)
+					self._get_metrics(schema_identifier).build = build_metrics
+					self._report_metrics([schema_identifier])
+				self.add_codes({schema_identifier: schema_code}, {schema_identifier: fingerprints})
+		return self._schema_code_database[schema_identifier]
+
+	def _load_prebuilt_codecs(self, package: Any) -> None:
+		'''
+		Adds codecs built ahead of time by cerializer.build to the code database.
+		:param package: imported package with prebuilt codecs
+		:return: None
+		'''
+		soabi = sysconfig.get_config_var('SOABI')
+		if package.SOABI != soabi:
+			raise RuntimeError(
+				f'Codecs in {package.__name__} were built for {package.SOABI}, this interpreter is {soabi}.'
+			)
+		codes = {}
+		for schema_identifier, (module_name, shared) in package.CODECS.items():
+			start = time.perf_counter()
+			compiled_code = cerializer.compiler.load_prebuilt_code(package.__name__, module_name)
+			self._get_metrics(schema_identifier).build = cerializer.compiler.BuildMetrics(
+				module_name = module_name,
+				cache_hit = True,
+				load_time = time.perf_counter() - start,
+			)
+			codes[schema_identifier] = compiled_code[schema_identifier] if shared else compiled_code
+		self._report_metrics(list(codes))
+		self.add_codes(codes)
+
+	def _compile_schemata(self, schema_identifiers: List[str]) -> None:
+		'''
+		Renders and compiles code for the given schema identifiers and adds it to the code database.
+		Code generation always runs in this process, Cython and the C compiler run in a process pool
+		if more than one compilation worker is configured.
+		Identical schemata are compiled only once and share the compiled code.
+		:param schema_identifiers: schema identifiers to compile
+		:return: None
+		'''
+		fingerprints = {
+			schema_identifier: self._get_fingerprints(self._schema_database[schema_identifier])
+			for schema_identifier in schema_identifiers
+		}
+		codec_database = self._snapshot.codec_database
+		codes = {}
+		# the first schema identifier of each codec gets compiled
+		representatives: Dict[bytes, str] = {}
+		for schema_identifier, (_, codec_fingerprint) in fingerprints.items():
+			if codec_fingerprint in codec_database:
+				codes[schema_identifier] = codec_database[codec_fingerprint]
+			else:
+				representatives.setdefault(codec_fingerprint, schema_identifier)
+		modules = self.render_modules(list(representatives.values()))
+		build_metrics = [cerializer.compiler.BuildMetrics() for _ in modules]
+		compiled_codes = self._compile_codes([code for _, _, code in modules], build_metrics)
+		for (module_schema_identifiers, shared, _), compiled_code, module_metrics in zip(
+				modules,
+				compiled_codes,
+				build_metrics,
+		):
+			for schema_identifier in module_schema_identifiers:
+				codes[schema_identifier] = compiled_code[schema_identifier] if shared else compiled_code
+				self._get_metrics(schema_identifier).build = module_metrics
+		self._report_metrics(list(representatives.values()))
+		for schema_identifier, (_, codec_fingerprint) in fingerprints.items():
+			if schema_identifier not in codes:
+				codes[schema_identifier] = codes[representatives[codec_fingerprint]]
+		self.add_codes(codes, fingerprints)
+
+	def render_modules(self, schema_identifiers: List[str]) -> List[Tuple[List[str], bool, str]]:
+		'''
+		Renders the code of modules to be compiled for the given schema identifiers.
+		If shards are configured, the schemata are batched into that many shared modules,
+		otherwise each schema gets a module of its own.
+		:param schema_identifiers: schema identifiers to render
+		:return: list of tuples in form of (schema identifiers in module, is module shared, code)
+		'''
+		rendered_codes = []
+		for schema_identifier in tqdm.tqdm(
+				schema_identifiers,
+				desc = 'Rendering schemata',
 				disable = not self._verbose
 		):
-			code_generator = cerializer.code_generator.CodeGenerator(self, schema_identifier)
+			schema = self._schema_database[schema_identifier]
+			rendered_codes.append(self._render_code(schema_identifier, schema, shared = bool(self._shards)))
+		if not self._shards:
+			return [
+				([schema_identifier], False, code)
+				for schema_identifier, code in zip(schema_identifiers, rendered_codes)
+			]
+		shards: List[List[Tuple[str, str]]] = [[] for _ in range(self._shards)]
+		for schema_identifier, code in zip(schema_identifiers, rendered_codes):
+			# stable assignment, so that adding a schema invalidates the cache of one shard only
+			shards[zlib.crc32(schema_identifier.encode('utf-8')) % self._shards].append((schema_identifier, code))
+		return [
+			(
+				[schema_identifier for schema_identifier, _ in shard],
+				True,
+				cerializer.code_generator.render_shared_code_with_wraparounds(shard),
+			)
+			for shard in shards
+			if shard
+		]
+
+	def _render_code(self, schema_identifier: str, schema: Any, shared: bool) -> str:
+		'''
+		Renders the code for a schema and records how long it took.
+		:param schema_identifier: schema identifier
+		:param schema: schema to render the code for
+		:param shared: render code to be batched into a shared module
+		:return: rendered code
+		'''
+		start = time.perf_counter()
+		code_generator = cerializer.code_generator.CodeGenerator(self, schema_identifier)
+		if shared:
+			code = code_generator.render_code(schema)
+		else:
 			code = code_generator.render_code_with_wraparounds(schema)
-			compiled_code = cerializer.compiler.compile_code(code)
-			self.add_code(schema_identifier, compiled_code)
+		metrics = self._get_metrics(schema_identifier)
+		metrics.render_time = time.perf_counter() - start
+		metrics.rendered_size = len(code.encode('utf-8'))
+		return code
+
+	def _compile_codes(self, codes: List[str], metrics: List[cerializer.compiler.BuildMetrics]) -> List[Any]:
+		'''
+		Compiles rendered codes, in a process pool if more than one compilation worker is configured.
+		:param codes: rendered codes
+		:param metrics: filled in with the metrics of the compilation of each of the codes
+		:return: compiled codes in the same order
+		'''
+		if self._compilation_workers > 1:
+			return cerializer.compiler.compile_codes(codes, self._compile_cache, self._compilation_workers, metrics)
+		return [
+			self.compile_code(code, code_metrics)
+			for code, code_metrics in tqdm.tqdm(
+				list(zip(codes, metrics)),
+				desc = 'Compiling schemata',
+				disable = not self._verbose,
+			)
+		]
+
+	def compile_code(self, code: str, metrics: Optional[cerializer.compiler.BuildMetrics] = None) -> Any:
+		'''
+		Compiles rendered code using the compile cache of this instance.
+		:param code: rendered code
+		:param metrics: if given, filled in with the metrics of the compilation
+		:return: compiled code
+		'''
+		return cerializer.compiler.compile_code(code, self._compile_cache, metrics)
+
+	def _get_metrics(self, schema_identifier: str) -> CompileMetrics:
+		return self._compile_metrics.setdefault(schema_identifier, CompileMetrics(schema_identifier))
+
+	def _report_metrics(self, schema_identifiers: List[str]) -> None:
+		'''
+		Logs the metrics of freshly compiled schemata and passes them to the metrics hook.
+		:param schema_identifiers: compiled schema identifiers
+		:return: None
+		'''
+		for schema_identifier in schema_identifiers:
+			metrics = self._compile_metrics[schema_identifier]
+			logger.debug('Compiled schema %s.', schema_identifier, extra = {'compile_metrics': metrics.as_record()})
+			if self._compile_metrics_hook is not None:
+				try:
+					self._compile_metrics_hook(metrics)
+				except Exception:  # pylint: disable=broad-except
+					logger.exception('Compile metrics hook failed.')
+
+	def get_compile_metrics(self, schema_identifier: Optional[str] = None) -> Dict[str, CompileMetrics]:
+		'''
+		Returns the compile metrics of the schemata of this instance.
+		:param schema_identifier: if given, only the metrics of this schema are returned
+		:return: dict of schema identifier to its metrics
+		'''
+		if schema_identifier is not None:
+			metrics = self._compile_metrics.get(schema_identifier)
+			return {schema_identifier: metrics} if metrics else {}
+		return dict(self._compile_metrics)
+
+	def get_slowest_schemata(self, count: int = 10) -> List[CompileMetrics]:
+		'''
+		Returns the schemata that took the longest to parse, render, build and load.
+		:param count: number of schemata to return
+		:return: compile metrics, slowest first
+		'''
+		return sorted(self._compile_metrics.values(), key = lambda metrics: metrics.total_time, reverse = True)[:count]
+
+	def get_largest_schemata(self, count: int = 10) -> List[CompileMetrics]:
+		'''
+		Returns the schemata with the largest generated code.
+		:param count: number of schemata to return
+		:return: compile metrics, largest first
+		'''
+		return sorted(
+			self._compile_metrics.values(),
+			key = lambda metrics: (metrics.rendered_size, metrics.build.module_size if metrics.build else 0),
+			reverse = True,
+		)[:count]
+
+	def get_compile_cache_statistics(self) -> cerializer.compile_cache.CacheStatistics:
+		'''
+		Returns hit/miss statistics of the compile cache used by this instance.
+		:return: cache statistics
+		'''
+		return self._compile_cache.statistics
+
+	@property
+	def _schema_database(self) -> Dict[str, Any]:
+		return self._snapshot.schema_database
+
+	@property
+	def _schema_code_database(self) -> Dict[str, Any]:
+		return self._snapshot.schema_code_database
+
+	@property
+	def _cycle_starting_nodes(self) -> FrozenSet[str]:
+		return self._snapshot.cycle_starting_nodes
+
+	def get_snapshot(self) -> SchemataSnapshot:
+		'''
+		Returns the current state of the schema and code databases.
+		The snapshot never changes, later additions are published as new snapshots.
+		:return: current snapshot
+		'''
+		return self._snapshot
+
+	def _publish(self, **changes: Any) -> None:
+		'''
+		Publishes a new snapshot with the given fields replaced. Has to be called with the write lock held.
+		:param changes: new values of snapshot fields
+		:return: None
+		'''
+		self._snapshot = self._snapshot._replace(version = self._snapshot.version + 1, **changes)
 
 	# custom contains definition
 	def __contains__(self, item: str) -> bool:
@@ -75,7 +538,428 @@ class CerializerSchemata:
 		:param schema_code: compiled code
 		:return: None
 		'''
-		self._schema_code_database[schema_identifier] = schema_code
+		self.add_codes({schema_identifier: schema_code})
+
+	def add_codes(
+		self,
+		schema_codes: Dict[str, Any],
+		fingerprints: Optional[Dict[str, Tuple[int, bytes]]] = None,
+	) -> None:
+		'''
+		Adds code for multiple schema identifiers, publishing a single new snapshot.
+		:param schema_codes: dict of schema identifier to compiled code
+		:param fingerprints: fingerprints of the schemata, computed from the schema database if not given
+		:return: None
+		'''
+		if not schema_codes:
+			return
+		fingerprints = fingerprints or {}
+		with self._write_lock:
+			codec_database = dict(self._snapshot.codec_database)
+			fingerprint_database = dict(self._snapshot.fingerprint_database)
+			schema_fingerprints = dict(self._snapshot.schema_fingerprints)
+			for schema_identifier, schema_code in schema_codes.items():
+				if schema_identifier in fingerprints:
+					canonical_fingerprint, codec_fingerprint = fingerprints[schema_identifier]
+				elif schema_identifier in self._schema_database:
+					canonical_fingerprint, codec_fingerprint = self._get_fingerprints(
+						self._schema_database[schema_identifier]
+					)
+				else:
+					continue
+				codec_database.setdefault(codec_fingerprint, schema_code)
+				fingerprint_database.setdefault(canonical_fingerprint, schema_code)
+				schema_fingerprints[schema_identifier] = canonical_fingerprint
+			self._publish(
+				schema_code_database = {**self._snapshot.schema_code_database, **schema_codes},
+				codec_database = codec_database,
+				fingerprint_database = fingerprint_database,
+				schema_fingerprints = schema_fingerprints,
+			)
+			listeners = [
+				(listener, schema_code)
+				for schema_identifier, schema_code in schema_codes.items()
+				for listener in self._code_listeners.pop(schema_identifier, [])
+			]
+		for listener, schema_code in listeners:
+			listener(schema_code)
+
+	def _get_fingerprints(self, schema: Any) -> Tuple[int, bytes]:
+		'''
+		Returns fingerprints of a schema with references to other schemata in the database expanded.
+		:param schema: schema
+		:return: tuple in form of (CRC-64-AVRO of the Parsing Canonical Form, SHA-256 of the codec form)
+		'''
+		canonical_form = cerializer.fingerprint.get_parsing_canonical_form(schema, self.load_schema)
+		codec_form = cerializer.fingerprint.get_codec_form(schema, self.load_schema)
+		return (
+			cerializer.fingerprint.get_crc_64_avro_fingerprint(canonical_form),
+			cerializer.fingerprint.get_sha_256_fingerprint(codec_form),
+		)
+
+	def get_fingerprint(self, schema_identifier: str) -> int:
+		'''
+		Returns the CRC-64-AVRO fingerprint of the Parsing Canonical Form of a schema.
+		:param schema_identifier: schema identifier
+		:return: fingerprint
+		'''
+		canonical_fingerprint = self._snapshot.schema_fingerprints.get(schema_identifier)
+		if canonical_fingerprint is None:
+			canonical_fingerprint, _ = self._get_fingerprints(self.load_schema(schema_identifier))
+		return canonical_fingerprint
+
+	def get_code_by_fingerprint(self, fingerprint: int) -> Any:
+		'''
+		Returns the compiled code for a CRC-64-AVRO fingerprint of the Parsing Canonical Form.
+		The canonical form does not contain logical types, if more schemata share a fingerprint,
+		the code of the first compiled one is returned.
+		:param fingerprint: fingerprint
+		:return: compiled code
+		'''
+		fingerprint_database = self._snapshot.fingerprint_database
+		if fingerprint not in fingerprint_database:
+			raise RuntimeError(f'Code for fingerprint = {fingerprint} not found in code database.')
+		return fingerprint_database[fingerprint]
+
+	def get_code_for_schema(self, schema: Any) -> Any:
+		'''
+		Returns compiled code for a self contained schema, e.g. the one embedded in an Avro container file.
+		If a schema with the same codec form has been compiled already, its code is reused. Otherwise, the schema
+		is compiled in a schemata instance of its own, so that the named types it defines do not replace
+		the ones in this database.
+		:param schema: self contained schema
+		:return: compiled code
+		'''
+		codec_fingerprint = cerializer.fingerprint.get_sha_256_fingerprint(cerializer.fingerprint.get_codec_form(schema))
+		canonical_fingerprint = cerializer.fingerprint.get_crc_64_avro_fingerprint(
+			cerializer.fingerprint.get_parsing_canonical_form(schema)
+		)
+		schema_code = self._snapshot.codec_database.get(codec_fingerprint)
+		if schema_code is not None:
+			return schema_code
+		with self._compile_locks_lock:
+			compile_lock = self._compile_locks.setdefault(codec_fingerprint, threading.Lock())
+		with compile_lock:
+			schema_code = self._snapshot.codec_database.get(codec_fingerprint)
+			if schema_code is None:
+				schema_identifier = cerializer.constants.EMBEDDED_SCHEMA_IDENTIFIER
+				schemata = CerializerSchemata([(schema_identifier, schema)], compile_cache = self._compile_cache)
+				schema_code = schemata.get_compiled_code(schema_identifier)
+				with self._write_lock:
+					self._publish(
+						codec_database = {**self._snapshot.codec_database, codec_fingerprint: schema_code},
+						fingerprint_database = {canonical_fingerprint: schema_code, **self._snapshot.fingerprint_database},
+					)
+		return schema_code
+
+	def get_resolving_code(self, writer_schema: Any, reader_schema_identifier: str) -> Any:
+		'''
+		Returns compiled code reading data written with the writer schema, e.g. an older version of a schema,
+		into the shape of a schema in this database, following the Avro schema resolution rules.
+		The code is compiled once per pair of schemata. If both schemata share the codec form,
+		the code of the reader schema is returned.
+		:param writer_schema: self contained schema the data was written with
+		:param reader_schema_identifier: schema identifier of the reader schema
+		:return: compiled code with the deserialize and deserialize_many functions
+		'''
+		reader_schema = self.load_schema(reader_schema_identifier)
+		_, codec_fingerprint = self._get_fingerprints(reader_schema)
+		writer_codec_fingerprint = cerializer.fingerprint.get_sha_256_fingerprint(
+			cerializer.fingerprint.get_codec_form(writer_schema)
+		)
+		if writer_codec_fingerprint == codec_fingerprint:
+			return self.get_compiled_code(reader_schema_identifier)
+		writer_fingerprint = cerializer.fingerprint.get_sha_256_fingerprint(
+			cerializer.fingerprint.get_resolution_form(writer_schema)
+		)
+		reader_fingerprint = cerializer.fingerprint.get_sha_256_fingerprint(
+			cerializer.fingerprint.get_resolution_form(reader_schema, self.load_schema)
+		)
+		return self._compile_resolving_code(
+			(writer_fingerprint, reader_fingerprint),
+			writer_schema,
+			reader_schema,
+			reader_schema_identifier,
+		)
+
+	def get_projecting_code(self, schema_identifier: str, field_paths: Iterable[str]) -> Any:
+		'''
+		Returns compiled code decoding only the given fields of a schema, e.g. `['id', 'address.street']`.
+		Field paths go through nested records, and through unions, arrays and maps of records.
+		The other fields are skipped without being decoded. The code is compiled once per projection.
+		:param schema_identifier: schema identifier
+		:param field_paths: names of the fields to decode, nested fields separated by dots
+		:return: compiled code with the deserialize and deserialize_many functions
+		'''
+		field_paths = tuple(sorted(set(field_paths)))
+		schema_code = self._snapshot.projection_database.get((schema_identifier, field_paths))
+		if schema_code is not None:
+			return schema_code
+		schema = self.load_schema(schema_identifier)
+		load_schema = lambda name: self.load_schema(name, schema_identifier)
+		projected_schema = cerializer.utils.get_projected_schema(
+			cerializer.utils.parse_schema(schema),
+			[field_path.split('.') for field_path in field_paths],
+			load_schema,
+		)
+		writer_form = cerializer.fingerprint.get_resolution_form(schema, load_schema)
+		reader_form = cerializer.fingerprint.get_resolution_form(projected_schema, load_schema)
+		schema_code = self._compile_resolving_code(
+			(
+				cerializer.fingerprint.get_sha_256_fingerprint(writer_form),
+				cerializer.fingerprint.get_sha_256_fingerprint(reader_form),
+			),
+			schema,
+			projected_schema,
+			schema_identifier,
+		)
+		with self._write_lock:
+			self._publish(
+				projection_database = {
+					**self._snapshot.projection_database,
+					(schema_identifier, field_paths): schema_code,
+				},
+			)
+		return schema_code
+
+	def get_lazy_code(self, schema_identifier: str) -> Any:
+		'''
+		Returns compiled code of the lazy record views, decoding each field of a record only once it is accessed.
+		The code is compiled once per schema, the first time it is asked for.
+		:param schema_identifier: schema identifier
+		:return: compiled code with the deserialize_lazy function
+		'''
+		return self._compile_generated_code(
+			'lazy_database',
+			schema_identifier,
+			cerializer.code_generator.LazyRecordCodeGenerator,
+		)
+
+	def get_attribute_code(self, schema_identifier: str) -> Any:
+		'''
+		Returns compiled code serializing records from the attributes of any object, e.g. a dataclass,
+		instead of dicts. Records are deserialized into dicts. The code is compiled once per schema.
+		:param schema_identifier: schema identifier
+		:return: compiled code with the same functions as the code of the schema
+		'''
+		return self._compile_generated_code(
+			'attribute_database',
+			schema_identifier,
+			cerializer.code_generator.AttributeCodeGenerator,
+		)
+
+	def get_record_class_code(self, schema_identifier: str) -> Any:
+		'''
+		Returns compiled code working with objects instead of dicts. Records are serialized from the attributes
+		of any object, e.g. a dataclass, and deserialized into instances of classes generated for them, holding
+		the fields in slots. The code is compiled once per schema.
+		:param schema_identifier: schema identifier
+		:return: compiled code with the same functions as the code of the schema and the record_classes dict
+		'''
+		return self._compile_generated_code(
+			'record_class_database',
+			schema_identifier,
+			cerializer.code_generator.RecordClassCodeGenerator,
+		)
+
+	def get_columnar_code(self, schema_identifier: str) -> Any:
+		'''
+		Returns compiled code converting between batches of records and NumPy arrays, one per field, without
+		creating the records. Requires NumPy. The code is compiled once per schema.
+		:param schema_identifier: schema identifier of a record
+		:return: compiled code with the deserialize_columns, serialize_columns and serialize_columns_into functions
+		and the column_symbols dict of the symbols of enum columns
+		'''
+		if not cerializer.constants.NUMPY:
+			raise RuntimeError('Decoding into columns requires NumPy, install cerializer[numpy].')
+		return self._compile_generated_code(
+			'columnar_database',
+			schema_identifier,
+			cerializer.code_generator.ColumnarCodeGenerator,
+		)
+
+	def _compile_generated_code(
+		self,
+		database: str,
+		schema_identifier: str,
+		code_generator_class: Type[cerializer.code_generator.CodeGenerator],
+	) -> Any:
+		'''
+		Compiles code generated by the given code generator unless it has been compiled already.
+		:param database: name of the snapshot database holding the code by schema identifier
+		:param schema_identifier: schema identifier
+		:param code_generator_class: code generator
+		:return: compiled code
+		'''
+		schema_code = getattr(self._snapshot, database).get(schema_identifier)
+		if schema_code is not None:
+			return schema_code
+		schema = self.load_schema(schema_identifier)
+		with self._compile_locks_lock:
+			compile_lock = self._compile_locks.setdefault((schema_identifier, database), threading.Lock())
+		with compile_lock:
+			schema_code = getattr(self._snapshot, database).get(schema_identifier)
+			if schema_code is None:
+				code_generator = code_generator_class(self, schema_identifier)
+				schema_code = self.compile_code(code_generator.render_code_with_wraparounds(schema))
+				with self._write_lock:
+					self._publish(**{database: {**getattr(self._snapshot, database), schema_identifier: schema_code}})
+		return schema_code
+
+	def _compile_resolving_code(
+		self,
+		key: Tuple[bytes, bytes],
+		writer_schema: Any,
+		reader_schema: Any,
+		reader_schema_identifier: str,
+	) -> Any:
+		'''
+		Compiles resolving code for a pair of schemata unless it has been compiled already.
+		:param key: fingerprints of the resolution forms of the writer and the reader schema
+		:param writer_schema: writer schema
+		:param reader_schema: reader schema
+		:param reader_schema_identifier: schema identifier used as the context for loading named types
+		:return: compiled code
+		'''
+		schema_code = self._snapshot.resolving_database.get(key)
+		if schema_code is not None:
+			return schema_code
+		with self._compile_locks_lock:
+			compile_lock = self._compile_locks.setdefault(key, threading.Lock())
+		with compile_lock:
+			schema_code = self._snapshot.resolving_database.get(key)
+			if schema_code is None:
+				code_generator = cerializer.code_generator.ResolvingCodeGenerator(
+					self,
+					reader_schema_identifier,
+					writer_schema,
+				)
+				schema_code = self.compile_code(code_generator.render_code_with_wraparounds(reader_schema))
+				with self._write_lock:
+					self._publish(resolving_database = {**self._snapshot.resolving_database, key: schema_code})
+		return schema_code
+
+	def add_schema_ids(self, schema_codes: Dict[int, Any]) -> None:
+		'''
+		Adds code for schema registry ids, used to dispatch framed payloads.
+		:param schema_codes: dict of schema registry id to compiled code
+		:return: None
+		'''
+		with self._write_lock:
+			self._publish(schema_id_database = {**self._snapshot.schema_id_database, **schema_codes})
+
+	def add_schema_id_schemata(self, schemata: Dict[int, Tuple[str, Any]]) -> None:
+		'''
+		Adds schemata for schema registry ids, their code is compiled once a framed payload needs it.
+		:param schemata: dict of schema registry id to tuple in form of (schema_identifier, schema)
+		:return: None
+		'''
+		with self._write_lock:
+			self._publish(schema_id_schemata = {**self._snapshot.schema_id_schemata, **schemata})
+
+	def get_code_by_schema_id(self, schema_id: int) -> Any:
+		'''
+		Returns the compiled code for a schema registry id.
+		Unknown ids are fetched from the schema registry and compiled. Ids the registry does not know either
+		are not fetched again for SCHEMA_ID_NEGATIVE_CACHE_TIME seconds.
+		:param schema_id: schema registry id
+		:return: compiled code
+		'''
+		snapshot = self._snapshot
+		schema_code = snapshot.schema_id_database.get(schema_id)
+		if schema_code is not None:
+			return schema_code
+		if schema_id in snapshot.schema_id_schemata:
+			schema_code = self.compile_schema(*snapshot.schema_id_schemata[schema_id])
+			self.add_schema_ids({schema_id: schema_code})
+			return schema_code
+		if not self._schemata_url or self._unknown_schema_ids.get(schema_id, 0) > time.monotonic():
+			raise RuntimeError(f'Code for schema id = {schema_id} not found in code database.')
+		schema = self._cerializer_daemon.fetch_schema(schema_id)
+		if schema is None:
+			self._unknown_schema_ids[schema_id] = time.monotonic() + cerializer.constants.SCHEMA_ID_NEGATIVE_CACHE_TIME
+			raise RuntimeError(f'Schema with id = {schema_id} not found in schema registry.')
+		schema_code = self.get_code_for_schema(schema)
+		self.add_schema_ids({schema_id: schema_code})
+		return schema_code
+
+	def serialize_confluent(self, schema_id: int, data: Any) -> bytes:
+		'''
+		Serializes data in the Confluent wire format, a zero magic byte and the big endian schema registry id
+		followed by the serialized data.
+		:param schema_id: schema registry id
+		:param data: Python objects to be serialized.
+		:return: framed serialized bytes
+		'''
+		schema_code = self.get_code_by_schema_id(schema_id)
+		buffer = bytearray((CONFLUENT_MAGIC,))
+		buffer += schema_id.to_bytes(CONFLUENT_HEADER_SIZE - 1, 'big')
+		schema_code['serialize_into'](data, buffer)
+		return bytes(buffer)
+
+	def serialize_single_object(self, schema_identifier: str, data: Any) -> bytes:
+		'''
+		Serializes data in the Avro single object encoding, two magic bytes and the little endian
+		CRC-64-AVRO fingerprint of the schema followed by the serialized data.
+		:param schema_identifier: schema identifier
+		:param data: Python objects to be serialized.
+		:return: framed serialized bytes
+		'''
+		schema_code = self.get_compiled_code(schema_identifier)
+		buffer = bytearray(SINGLE_OBJECT_MAGIC)
+		buffer += self.get_fingerprint(schema_identifier).to_bytes(SINGLE_OBJECT_HEADER_SIZE - len(SINGLE_OBJECT_MAGIC), 'little')
+		schema_code['serialize_into'](data, buffer)
+		return bytes(buffer)
+
+	def deserialize_framed(self, data: Any) -> Any:
+		'''
+		Deserializes a payload in the Confluent wire format or in the Avro single object encoding.
+		The code is dispatched on the schema registry id or the fingerprint in the header,
+		the rest of the payload is decoded in place.
+		:param data: byte like framed data
+		:return: deserialized data in Python format.
+		'''
+		size = len(data)
+		if size >= CONFLUENT_HEADER_SIZE and data[0] == CONFLUENT_MAGIC:
+			_, schema_id = _CONFLUENT_HEADER.unpack_from(data)
+			schema_code = self._snapshot.schema_id_database.get(schema_id) or self.get_code_by_schema_id(schema_id)
+			return schema_code['deserialize'](read_buffer.BufferReader(data, CONFLUENT_HEADER_SIZE))
+		if size >= SINGLE_OBJECT_HEADER_SIZE:
+			magic, fingerprint = _SINGLE_OBJECT_HEADER.unpack_from(data)
+			if magic == SINGLE_OBJECT_MAGIC:
+				schema_code = self._snapshot.fingerprint_database.get(fingerprint) or self.get_code_by_fingerprint(fingerprint)
+				return schema_code['deserialize'](read_buffer.BufferReader(data, SINGLE_OBJECT_HEADER_SIZE))
+		raise ValueError('Payload is neither in the Confluent wire format nor in the Avro single object encoding.')
+
+	def add_code_listener(self, schema_identifier: str, listener: Callable[[Any], None]) -> None:
+		'''
+		Registers a callback called with the compiled code for a schema once it is available.
+		If the code is already available, the callback is called right away.
+		:param schema_identifier: schema identifier
+		:param listener: callback taking the compiled code
+		:return: None
+		'''
+		with self._write_lock:
+			schema_code = self._snapshot.schema_code_database.get(schema_identifier)
+			if schema_code is None:
+				self._code_listeners.setdefault(schema_identifier, []).append(listener)
+				return
+		listener(schema_code)
+
+	def compile_in_background(self, schema_identifier: str) -> None:
+		'''
+		Schedules compilation of a schema on a background thread.
+		:param schema_identifier: schema identifier
+		:return: None
+		'''
+		with self._compile_locks_lock:
+			if self._background_compiler is None:
+				self._background_compiler = concurrent.futures.ThreadPoolExecutor(
+					max_workers = 1,
+					thread_name_prefix = 'cerializer-compiler',
+				)
+		future = self._background_compiler.submit(self.compile_schema, schema_identifier)
+		future.add_done_callback(_log_background_compilation_failure)
 
 	def add_schema(self, schema_identifier, schema) -> None:
 		'''
@@ -84,17 +968,35 @@ class CerializerSchemata:
 		:param schema: schema to add
 		:return: None
 		'''
+		start = time.perf_counter()
 		new_subschemata = cerializer.utils.get_subschemata([(schema_identifier, schema)])
-		self._schema_database = {**self._schema_database, **new_subschemata}
-		self._init_cycles()
+		self._get_metrics(schema_identifier).parse_time = time.perf_counter() - start
+		with self._write_lock:
+			schema_database = {**self._snapshot.schema_database, **new_subschemata}
+			# only cycles going through the new edges can be new
+			changed_nodes = self._dependency_graph.add_schemata(new_subschemata.values())
+			cycle_starting_nodes = self._dependency_graph.find_cycle_starting_nodes(changed_nodes)
+			# the snapshot is published only once the cycles are known, readers never see a half updated state
+			self._publish(
+				schema_database = schema_database,
+				cycle_starting_nodes = self._snapshot.cycle_starting_nodes | cycle_starting_nodes,
+				named_type_index = {
+					**self._snapshot.named_type_index,
+					**self._index_named_types(new_subschemata),
+				},
+			)
 
-	def get_compiled_code(self, schema_identifier):
+	def get_compiled_code(self, schema_identifier: str) -> Any:
 		'''
 		Returns the compiled code for the given schema identifier.
+		In lazy mode, the schema is compiled on first use.
 		:param schema_identifier: schema identifier to get the code for.
 		:return: compiled code
 		'''
-		return self._schema_code_database[schema_identifier]
+		schema_code_database = self._snapshot.schema_code_database
+		if self._lazy and schema_identifier not in schema_code_database:
+			return self.compile_schema(schema_identifier)
+		return schema_code_database[schema_identifier]
 
 	def load_schema(
 		self,
@@ -111,19 +1013,31 @@ class CerializerSchemata:
 		'''
 		# we first check whether the schema we are looking for is not defined in the same big schema
 		# this would mean the schema is redefined and that the local version has to be used
+		snapshot = self._snapshot
+		schema_database = snapshot.schema_database
 		if context_schema_identifier:
-			context_schema = self._schema_database[context_schema_identifier]
-			# mypy needs this type annotation
-			local_schema_database: Dict[str, Union[str, List[Any], Dict[str, Any]]] = cerializer.utils.get_subschemata(
-				[(context_schema_identifier, context_schema)]
-			)
+			local_schema_database = snapshot.named_type_index.get(context_schema_identifier, {})
 			if schema_identifier in local_schema_database:
-				return local_schema_database[schema_identifier]
-		if schema_identifier in self._schema_database:
-			return self._schema_database[schema_identifier]
+				local_schema: Union[str, List, Dict[str, Any]] = local_schema_database[schema_identifier]
+				return local_schema
+		if schema_identifier in schema_database:
+			schema: Union[str, List, Dict[str, Any]] = schema_database[schema_identifier]
+			return schema
 		else:
 			raise RuntimeError(f'Schema with identifier = {schema_identifier} not found in schema database.')
 
+	@staticmethod
+	def _index_named_types(schema_database: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+		'''
+		Indexes the named types defined within each of the given schemata.
+		:param schema_database: schemata to index
+		:return: dict of schema identifier to its local schema database
+		'''
+		return {
+			schema_identifier: cerializer.utils.get_local_subschemata(schema_identifier, schema)
+			for schema_identifier, schema in schema_database.items()
+		}
+
 	def is_cycle_starting(self, schema_identifier: str) -> bool:
 		'''
 		Checks whether a schema identifier starts a cycle.
@@ -131,48 +1045,3 @@ class CerializerSchemata:
 		:return: bool, cycle starting
 		'''
 		return schema_identifier in self._cycle_starting_nodes
-
-	def _init_cycles(self) -> None:
-		'''
-		Look for all the cycles within the schema database.
-		:return: None
-		'''
-		for _, schema in self._schema_database.items():
-			visited: Set[str] = set()
-			self._cycle_detection(schema, visited, self._cycle_starting_nodes)
-
-	def _cycle_detection(
-		self,
-		parsed_schema: Union[str, List, Dict[str, Any]],
-		visited: Set[str],
-		cycle_starting_nodes: Set[str],
-	) -> None:
-		'''
-		Detects cycles in schemata.
-		This can happen when for example a schema is defined using itself eg. a tree schema.
-		This method add all cycle starting nodes in all schemata_database to cycle_starting_nodes set.
-		:param parsed_schema: schema to check
-		:param visited: visited nodes
-		:param cycle_starting_nodes: cycle starting nodes
-		:return: None
-		'''
-		if isinstance(parsed_schema, str) and parsed_schema in visited:
-			cycle_starting_nodes.add(parsed_schema)
-		elif isinstance(parsed_schema, dict):
-			name = parsed_schema.get('name')
-			type_ = parsed_schema['type']
-			if type(type_) is str and type_ in visited:
-				cycle_starting_nodes.add(type_)
-			elif name:
-				visited.add(name)
-				new_visited = copy.deepcopy(visited)
-				if 'fields' in parsed_schema:
-					for field in parsed_schema['fields']:
-						self._cycle_detection(field, new_visited, cycle_starting_nodes)
-				if type(type_) is dict:
-					self._cycle_detection(type_, new_visited, cycle_starting_nodes)
-				if type(type_) is list:
-					for element in type_:
-						self._cycle_detection(element, new_visited, cycle_starting_nodes)
-				elif type(type_) is str and type_ in self:
-					self._cycle_detection(self.load_schema(type_), new_visited, cycle_starting_nodes)
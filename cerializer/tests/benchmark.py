@@ -4,9 +4,15 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 
 
+import io
+import time
+from typing import Tuple
+
 import yaml
 import timeit
 import cerializer.cerializer
+import cerializer.constants
+import cerializer.container
 import cerializer.schemata
 import cerializer.utils
 import tqdm
@@ -161,6 +167,91 @@ json_decoded = json.loads(json_encoded)
 	return benchmark_header + '\n' + '\n'.join(report) + '\n' + '\n' + benchmark_header_json + '\n' + '\n'.join(report_json)
 
 
+def benchmark_batch(
+	cerializer_schemata: cerializer.schemata.CerializerSchemata,
+	batch_size: int = 1000,
+	number: int = 20,
+) -> str:
+	'''
+	Compares the per record path with the batch entry points on batches of the example data.
+	Results are in nanoseconds per record.
+	'''
+	report = []
+	for schema_identifier, path in tqdm.tqdm(list(cerializer.utils.iterate_over_schemata()), desc = 'Benchmarking batches'):
+		cerializer_codec = cerializer.cerializer.Cerializer(
+			cerializer_schemata = cerializer_schemata,
+			namespace = schema_identifier.split('.')[0],
+			schema_name = schema_identifier.split('.')[1]
+		)
+		data = list(yaml.unsafe_load_all(open(os.path.join(path, 'example.yaml'))))[0]  # type: ignore
+		records = [data] * batch_size
+		payloads = cerializer_codec.serialize_many(records)
+		timings = [
+			timeit.timeit(lambda: [cerializer_codec.serialize(record) for record in records], number = number),
+			timeit.timeit(lambda: cerializer_codec.serialize_many(records), number = number),
+			timeit.timeit(lambda: [cerializer_codec.deserialize(payload) for payload in payloads], number = number),
+			timeit.timeit(lambda: cerializer_codec.deserialize_many(payloads), number = number),
+		]
+		report.append(
+			f'{schema_identifier.ljust(36, " ")},' + ','.join(
+				str(round(timing / number / batch_size * 1e9)) for timing in timings
+			)
+		)
+	benchmark_header = '=========================== BENCHMARK RESULTS BATCH ==========================='
+	columns = f'{"schema".ljust(36, " ")},serialize,serialize_many,deserialize,deserialize_many'
+	return benchmark_header + '\n' + columns + '\n' + '\n'.join(report)
+
+
+def benchmark_container(
+	cerializer_schemata: cerializer.schemata.CerializerSchemata,
+	schema_identifier: str = 'cerializer.nested',
+	records_count: int = 100000,
+	workers: Tuple[int, ...] = (0, cerializer.constants.CONTAINER_COMPRESSION_WORKERS),
+) -> str:
+	'''
+	Measures the throughput of writing and reading container files for every available codec.
+	Throughput is in MB of serialized records per second, before compression.
+	'''
+	path = dict(cerializer.utils.iterate_over_schemata())[schema_identifier]
+	data = list(yaml.unsafe_load_all(open(os.path.join(path, 'example.yaml'))))[0]  # type: ignore
+	records = [data] * records_count
+	namespace, schema_name = schema_identifier.split('.')
+	serialized_size = sum(
+		len(payload) for payload in cerializer.cerializer.Cerializer(cerializer_schemata, namespace, schema_name).serialize_many(records)
+	)
+	report = []
+	for codec in cerializer.container.CODECS:
+		for workers_count in workers:
+			output = io.BytesIO()
+			start = time.perf_counter()
+			with cerializer.container.ContainerWriter(
+				output,
+				cerializer_schemata,
+				namespace,
+				schema_name,
+				codec = codec,
+				compression_workers = workers_count,
+			) as writer:
+				for i in range(0, records_count, 1000):
+					writer.write_many(records[i:i + 1000])
+			write_time = time.perf_counter() - start
+			start = time.perf_counter()
+			for _ in cerializer.container.ContainerReader(
+				io.BytesIO(output.getvalue()),
+				cerializer_schemata,
+				decompression_workers = workers_count,
+			):
+				pass
+			read_time = time.perf_counter() - start
+			report.append(
+				f'{codec.ljust(10, " ")},{workers_count},{len(output.getvalue()) / serialized_size:.3f},'
+				f'{serialized_size / write_time / 1e6:.1f},{serialized_size / read_time / 1e6:.1f}'
+			)
+	benchmark_header = '========================= BENCHMARK RESULTS CONTAINER ========================='
+	columns = 'codec     ,workers,compression ratio,write MB/s,read MB/s'
+	return benchmark_header + '\n' + columns + '\n' + '\n'.join(report)
+
+
 
 if __name__ == "__main__":
 	schemata = get_schemata()
@@ -169,6 +260,12 @@ if __name__ == "__main__":
 		report = benchmark()
 	else:
 		report = benchmark(int(sys.argv[1]), int(sys.argv[2]))
+	report_batch = benchmark_batch(schemata)
+	report_container = benchmark_container(schemata)
 	os.system('clear')
 	os.system('export TERM=xterm')
 	print(report)
+	print()
+	print(report_batch)
+	print()
+	print(report_container)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import yaml
+
+import cerializer.build
+import cerializer.cerializer
+import cerializer.compile_cache
+import cerializer.schemata
+
+
+SCHEMA = {
+	'name': 'user_id',
+	'namespace': 'cerializer',
+	'type': 'int'
+}
+
+
+def test_prebuilt_codecs(tmp_path, monkeypatch):
+	'''
+	tests that codecs built ahead of time are loaded without compiling anything
+	'''
+	schema_root = tmp_path / 'schemata' / 'cerializer.user_id'
+	schema_root.mkdir(parents = True)
+	with open(schema_root / 'schema.yaml', 'w') as schema_file:
+		yaml.safe_dump(SCHEMA, schema_file)
+	build_cache = cerializer.compile_cache.CompileCache(str(tmp_path / 'build_cache'))
+	package_dir = cerializer.build.build(
+		str(tmp_path / 'schemata'),
+		str(tmp_path / 'output'),
+		package_name = 'prebuilt_test_codecs',
+		compile_cache = build_cache,
+	)
+	assert os.path.isfile(os.path.join(package_dir, '__init__.py'))
+
+	monkeypatch.syspath_prepend(str(tmp_path / 'output'))
+	runtime_cache = cerializer.compile_cache.CompileCache(str(tmp_path / 'runtime_cache'))
+	try:
+		schemata = cerializer.schemata.CerializerSchemata(
+			prebuilt_codecs = 'prebuilt_test_codecs',
+			compile_cache = runtime_cache,
+		)
+		assert runtime_cache.statistics.hits == runtime_cache.statistics.misses == 0
+		cerializer_instance = cerializer.cerializer.Cerializer(schemata, 'cerializer', 'user_id')
+		assert cerializer_instance.deserialize(cerializer_instance.serialize(3)) == 3
+	finally:
+		sys.modules.pop('prebuilt_test_codecs', None)
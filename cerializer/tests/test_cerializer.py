@@ -8,6 +8,7 @@ import pytest
 import yaml
 
 import cerializer.cerializer
+import cerializer.interpreter
 import cerializer.schemata
 import cerializer.schema_parser
 import cerializer.utils
@@ -113,3 +114,50 @@ def test_fastavro_compatibility_deserialize(
 			schema_name,
 		)
 		assert False
+
+
+@pytest.mark.parametrize(
+	'schema_identifier, schema_root',
+	cerializer.utils.iterate_over_schemata(),
+)
+def test_interpreted_code_compatibility(
+	schema_root: str,
+	schema_identifier: str,
+	schemata: cerializer.schemata.CerializerSchemata
+) -> None:
+	compiled_code = schemata.get_compiled_code(schema_identifier)
+	interpreted_code = cerializer.interpreter.get_interpreted_code(schemata, schema_identifier)
+	# mypy things yaml has no attribute unsafe_load_all, which is not true
+	data_all = yaml.unsafe_load_all( # type: ignore
+		open(os.path.join(schema_root, 'example.yaml'))
+	)
+	for data in data_all:
+		output_compiled = io.BytesIO()
+		compiled_code['serialize'](data, output_compiled)
+		output_interpreted = io.BytesIO()
+		interpreted_code['serialize'](data, output_interpreted)
+		assert output_interpreted.getvalue() == output_compiled.getvalue()
+		deserialized = interpreted_code['deserialize'](io.BytesIO(output_compiled.getvalue()))
+		assert deserialized == compiled_code['deserialize'](io.BytesIO(output_compiled.getvalue()))
+
+
+def test_interpreted_code_defaults() -> None:
+	'''
+	tests that the interpreted code writes missing fields with defaults the same way as the compiled code
+	'''
+	schema = {
+		'name': 'defaults',
+		'namespace': 'cerializer',
+		'type': 'record',
+		'fields': [{'name': 'a', 'type': 'int', 'default': 5}],
+	}
+	schemata = cerializer.schemata.CerializerSchemata([('cerializer.defaults', schema)])
+	compiled_code = schemata.get_compiled_code('cerializer.defaults')
+	interpreted_code = cerializer.interpreter.get_interpreted_code(schemata, 'cerializer.defaults')
+	for data in ({}, {'a': None}, {'a': 1}):
+		output_compiled = io.BytesIO()
+		compiled_code['serialize'](data, output_compiled)
+		output_interpreted = io.BytesIO()
+		interpreted_code['serialize'](data, output_interpreted)
+		assert output_interpreted.getvalue() == output_compiled.getvalue()
+	assert output_compiled.getvalue() == b'\x02'
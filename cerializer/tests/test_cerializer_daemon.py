@@ -0,0 +1,218 @@
+# pylint: disable=protected-access
+import http.server
+import json
+import threading
+import time
+from typing import Any, Dict, List, Set
+
+import pytest
+import requests
+
+import cerializer.compile_cache
+from cerializer.cerializer_daemon import CerializerDaemon
+from cerializer.schemata import CerializerSchemata
+
+
+
+SCHEMA = {
+	'name': 'user_id',
+	'namespace': 'cerializer',
+	'type': 'int'
+}
+
+
+class _RegistryHandler(http.server.BaseHTTPRequestHandler):
+	'''
+	Stand-in for the schema registry serving the subjects of the server it belongs to.
+	'''
+
+	protocol_version = 'HTTP/1.1'
+	server: '_RegistryServer'
+
+	def do_GET(self):
+		self.server.requested_paths.append(self.path)
+		if self.path in self.server.failing_paths:
+			self.send_error(500)
+			return
+		parts = self.path.strip('/').split('/')
+		subjects = self.server.subjects
+		document: Any
+		# schema registry ids are derived from the versions, user-value version 1 has id 11
+		if parts == ['subjects']:
+			document = list(subjects)
+		elif parts[0] == 'schemas':
+			subject, version = 'user-value', int(parts[2]) - 10
+			if version not in subjects[subject]:
+				self.send_error(404)
+				return
+			document = {'schema': json.dumps(subjects[subject][version])}
+		elif len(parts) == 3:
+			document = sorted(subjects[parts[1]])
+		else:
+			version = int(parts[3])
+			document = {
+				'subject': parts[1],
+				'version': version,
+				'id': version + 10,
+				'schema': json.dumps(subjects[parts[1]][version]),
+			}
+		body = json.dumps(document).encode('utf-8')
+		self.send_response(200)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, *args):
+		pass
+
+
+class _RegistryServer(http.server.ThreadingHTTPServer):
+	'''
+	Schema registry stand-in holding the versions of its subjects and the paths it was asked for.
+	'''
+
+	def __init__(self) -> None:
+		super().__init__(('127.0.0.1', 0), _RegistryHandler)
+		self.subjects: Dict[str, Dict[int, Any]] = {'user-value': {1: SCHEMA}}
+		self.requested_paths: List[str] = []
+		# paths answered with an error
+		self.failing_paths: Set[str] = set()
+
+
+@pytest.fixture
+def registry():
+	server = _RegistryServer()
+	thread = threading.Thread(target = server.serve_forever, daemon = True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+def test_daemon_fetches_only_new_versions(registry, tmp_path):
+	'''
+	tests that the daemon compiles new versions and does not download already seen versions again
+	'''
+	schemata = CerializerSchemata([], compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)))
+	daemon = CerializerDaemon(schemata, f'http://127.0.0.1:{registry.server_address[1]}')
+	daemon.update_with_schema_repo()
+	assert daemon.wait_for_compilation(timeout = 120)
+	assert schemata.get_compiled_code('user:1')
+	assert '/subjects/user-value/versions/1' in registry.requested_paths
+
+	registry.subjects['user-value'][2] = SCHEMA
+	registry.requested_paths.clear()
+	daemon.update_with_schema_repo()
+	assert daemon.wait_for_compilation(timeout = 120)
+	assert schemata.get_compiled_code('user:2')
+	assert '/subjects/user-value/versions/2' in registry.requested_paths
+	assert '/subjects/user-value/versions/1' not in registry.requested_paths
+
+	registry.requested_paths.clear()
+	daemon.update_with_schema_repo()
+	assert registry.requested_paths == ['/subjects', '/subjects/user-value/versions']
+
+
+def test_daemon_recovers_from_failed_polls(registry, tmp_path):
+	'''
+	tests that versions fetched by a failed poll are fetched again and that the poller survives the failure
+	'''
+	schemata = CerializerSchemata([], compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)))
+	daemon = CerializerDaemon(schemata, f'http://127.0.0.1:{registry.server_address[1]}', refresh_time = 0.01)
+	registry.subjects['user-value'][2] = SCHEMA
+	registry.failing_paths.add('/subjects/user-value/versions/2')
+	with pytest.raises(requests.HTTPError):
+		daemon.update_with_schema_repo()
+
+	registry.failing_paths = {'/subjects'}
+	daemon.start()
+	try:
+		deadline = time.monotonic() + 120
+		registry.requested_paths.clear()
+		while registry.requested_paths.count('/subjects') < 2 and time.monotonic() < deadline:
+			time.sleep(0.01)
+		assert daemon.is_alive()
+		registry.failing_paths = set()
+		deadline = time.monotonic() + 120
+		while not {'user:1', 'user:2'} <= schemata.get_known_schemata() and time.monotonic() < deadline:
+			daemon.wait_for_compilation(timeout = 1)
+		assert {'user:1', 'user:2'} <= schemata.get_known_schemata()
+	finally:
+		daemon.stop()
+
+
+def test_daemon_stopped_before_compiling(registry, tmp_path):
+	'''
+	tests that fetched schemata are not scheduled for compilation once the daemon is stopped
+	'''
+	schemata = CerializerSchemata([], compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)))
+	daemon = CerializerDaemon(schemata, f'http://127.0.0.1:{registry.server_address[1]}')
+	daemon.stop()
+	daemon.update_with_schema_repo()
+	assert daemon.wait_for_compilation(timeout = 0)
+	assert 'user:1' not in schemata.get_known_schemata()
+
+
+def test_daemon_registers_ids_of_known_schemata(registry, tmp_path):
+	'''
+	tests that schemata known before the daemon fetched them get their schema registry ids
+	'''
+	schemata = CerializerSchemata([('user:1', SCHEMA)], compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)))
+	daemon = CerializerDaemon(schemata, f'http://127.0.0.1:{registry.server_address[1]}')
+	daemon.update_with_schema_repo()
+	assert daemon.wait_for_compilation(timeout = 120)
+	assert schemata.get_snapshot().schema_id_database[11] is schemata.get_compiled_code('user:1')
+	assert schemata.deserialize_framed(b'\x00\x00\x00\x00\x0b\xd8\x04') == 300
+	assert '/schemas/ids/11' not in registry.requested_paths
+
+
+def test_lazy_schemata_from_registry(registry, tmp_path):
+	'''
+	tests that in lazy mode the schemata fetched from the registry are compiled on first use only
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata(
+		schemata_url = f'http://127.0.0.1:{registry.server_address[1]}',
+		compile_cache = cache,
+		lazy = True,
+	)
+	schemata._cerializer_daemon.stop()
+	assert cache.statistics.hits == cache.statistics.misses == 0
+	# nothing to wait for on init
+	assert schemata._cerializer_daemon.wait_for_compilation(timeout = 0)
+	assert 'user:1' not in schemata.get_known_schemata()
+	assert schemata.deserialize_framed(b'\x00\x00\x00\x00\x0b\xd8\x04') == 300
+	assert cache.statistics.misses == 1
+	assert '/schemas/ids/11' not in registry.requested_paths
+
+
+def test_framed_payloads(registry, tmp_path):
+	'''
+	tests dispatching framed payloads by schema registry id and fingerprint, including ids fetched on demand
+	'''
+	schemata = CerializerSchemata(
+		schemata_url = f'http://127.0.0.1:{registry.server_address[1]}',
+		compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)),
+	)
+	schemata._cerializer_daemon.stop()
+	assert schemata.get_snapshot().schema_id_database[11] is schemata.get_compiled_code('user:1')
+	confluent = schemata.serialize_confluent(11, 300)
+	assert confluent[:5] == b'\x00\x00\x00\x00\x0b'
+	assert schemata.deserialize_framed(confluent) == 300
+	single_object = schemata.serialize_single_object('user:1', 300)
+	# the Parsing Canonical Form of SCHEMA is "int"
+	assert single_object[:10] == b'\xc3\x01' + (8247732601305521295).to_bytes(8, 'little')
+	assert schemata.deserialize_framed(memoryview(single_object)) == 300
+
+	# registered after the daemon has fetched the subject, the id is fetched when first seen
+	registry.subjects['user-value'][2] = {'type': 'string'}
+	assert schemata.deserialize_framed(b'\x00\x00\x00\x00\x0c\x04ab') == 'ab'
+	registry.requested_paths.clear()
+	for _ in range(2):
+		with pytest.raises(RuntimeError):
+			schemata.deserialize_framed(b'\x00\x00\x00\x00\x63')
+	# the unknown id is asked for only once
+	assert registry.requested_paths == ['/schemas/ids/99']
+	with pytest.raises(ValueError):
+		schemata.deserialize_framed(b'\x01')
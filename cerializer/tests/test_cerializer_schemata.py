@@ -1,4 +1,13 @@
-from cerializer.schemata import CerializerSchemata
+# pylint: disable=protected-access
+import dataclasses
+from typing import List, Optional
+
+import pytest
+
+import read_buffer
+import cerializer.compile_cache
+import cerializer.interpreter
+from cerializer.schemata import CerializerSchemata, CompileMetrics
 from cerializer.cerializer import Cerializer
 
 
@@ -59,6 +68,44 @@ def test_cycles():
 	assert not schemata.is_cycle_starting('cerializer.plain_int')
 
 
+def test_cycles_across_schemata():
+	'''
+	tests that a cycle closed by a later added schema is detected, including cycles through arrays
+	'''
+	def linked(name, other, fields = ()):
+		return {
+			'name': name,
+			'namespace': 'cerializer',
+			'type': 'record',
+			'fields': [{'name': 'other', 'type': ['null', other]}, *fields],
+		}
+	children = {'name': 'children', 'type': {'type': 'array', 'items': 'cerializer.first'}}
+	schemata = CerializerSchemata([])
+	schemata.add_schema('cerializer.first', linked('first', 'cerializer.second', [children]))
+	assert schemata.is_cycle_starting('cerializer.first')
+	assert not schemata.is_cycle_starting('cerializer.second')
+	schemata.add_schema('cerializer.second', linked('second', 'cerializer.first'))
+	assert schemata.is_cycle_starting('cerializer.first')
+	assert schemata.is_cycle_starting('cerializer.second')
+
+
+def test_snapshot():
+	'''
+	tests that additions publish a new snapshot and leave the previous ones untouched
+	'''
+	schemata = CerializerSchemata([])
+	snapshot = schemata.get_snapshot()
+	schemata.add_schema(CYCLE_SCHEMA_IDENTIFIER, CYCLE_SCHEMA)
+	new_snapshot = schemata.get_snapshot()
+	assert new_snapshot.version > snapshot.version
+	assert CYCLE_SCHEMA_IDENTIFIER not in snapshot.schema_database
+	assert CYCLE_SCHEMA_IDENTIFIER in new_snapshot.schema_database
+	assert CYCLE_SCHEMA_IDENTIFIER in new_snapshot.cycle_starting_nodes
+	schemata.add_code(CYCLE_SCHEMA_IDENTIFIER, 'code')
+	assert CYCLE_SCHEMA_IDENTIFIER not in new_snapshot.schema_code_database
+	assert schemata.get_snapshot().schema_code_database[CYCLE_SCHEMA_IDENTIFIER] == 'code'
+
+
 def test_load_schema():
 	'''
 	tests whether loading a schema returns it in parsed form
@@ -79,6 +126,29 @@ def test_load_schema_and_init():
 	assert schemata1.load_schema(SCHEMA_IDENTIFIER) == schemata2.load_schema(SCHEMA_IDENTIFIER)
 
 
+def test_load_schema_with_context():
+	'''
+	tests that a named type redefined within a schema is resolved to the local definition in its context
+	'''
+	def wrapper(name, inner_type):
+		return {
+			'name': name,
+			'namespace': 'cerializer',
+			'type': 'record',
+			'fields': [{'name': 'inner', 'type': {'name': 'inner', 'type': 'record', 'fields': [
+				{'name': 'value', 'type': inner_type},
+			]}}],
+		}
+	schemata = CerializerSchemata([])
+	schemata.add_schema('cerializer.first', wrapper('first', 'int'))
+	schemata.add_schema('cerializer.second', wrapper('second', 'string'))
+	# the latest definition wins globally
+	global_schema = schemata.load_schema('cerializer.inner')
+	assert isinstance(global_schema, dict) and global_schema['fields'][0]['type'] == 'string'
+	local_schema = schemata.load_schema('cerializer.inner', 'cerializer.first')
+	assert isinstance(local_schema, dict) and local_schema['fields'][0]['type'] == 'int'
+
+
 def test_add_code():
 	'''
 	tests whether added code will cause the schemata instance to react properly
@@ -98,3 +168,491 @@ def test_add_code():
 	cerializer_instance = Cerializer(schemata, schema_namespace, schema_name)
 	assert cerializer_instance.serialize({}) == SERIALIZED
 	assert cerializer_instance.deserialize(b'') == DESERIALIZED
+
+
+def test_parallel_compilation(tmp_path):
+	'''
+	tests that schemata compiled in a process pool are loaded back and usable
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata(
+		[(SCHEMA_IDENTIFIER, SCHEMA), (CYCLE_SCHEMA_IDENTIFIER, CYCLE_SCHEMA)],
+		compile_cache = cache,
+		compilation_workers = 2,
+	)
+	assert {SCHEMA_IDENTIFIER, CYCLE_SCHEMA_IDENTIFIER} <= schemata.get_known_schemata()
+	assert cache.statistics.misses == 2
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user')
+	assert cerializer_instance.deserialize(cerializer_instance.serialize(7)) == 7
+
+
+def test_shared_module_compilation(tmp_path):
+	'''
+	tests that schemata batched into one shared module expose their own entry points
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata(
+		[(SCHEMA_IDENTIFIER, SCHEMA), (CYCLE_SCHEMA_IDENTIFIER, CYCLE_SCHEMA)],
+		compile_cache = cache,
+		shards = 1,
+	)
+	assert cache.statistics.misses == 1
+	user_code = schemata.get_compiled_code(SCHEMA_IDENTIFIER)
+	cycle_code = schemata.get_compiled_code(CYCLE_SCHEMA_IDENTIFIER)
+	assert user_code['serialize'] is not cycle_code['serialize']
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user')
+	assert cerializer_instance.deserialize(cerializer_instance.serialize(7)) == 7
+
+
+def test_lazy_compilation(tmp_path):
+	'''
+	tests that in lazy mode a schema is compiled on first use only
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata(
+		[(SCHEMA_IDENTIFIER, SCHEMA), (CYCLE_SCHEMA_IDENTIFIER, CYCLE_SCHEMA)],
+		compile_cache = cache,
+		lazy = True,
+	)
+	assert schemata.get_known_schemata() == set()
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user')
+	assert schemata.get_known_schemata() == {SCHEMA_IDENTIFIER}
+	assert cerializer_instance.deserialize(cerializer_instance.serialize(7)) == 7
+
+
+def test_lazy_warm_up(tmp_path):
+	'''
+	tests that the background warm up compiles the requested schemata
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata(
+		[(SCHEMA_IDENTIFIER, SCHEMA), (CYCLE_SCHEMA_IDENTIFIER, CYCLE_SCHEMA)],
+		compile_cache = cache,
+		lazy = True,
+		warm_up = [CYCLE_SCHEMA_IDENTIFIER],
+	)
+	assert schemata.wait_for_warm_up(timeout = 120)
+	assert schemata.get_known_schemata() == {CYCLE_SCHEMA_IDENTIFIER}
+
+
+def test_interpreted_fallback(tmp_path):
+	'''
+	tests that Cerializer works before its schema is compiled and switches to the compiled code later
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata([(SCHEMA_IDENTIFIER, SCHEMA)], compile_cache = cache, lazy = True)
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user', interpreted_fallback = True)
+	serialized = cerializer_instance.serialize(7)
+	assert cerializer_instance.deserialize(serialized) == 7
+	# waits for the background compilation
+	schemata.compile_schema(SCHEMA_IDENTIFIER)
+	assert cerializer_instance.compiled
+	assert cerializer_instance.serialize(7) == serialized
+
+
+def test_deduplicated_compilation(tmp_path):
+	'''
+	tests that identical schemata under different identifiers are compiled once and share the code
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata([], compile_cache = cache)
+	code = schemata.compile_schema('user:1', SCHEMA)
+	assert schemata.compile_schema('user_copy:1', dict(SCHEMA, doc = 'same wire format')) is code
+	assert cache.statistics.hits + cache.statistics.misses == 1
+	# the Parsing Canonical Form of SCHEMA is "int"
+	assert schemata.get_code_by_fingerprint(8247732601305521295) is code
+
+
+def test_compile_metrics(tmp_path):
+	'''
+	tests that every stage of the compilation of a schema is measured and reported to the hook
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	reported: List[CompileMetrics] = []
+	schemata = CerializerSchemata(
+		[(SCHEMA_IDENTIFIER, SCHEMA)],
+		compile_cache = cache,
+		compile_metrics_hook = reported.append,
+	)
+	metrics = schemata.get_compile_metrics(SCHEMA_IDENTIFIER)[SCHEMA_IDENTIFIER]
+	assert reported == [metrics]
+	assert metrics.parse_time > 0 and metrics.render_time > 0 and metrics.rendered_size > 0
+	assert metrics.build is not None and not metrics.build.cache_hit
+	assert metrics.build.cythonize_time > 0 and metrics.build.c_compile_time > 0
+	assert metrics.build.module_size > 0
+	assert schemata.get_slowest_schemata(1) == [metrics]
+
+	warm_schemata = CerializerSchemata([(SCHEMA_IDENTIFIER, SCHEMA)], compile_cache = cache)
+	warm_metrics = warm_schemata.get_compile_metrics()[SCHEMA_IDENTIFIER]
+	assert warm_metrics.build is not None and warm_metrics.build.cache_hit
+	assert warm_metrics.build.cythonize_time == 0
+	assert warm_metrics.as_record()['module_size'] == metrics.build.module_size
+
+
+def test_serialize_into():
+	'''
+	tests writing into caller owned buffers and into the per thread scratch buffer
+	'''
+	schemata = CerializerSchemata([(SCHEMA_IDENTIFIER, SCHEMA)])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user')
+	serialized = cerializer_instance.serialize(300)
+	buffer = bytearray(b'head')
+	assert cerializer_instance.serialize_into(300, buffer, len(buffer)) == len(serialized)
+	assert buffer == b'head' + serialized
+	expected = b'h' + serialized + buffer[1 + len(serialized):]
+	assert cerializer_instance.serialize_into(300, buffer, 1) == len(serialized)
+	assert buffer == expected
+	fixed_buffer = memoryview(bytearray(len(serialized)))
+	assert cerializer_instance.serialize_into(300, fixed_buffer) == len(serialized)
+	assert fixed_buffer == serialized
+	with pytest.raises(ValueError):
+		cerializer_instance.serialize_into(300, fixed_buffer, 1)
+	with pytest.raises(ValueError):
+		cerializer_instance.serialize_into(300, buffer, -1)
+	view = cerializer_instance.serialize_to_scratch(300)
+	assert view == serialized
+	kept_slice = view[:]
+	assert cerializer_instance.serialize_to_scratch(7) == cerializer_instance.serialize(7)
+	# a view kept by the caller is not overwritten
+	assert kept_slice == serialized
+	exported = memoryview(cerializer_instance.serialize_to_scratch(300))
+	assert cerializer_instance.serialize_to_scratch(7) == cerializer_instance.serialize(7)
+	assert exported == serialized
+
+
+def test_deserialize_from_buffer():
+	'''
+	tests decoding directly from objects supporting the buffer protocol, with bounds checks
+	'''
+	schemata = CerializerSchemata([(SCHEMA_IDENTIFIER, SCHEMA)])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user')
+	serialized = cerializer_instance.serialize(-300000)
+	assert cerializer_instance.deserialize(serialized) == -300000
+	assert cerializer_instance.deserialize(bytearray(serialized)) == -300000
+	assert cerializer_instance.deserialize(memoryview(b'head' + serialized)[4:]) == -300000
+	with pytest.raises(EOFError):
+		cerializer_instance.deserialize(serialized[:-1])
+
+
+def test_batch_entry_points():
+	'''
+	tests that the batch entry points match the per record path, for compiled and interpreted code
+	'''
+	schemata = CerializerSchemata([(SCHEMA_IDENTIFIER, SCHEMA)])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'user')
+	records = [1, -2, 300000]
+	payloads = cerializer_instance.serialize_many(records)
+	assert payloads == [cerializer_instance.serialize(record) for record in records]
+	assert cerializer_instance.deserialize_many(payloads) == records
+	buffer = bytearray(b'head')
+	offsets = cerializer_instance.serialize_many_into(records, buffer)
+	assert offsets[0] == 4 and bytes(buffer[4:]) == b''.join(payloads)
+	assert cerializer_instance.deserialize_many(buffer, offsets) == records
+	with pytest.raises(ValueError):
+		cerializer_instance.deserialize_many(buffer, [4, len(buffer) + 1])
+
+	cerializer_instance._use_code(cerializer.interpreter.get_interpreted_code(schemata, SCHEMA_IDENTIFIER))
+	assert cerializer_instance.serialize_many(records) == payloads
+	assert cerializer_instance.serialize_many_into(records, bytearray(b'head')) == offsets
+	assert cerializer_instance.deserialize_many(buffer, offsets) == records
+
+
+def test_schema_resolution():
+	'''
+	tests that data written with an older version of a schema is resolved to the current one
+	'''
+	writer_schema = {
+		'name': 'cerializer.resolved',
+		'type': 'record',
+		'fields': [
+			{'name': 'id', 'type': 'int'},
+			{'name': 'dropped', 'type': {'type': 'array', 'items': {'type': 'map', 'values': ['null', 'string']}}},
+			{'name': 'score', 'type': 'float'},
+			{'name': 'name', 'type': 'string'},
+			{'name': 'grade', 'type': {'type': 'enum', 'name': 'cerializer.grade', 'symbols': ['A', 'B', 'X']}},
+			{'name': 'old_value', 'type': ['null', 'int', 'boolean']},
+		],
+	}
+	reader_schema = {
+		'name': 'cerializer.resolved',
+		'type': 'record',
+		'fields': [
+			{'name': 'grade', 'type': {'type': 'enum', 'name': 'cerializer.grade', 'symbols': ['B', 'A', 'U'], 'default': 'U'}},
+			{'name': 'id', 'type': 'long'},
+			{'name': 'score', 'type': 'double'},
+			{'name': 'name', 'type': 'bytes'},
+			{'name': 'value', 'aliases': ['old_value'], 'type': ['null', 'string', 'long']},
+			{'name': 'added', 'type': 'int', 'default': 5},
+		],
+	}
+	schemata = CerializerSchemata([('cerializer.resolved', reader_schema)])
+	writer_code = schemata.get_code_for_schema(writer_schema)
+	resolving_code = schemata.get_resolving_code(writer_schema, 'cerializer.resolved')
+	assert schemata.get_resolving_code(writer_schema, 'cerializer.resolved') is resolving_code
+	assert schemata.get_resolving_code(reader_schema, 'cerializer.resolved') is schemata.get_compiled_code('cerializer.resolved')
+
+	record = {
+		'id': 1,
+		'dropped': [{'a': None, 'b': 'skipped'}],
+		'score': 0.5,
+		'name': 'name',
+		'grade': 'X',
+		'old_value': 3,
+	}
+	buffer = bytearray()
+	writer_code['serialize_into'](record, buffer)
+	assert resolving_code['deserialize'](read_buffer.BufferReader(buffer)) == {
+		'grade': 'U',
+		'id': 1,
+		'score': 0.5,
+		'name': b'name',
+		'value': 3,
+		'added': 5,
+	}
+	assert resolving_code['deserialize_many']([buffer, buffer])[1]['value'] == 3
+	buffer = bytearray()
+	writer_code['serialize_into']({**record, 'old_value': True}, buffer)
+	with pytest.raises(ValueError):
+		resolving_code['deserialize'](read_buffer.BufferReader(buffer))
+
+	with pytest.raises(ValueError):
+		schemata.get_resolving_code({**writer_schema, 'fields': writer_schema['fields'][:2]}, 'cerializer.resolved')
+
+
+def test_projection():
+	'''
+	tests that a projection decodes only the requested fields
+	'''
+	schema = {
+		'name': 'cerializer.projected',
+		'type': 'record',
+		'fields': [
+			{'name': 'id', 'type': 'long'},
+			{'name': 'skipped', 'type': {'type': 'map', 'values': {'type': 'array', 'items': 'string'}}},
+			{
+				'name': 'address',
+				'type': [
+					'null',
+					{
+						'name': 'cerializer.address',
+						'type': 'record',
+						'fields': [{'name': 'street', 'type': 'string'}, {'name': 'city', 'type': 'string'}],
+					},
+				],
+			},
+			{'name': 'billing', 'type': 'cerializer.address'},
+		],
+	}
+	schemata = CerializerSchemata([('cerializer.projected', schema)])
+	buffer = bytearray()
+	schemata.get_compiled_code('cerializer.projected')['serialize_into'](
+		{
+			'id': 1,
+			'skipped': {'a': ['b', 'c']},
+			'address': {'street': 'street', 'city': 'city'},
+			'billing': {'street': 'billing street', 'city': 'billing city'},
+		},
+		buffer,
+	)
+	projecting_code = schemata.get_projecting_code('cerializer.projected', ['id', 'address.city', 'billing'])
+	assert schemata.get_projecting_code('cerializer.projected', ['billing', 'address.city', 'id']) is projecting_code
+	assert projecting_code['deserialize'](read_buffer.BufferReader(buffer)) == {
+		'id': 1,
+		'address': {'city': 'city'},
+		'billing': {'street': 'billing street', 'city': 'billing city'},
+	}
+	for field_paths in (['missing'], ['id.missing'], ['address.missing'], []):
+		with pytest.raises(ValueError):
+			schemata.get_projecting_code('cerializer.projected', field_paths)
+
+
+def test_lazy_record_view():
+	'''
+	tests that a lazy record view decodes the same fields as deserialize
+	'''
+	schema = {
+		'name': 'cerializer.lazy',
+		'type': 'record',
+		'fields': [
+			{'name': 'skipped', 'type': {'type': 'array', 'items': {'type': 'map', 'values': ['null', 'string']}}},
+			{'name': 'id', 'type': 'long'},
+			{'name': 'optional', 'type': ['null', 'double']},
+			{'name': 'name', 'type': 'string'},
+		],
+	}
+	schemata = CerializerSchemata([
+		('cerializer.lazy', schema),
+		('cerializer.numbers', {'type': 'array', 'items': 'long'}),
+	])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'lazy')
+	record = {'skipped': [{'a': None, 'b': 'c'}], 'id': 3, 'optional': 0.5, 'name': 'lazy'}
+	payload = cerializer_instance.serialize(record)
+	view = cerializer_instance.deserialize_lazy(payload)
+	assert view['name'] == 'lazy'
+	assert view['id'] == 3
+	assert view.get('missing') is None
+	with pytest.raises(KeyError):
+		view['missing']  # pylint: disable=pointless-statement
+	assert list(view) == ['skipped', 'id', 'optional', 'name'] and len(view) == 4
+	assert view == record and view.to_dict() == cerializer_instance.deserialize(payload)
+	# the views are compiled separately, only once they are asked for
+	assert 'deserialize_lazy' not in schemata.get_compiled_code('cerializer.lazy')
+	assert schemata.get_lazy_code('cerializer.lazy') is schemata.get_lazy_code('cerializer.lazy')
+
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'numbers')
+	assert cerializer_instance.deserialize_lazy(cerializer_instance.serialize([1, 2])) == [1, 2]
+
+
+def test_record_classes():
+	'''
+	tests that records are deserialized into the generated record classes
+	'''
+	schema = {
+		'name': 'cerializer.classes',
+		'type': 'record',
+		'fields': [
+			{'name': 'id', 'type': 'long'},
+			{'name': 'from', 'type': ['null', 'string']},
+			{
+				'name': 'addresses',
+				'type': {
+					'type': 'array',
+					'items': {
+						'name': 'cerializer.address',
+						'type': 'record',
+						'fields': [{'name': 'street', 'type': 'string'}],
+					},
+				},
+			},
+			{'name': 'billing', 'type': {'type': 'map', 'values': ['null', 'cerializer.address']}},
+		],
+	}
+	schemata = CerializerSchemata([('cerializer.classes', schema)])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'classes')
+	record = {'id': 1, 'from': 'a', 'addresses': [{'street': 'b'}], 'billing': {'c': None, 'd': {'street': 'e'}}}
+	payload = cerializer_instance.serialize(record)
+	record_class_code = schemata.get_record_class_code('cerializer.classes')
+	assert schemata.get_record_class_code('cerializer.classes') is record_class_code
+	data = record_class_code['deserialize'](read_buffer.BufferReader(payload))
+	assert type(data) is record_class_code['record_classes']['cerializer.classes']
+	assert isinstance(data.addresses[0], record_class_code['record_classes']['cerializer.address'])
+	assert data.from_ == 'a' and data.addresses[0].street == 'b' and data.billing['d'].street == 'e'
+	assert not hasattr(data, '__dict__')
+	assert data._asdict() == record
+	assert record_class_code['deserialize_many']([payload]) == [data]
+
+	colliding_schema = {
+		'name': 'cerializer.colliding',
+		'type': 'record',
+		'fields': [{'name': 'from', 'type': 'long'}, {'name': 'from_', 'type': 'long'}],
+	}
+	schemata.add_schema('cerializer.colliding', colliding_schema)
+	with pytest.raises(ValueError):
+		schemata.get_record_class_code('cerializer.colliding')
+
+
+def test_record_classes_serialization():
+	'''
+	tests that objects are serialized by attribute access
+	'''
+	schema = {
+		'name': 'cerializer.objects',
+		'type': 'record',
+		'fields': [
+			{'name': 'id', 'type': 'long'},
+			{'name': 'score', 'type': 'double', 'default': 0.5},
+			{
+				'name': 'address',
+				'type': [
+					'null',
+					{'name': 'cerializer.address', 'type': 'record', 'fields': [{'name': 'street', 'type': 'string'}]},
+				],
+			},
+		],
+	}
+
+	@dataclasses.dataclass(frozen = True)
+	class Address:
+		street: str
+
+	@dataclasses.dataclass(frozen = True)
+	class Objects:
+		id: int
+		address: Optional[Address]
+
+	schemata = CerializerSchemata([('cerializer.objects', schema)])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'objects')
+	objects_cerializer = Cerializer(schemata, 'cerializer', 'objects', record_classes = True)
+	payload = objects_cerializer.serialize(Objects(1, Address('a')))
+	assert payload == cerializer_instance.serialize({'id': 1, 'score': 0.5, 'address': {'street': 'a'}})
+	data = objects_cerializer.deserialize(payload)
+	assert data.score == 0.5 and data.address.street == 'a'
+	assert objects_cerializer.serialize(data) == payload
+	assert objects_cerializer.serialize_many([Objects(2, None)]) == [
+		cerializer_instance.serialize({'id': 2, 'score': 0.5, 'address': None}),
+	]
+	attributes_cerializer = Cerializer(schemata, 'cerializer', 'objects', from_attributes = True)
+	assert attributes_cerializer.serialize(Objects(1, Address('a'))) == payload
+	assert attributes_cerializer.deserialize(payload) == {'id': 1, 'score': 0.5, 'address': {'street': 'a'}}
+	with pytest.raises(ValueError):
+		Cerializer(schemata, 'cerializer', 'objects', interpreted_fallback = True, record_classes = True)
+	with pytest.raises(ValueError):
+		Cerializer(schemata, 'cerializer', 'objects', interpreted_fallback = True, from_attributes = True)
+
+
+def test_columns():
+	'''
+	tests that batches of records are converted from and into NumPy columns
+	'''
+	numpy = pytest.importorskip('numpy')
+	schema = {
+		'name': 'cerializer.columns',
+		'type': 'record',
+		'fields': [
+			{'name': 'id', 'type': 'long'},
+			{'name': 'flag', 'type': 'boolean'},
+			{'name': 'score', 'type': ['null', 'double']},
+			{'name': 'kind', 'type': {'type': 'enum', 'name': 'cerializer.kind', 'symbols': ['A', 'B']}},
+			{
+				'name': 'address',
+				'type': {'name': 'cerializer.address', 'type': 'record', 'fields': [{'name': 'street', 'type': 'string'}]},
+			},
+		],
+	}
+	schemata = CerializerSchemata([('cerializer.columns', schema)])
+	cerializer_instance = Cerializer(schemata, 'cerializer', 'columns')
+	records = [
+		{'id': 1, 'flag': True, 'score': None, 'kind': 'B', 'address': {'street': 'a'}},
+		{'id': 2, 'flag': False, 'score': 0.5, 'kind': 'A', 'address': {'street': 'b'}},
+	]
+	buffer = bytearray()
+	offsets = cerializer_instance.serialize_many_into(records, buffer)
+	for columns in (
+		cerializer_instance.deserialize_columns(cerializer_instance.serialize_many(records)),
+		cerializer_instance.deserialize_columns(buffer, offsets),
+	):
+		assert list(columns) == ['id', 'flag', 'score', 'kind', 'address.street']
+		assert columns['id'].dtype == numpy.int64 and columns['id'].tolist() == [1, 2]
+		assert columns['flag'].dtype == numpy.bool_ and columns['flag'].tolist() == [True, False]
+		assert columns['score'].dtype == numpy.float64 and columns['score'].tolist() == [None, 0.5]
+		assert columns['kind'].tolist() == [1, 0]
+		assert columns['address.street'].tolist() == ['a', 'b']
+	assert schemata.get_columnar_code('cerializer.columns')['column_symbols'] == {'kind': ['A', 'B']}
+	assert cerializer_instance.serialize_columns(columns) == cerializer_instance.serialize_many(records)
+	column_buffer = bytearray()
+	assert cerializer_instance.serialize_columns_into(
+		{
+			'id': [1, 2],
+			'flag': [True, False],
+			'score': numpy.ma.MaskedArray([0.0, 0.5], mask = [True, False]),
+			'kind': [1, 0],
+			'address.street': ['a', 'b'],
+		},
+		column_buffer,
+	) == offsets
+	assert column_buffer == buffer
+	assert cerializer_instance.serialize_columns(columns, n_rows = 2) == cerializer_instance.serialize_many(records)
+	with pytest.raises(ValueError):
+		cerializer_instance.serialize_columns(columns, n_rows = 3)
+	with pytest.raises(ValueError):
+		cerializer_instance.serialize_columns({**columns, 'id': [1]})
@@ -0,0 +1,44 @@
+import os
+
+import cerializer.compile_cache
+import cerializer.compiler
+
+
+CODE = '''
+def __invoke():
+    def answer():
+        return {answer}
+    return locals()
+'''
+
+
+def test_compile_cache_hit(tmp_path):
+	'''
+	tests that a module compiled once is loaded from the cache by another cache instance on the same dir
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	code = CODE.format(answer = 42)
+	compiled = cerializer.compiler.compile_code(code, cache)
+	assert compiled['answer']() == 42
+	assert cache.statistics.misses == 1
+	assert os.listdir(str(tmp_path)) == [os.path.basename(cache.get_module_path(cache.get_module_name(code)))]
+
+	warm_cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	compiled = cerializer.compiler.compile_code(code, warm_cache)
+	assert compiled['answer']() == 42
+	assert warm_cache.statistics.hits == 1
+	assert warm_cache.statistics.misses == 0
+
+
+def test_compile_cache_eviction(tmp_path):
+	'''
+	tests that the size bound evicts the least recently used module but never the one just built
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path), max_size = 1)
+	first = CODE.format(answer = 1)
+	second = CODE.format(answer = 2)
+	cerializer.compiler.compile_code(first, cache)
+	cerializer.compiler.compile_code(second, cache)
+	assert not os.path.exists(cache.get_module_path(cache.get_module_name(first)))
+	assert os.path.exists(cache.get_module_path(cache.get_module_name(second)))
+	assert cache.statistics.evictions == 1
@@ -0,0 +1,81 @@
+import io
+
+import fastavro
+import pytest
+
+import cerializer.compile_cache
+import cerializer.container
+from cerializer.schemata import CerializerSchemata
+
+
+
+SCHEMA = {
+	'name': 'trade',
+	'namespace': 'cerializer',
+	'type': 'record',
+	'fields': [
+		{'name': 'id', 'type': 'long'},
+		{'name': 'symbol', 'type': 'string'},
+		{'name': 'price', 'type': 'double'},
+	]
+}
+RECORDS = [{'id': i, 'symbol': f'S{i}', 'price': i / 4} for i in range(100)]
+
+
+def test_container_round_trip(tmp_path):
+	'''
+	tests that written files are split into blocks and read back by Cerializer and fastavro alike
+	'''
+	cache = cerializer.compile_cache.CompileCache(str(tmp_path))
+	schemata = CerializerSchemata([('cerializer.trade', SCHEMA)], compile_cache = cache)
+	output = io.BytesIO()
+	with cerializer.container.ContainerWriter(output, schemata, 'cerializer', 'trade', block_size = 100) as writer:
+		for record in RECORDS[:50]:
+			writer.write(record)
+		writer.write_many(RECORDS[50:])
+	reader = cerializer.container.ContainerReader(io.BytesIO(output.getvalue()), schemata)
+	assert len(list(reader.iterate_blocks())) > 2
+	assert list(cerializer.container.ContainerReader(io.BytesIO(output.getvalue()), schemata)) == RECORDS
+	assert list(fastavro.reader(io.BytesIO(output.getvalue()))) == RECORDS
+
+
+def test_container_with_unknown_schema(tmp_path):
+	'''
+	tests reading a file written by fastavro whose schema is compiled from the header
+	'''
+	output = io.BytesIO()
+	fastavro.writer(output, fastavro.parse_schema(SCHEMA), RECORDS, sync_interval = 100)
+	schemata = CerializerSchemata([], compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)))
+	reader = cerializer.container.ContainerReader(io.BytesIO(output.getvalue()), schemata)
+	assert list(reader) == RECORDS
+	# the schema does not leak into the schema database
+	assert 'cerializer.trade' not in schemata
+
+
+@pytest.mark.parametrize('codec', sorted(cerializer.container.CODECS))
+@pytest.mark.parametrize('workers', [0, 2])
+def test_container_codecs(codec, workers, tmp_path):
+	'''
+	tests that compressed files round trip and are compatible with fastavro, with and without the thread pool
+	'''
+	schemata = CerializerSchemata([('cerializer.trade', SCHEMA)], compile_cache = cerializer.compile_cache.CompileCache(str(tmp_path)))
+	output = io.BytesIO()
+	with cerializer.container.ContainerWriter(
+		output,
+		schemata,
+		'cerializer',
+		'trade',
+		block_size = 100,
+		codec = codec,
+		compression_workers = workers,
+	) as writer:
+		writer.write_many(RECORDS[:50])
+		for record in RECORDS[50:]:
+			writer.write(record)
+	reader = cerializer.container.ContainerReader(io.BytesIO(output.getvalue()), schemata, decompression_workers = workers)
+	assert reader.codec == codec
+	assert list(reader) == RECORDS
+	assert list(fastavro.reader(io.BytesIO(output.getvalue()))) == RECORDS
+	fastavro_output = io.BytesIO()
+	fastavro.writer(fastavro_output, fastavro.parse_schema(SCHEMA), RECORDS, codec = codec, sync_interval = 100)
+	assert list(cerializer.container.ContainerReader(io.BytesIO(fastavro_output.getvalue()), schemata)) == RECORDS
@@ -0,0 +1,57 @@
+import cerializer.fingerprint
+
+
+
+SCHEMA = {
+	'name': 'user',
+	'namespace': 'cerializer',
+	'doc': 'stripped from the canonical form',
+	'type': 'record',
+	'fields': [
+		{'name': 'id', 'type': {'type': 'long', 'logicalType': 'timestamp-millis'}, 'default': 0},
+		{'name': 'parent', 'type': ['null', 'user']},
+		{'name': 'group', 'type': 'group'},
+	]
+}
+
+GROUP_SCHEMA = {
+	'name': 'cerializer.group',
+	'type': 'fixed',
+	'size': 8,
+}
+
+
+def _load_schema(schema_identifier):
+	if schema_identifier == 'cerializer.group':
+		return GROUP_SCHEMA
+	raise RuntimeError(f'Schema with identifier = {schema_identifier} not found in schema database.')
+
+
+def test_parsing_canonical_form():
+	'''
+	tests full names, stripping of attributes and expansion of references to other schemata
+	'''
+	assert cerializer.fingerprint.get_parsing_canonical_form(SCHEMA, _load_schema) == (
+		'{"name":"cerializer.user","type":"record","fields":['
+		'{"name":"id","type":"long"},'
+		'{"name":"parent","type":["null","cerializer.user"]},'
+		'{"name":"group","type":{"name":"cerializer.group","type":"fixed","size":8}}]}'
+	)
+
+
+def test_codec_form():
+	'''
+	tests that the codec form keeps the attributes the generated code depends on
+	'''
+	codec_form = cerializer.fingerprint.get_codec_form(SCHEMA, _load_schema)
+	assert '{"name":"id","type":{"type":"long","logicalType":"timestamp-millis"},"default":0}' in codec_form
+
+
+def test_fingerprints():
+	'''
+	tests the fingerprints against the values given by the reference implementation
+	'''
+	assert cerializer.fingerprint.get_crc_64_avro_fingerprint('"int"') == 0x7275d51a3f395c8f
+	assert cerializer.fingerprint.get_sha_256_fingerprint('"int"').hex() == (
+		'3f2b87a9fe7cc9b13835598c3981cd45e3e355309e5090aa0933d7becb6fba45'
+	)
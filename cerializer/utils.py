@@ -1,6 +1,7 @@
 # pylint: disable=protected-access
 import itertools
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import keyword
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import cerializer.schema_parser
 import cerializer.constants
@@ -78,6 +79,21 @@ def get_subschemata(schemata: List[Tuple[str, Any]]) -> Dict[str, Union[str, Lis
 	return schema_database
 
 
+def get_local_subschemata(schema_identifier: str, parsed_schema: Any) -> Dict[str, Any]:
+	'''
+	Returns the named types defined within an already parsed schema, including the schema itself.
+	Gives the same result as get_subschemata for a single schema, without parsing it again.
+	:param schema_identifier: schema identifier of the parsed schema
+	:param parsed_schema: parsed schema
+	:return: dict of schema identifier to schema
+	'''
+	local_schema_database: Dict[str, Any] = {}
+	if '.' in schema_identifier:
+		local_schema_database[schema_identifier] = parsed_schema
+	scan_schema_for_subschemata(parsed_schema, local_schema_database)
+	return local_schema_database
+
+
 def scan_schema_for_subschemata(schema: Any, schema_database: Dict[str, Any]) -> None:
 	if type(schema) is dict:
 		name = schema.get('name')
@@ -90,6 +106,100 @@ def scan_schema_for_subschemata(schema: Any, schema_database: Dict[str, Any]) ->
 			scan_schema_for_subschemata(subschema, schema_database)
 
 
+def get_projected_schema(schema: Any, field_paths: List[List[str]], load_schema: Callable[[str], Any]) -> Any:
+	'''
+	Returns a schema with only the given fields of a parsed schema, to be used as the reader schema of a projection.
+	Field paths go through records, and through unions, arrays and maps of records. Projected records are renamed
+	and keep their original name as an alias, so that they do not replace the original named types.
+	:param schema: parsed schema
+	:param field_paths: field paths as lists of field names
+	:param load_schema: callback returning the schema of a named type
+	:return: projected schema
+	'''
+	if not field_paths or not all(field_paths):
+		raise ValueError('At least one field has to be projected.')
+	return _project_schema(schema, field_paths, load_schema, set(), itertools.count())
+
+
+def _project_schema(
+	schema: Any,
+	field_paths: List[List[str]],
+	load_schema: Callable[[str], Any],
+	projected_names: Set[str],
+	projection_counter: Iterator[int],
+) -> Any:
+	'''
+	Projects a schema to non empty field paths.
+	:param schema: schema
+	:param field_paths: field paths relative to the schema
+	:param load_schema: callback returning the schema of a named type
+	:param projected_names: names of the records being projected, projecting into recursive records is not supported
+	:param projection_counter: numbers the projected records
+	:return: projected schema
+	'''
+	if isinstance(schema, str):
+		if schema in cerializer.constants.BASIC_TYPES or schema == 'null':
+			raise ValueError(f'Fields {field_paths} cannot be projected from {schema}.')
+		return _project_schema(load_schema(schema), field_paths, load_schema, projected_names, projection_counter)
+	if isinstance(schema, list):
+		projected_branches = []
+		error = None
+		for branch in schema:
+			try:
+				projected_branches.append(
+					_project_schema(branch, field_paths, load_schema, projected_names, projection_counter)
+				)
+			except ValueError as branch_error:
+				error = branch_error
+				projected_branches.append(branch)
+		if projected_branches == schema:
+			raise error or ValueError(f'Fields {field_paths} cannot be projected from {schema}.')
+		return projected_branches
+	type_ = schema['type']
+	if type_ == cerializer.constants.ARRAY:
+		return {
+			**schema,
+			'items': _project_schema(schema['items'], field_paths, load_schema, projected_names, projection_counter),
+		}
+	if type_ == cerializer.constants.MAP:
+		return {
+			**schema,
+			'values': _project_schema(schema['values'], field_paths, load_schema, projected_names, projection_counter),
+		}
+	if type_ != cerializer.constants.RECORD:
+		if not isinstance(type_, str) or type_ not in cerializer.constants.BASIC_TYPES | cerializer.constants.COMPLEX_TYPES:
+			return _project_schema(type_, field_paths, load_schema, projected_names, projection_counter)
+		raise ValueError(f'Fields {field_paths} cannot be projected from {schema}.')
+	name = schema['name']
+	if name in projected_names:
+		raise ValueError(f'Fields {field_paths} go through the recursive record {name}, project the whole field instead.')
+	subpaths: Dict[str, List[List[str]]] = {}
+	for field_path in field_paths:
+		subpaths.setdefault(field_path[0], []).append(field_path[1:])
+	fields = []
+	for field in schema['fields']:
+		if field['name'] not in subpaths:
+			continue
+		field_subpaths = subpaths.pop(field['name'])
+		if not all(field_subpaths):
+			fields.append(field)
+			continue
+		projected_names.add(name)
+		try:
+			projected_type = _project_schema(field, field_subpaths, load_schema, projected_names, projection_counter)
+		finally:
+			projected_names.discard(name)
+		fields.append({'name': field['name'], 'type': projected_type})
+	if subpaths:
+		raise ValueError(f'Fields {sorted(subpaths)} not found in {name}.')
+	return {
+		'type': cerializer.constants.RECORD,
+		'name': f'{name}_projection_{next(projection_counter)}',
+		'aliases': [name],
+		'fields': fields,
+	}
+
+
 def get_type_name(type_: Union[str, Dict[str, Any]]) -> Optional[str]:
 	return type_ if isinstance(type_, str) else type_.get('name')
 
@@ -107,12 +217,30 @@ def default_if_necessary(location: str, default: Any) -> str:
 	return f'{constraint}\n' f'    {location} = {default}'
 
 
+def get_record_attribute_name(name: str) -> str:
+	'''
+	Returns the attribute holding a field of a generated record class.
+	Field names that are Python keywords, or that would hide an attribute of the class, get an underscore appended.
+	The resulting names are not necessarily unique, e.g. for fields named from and from_.
+	:param name: field name
+	:return: attribute name
+	'''
+	if keyword.iskeyword(name) or name in ('_fields', '_asdict'):
+		return name + '_'
+	return name
+
+
 def get_schema_identifier(namespace: str, schema_name: str) -> str:
 	return f'{namespace}.{schema_name}'
 
 
-def iterate_over_schemata() -> Iterator[Tuple[str, str]]:
-	for schema_root in cerializer.constants.TEST_SCHEMATA_ROOTS:
+def iterate_over_schemata(schema_roots: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+	'''
+	Iterates over schema directories laid out as <schema_root>/<schema_identifier>/schema.yaml.
+	:param schema_roots: roots to look in, defaults to the test schemata roots
+	:return: Iterator of tuples in form of (schema_identifier, schema directory)
+	'''
+	for schema_root in schema_roots or cerializer.constants.TEST_SCHEMATA_ROOTS:
 		for schema_identifier in os.listdir(schema_root):
 			if schema_identifier.startswith('.'):
 				# in case of folders automatically added by macOS (.DS_Store)
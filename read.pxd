@@ -1,4 +1,6 @@
 #cython: language_level=3
+cimport read_buffer
+from read_buffer cimport BufferReader
 ctypedef int int32
 ctypedef unsigned int uint32
 ctypedef unsigned long long ulong64
@@ -19,6 +21,8 @@ It is only used from within Cerializer.
 THIS MODULE SHOULD NOT BE USED ON ITS OWN.
 
 All code strictly follows the Avro standard.
+
+Readers backed by memory (BufferReader) are decoded directly by read_buffer.pxd.
 '''
 
 
@@ -31,6 +35,8 @@ cpdef inline read_boolean(fo):
 	"""A boolean is written as a single byte whose value is either 0 (false) or
 	1 (true).
 	"""
+	if type(fo) is BufferReader:
+		return read_buffer.read_boolean(<BufferReader>fo)
 	cdef unsigned char ch_temp
 	cdef bytes bytes_temp = fo.read(1)
 	# technically 0x01 == true and 0x00 == false, but many languages will
@@ -46,6 +52,8 @@ cpdef inline long64 read_long(fo) except? -1:
 cpdef inline long64 read_int(fo) except? -1:
 	"""int and long values are written using variable-length, zig-zag
 	coding."""
+	if type(fo) is BufferReader:
+		return read_buffer.read_int(<BufferReader>fo)
 	cdef ulong64 b
 	cdef ulong64 n
 	cdef int32 shift
@@ -80,6 +88,8 @@ cpdef inline read_float(fo):
 	The float is converted into a 32-bit integer using a method equivalent to
 	Java's floatToIntBits and then encoded in little-endian format.
 	"""
+	if type(fo) is BufferReader:
+		return read_buffer.read_float(<BufferReader>fo)
 	cdef bytes data
 	cdef unsigned char ch_data[4]
 	cdef float_uint32 fi
@@ -103,6 +113,8 @@ cpdef inline read_double(fo):
 	The double is converted into a 64-bit integer using a method equivalent to
 	Java's doubleToLongBits and then encoded in little-endian format.
 	"""
+	if type(fo) is BufferReader:
+		return read_buffer.read_double(<BufferReader>fo)
 	cdef bytes data
 	cdef unsigned char ch_data[8]
 	cdef double_ulong64 dl
@@ -122,6 +134,8 @@ cpdef inline read_double(fo):
 
 cpdef inline read_bytes(fo):
 	"""Bytes are encoded as a long followed by that many bytes of data."""
+	if type(fo) is BufferReader:
+		return read_buffer.read_bytes(<BufferReader>fo)
 	cdef long64 size = read_int(fo)
 	return fo.read(<long>size)
 
@@ -130,10 +144,28 @@ cpdef inline unicode read_string(fo):
 	"""A string is encoded as a long followed by that many bytes of UTF-8
 	encoded character data.
 	"""
+	if type(fo) is BufferReader:
+		return read_buffer.read_string(<BufferReader>fo)
 	return read_bytes(fo).decode('utf-8')
 
 
 cpdef inline read_fixed(fo, writer_schema):
 	"""Fixed instances are encoded using the number of bytes declared in the
 	schema."""
+	if type(fo) is BufferReader:
+		return read_buffer.read_fixed(<BufferReader>fo, writer_schema['size'])
 	return fo.read(writer_schema['size'])
+
+
+cpdef inline skip_fixed(fo, long64 size):
+	"""Moves past the next size bytes, without creating an object for them
+	if the data is in memory."""
+	if type(fo) is BufferReader:
+		read_buffer.skip(<BufferReader>fo, <Py_ssize_t>size)
+	else:
+		fo.read(<long>size)
+
+
+cpdef inline skip_bytes(fo):
+	"""Moves past bytes or a string, a long followed by that many bytes of data."""
+	skip_fixed(fo, read_int(fo))
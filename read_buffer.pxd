@@ -0,0 +1,153 @@
+#cython: language_level=3
+from cpython.buffer cimport Py_buffer
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+
+ctypedef unsigned int uint32
+ctypedef unsigned long long ulong64
+ctypedef long long long64
+
+
+
+'''
+This module deals with reading basic types directly from memory.
+It is only used from within Cerializer, through read.pxd.
+
+THIS MODULE SHOULD NOT BE USED ON ITS OWN.
+
+The functions mirror the ones in read.pxd, but work on a BufferReader instead of a file like object,
+so that no Python method is called and no object is allocated for the numeric types.
+Every read is bounds checked.
+'''
+
+
+cdef class BufferReader:
+	cdef Py_buffer _view
+	cdef bint _has_view
+	cdef const unsigned char* data
+	cdef Py_ssize_t size
+	cdef Py_ssize_t position
+
+
+cdef class RecordView:
+	cdef BufferReader _reader
+	cdef dict _field_indexes
+	cdef tuple _skipping_functions
+	cdef tuple _reading_functions
+	cdef list _offsets
+	cdef list _values
+	cdef object _get(self, Py_ssize_t index)
+
+
+cdef class Record:
+	pass
+
+
+cpdef type make_record_class(str name, tuple fields, tuple attributes)
+
+
+cdef inline Py_ssize_t take(BufferReader reader, Py_ssize_t size) except -1:
+	"""Returns the position of the next size bytes and moves past them."""
+	cdef Py_ssize_t position = reader.position
+	if size < 0 or size > reader.size - position:
+		raise EOFError(f'Cannot read {size} bytes at position {position} of a buffer of size {reader.size}.')
+	reader.position = position + size
+	return position
+
+
+cdef inline bint read_boolean(BufferReader reader) except -1:
+	"""A boolean is written as a single byte whose value is either 0 (false) or
+	1 (true).
+	"""
+	return reader.data[take(reader, 1)] != 0
+
+
+cdef inline long64 read_int(BufferReader reader) except? -1:
+	"""int and long values are written using variable-length, zig-zag
+	coding."""
+	cdef ulong64 b
+	cdef ulong64 n = 0
+	cdef int shift = 0
+	cdef const unsigned char* data = reader.data
+	cdef Py_ssize_t position = reader.position
+
+	# We do EOF checking only here, since most reader start here
+	if position >= reader.size:
+		raise StopIteration
+
+	while True:
+		if position >= reader.size:
+			raise EOFError(f'Truncated varint at position {reader.position}.')
+		if shift > 63:
+			raise ValueError(f'Varint at position {reader.position} is longer than 10 bytes.')
+		b = data[position]
+		position += 1
+		n |= (b & 0x7F) << shift
+		shift += 7
+		if (b & 0x80) == 0:
+			break
+
+	reader.position = position
+	return (n >> 1) ^ -(n & 1)
+
+
+cdef union float_uint32:
+	float f
+	uint32 n
+
+
+cdef inline float read_float(BufferReader reader) except? -1:
+	"""A float is written as 4 bytes, little-endian."""
+	cdef const unsigned char* ch_data = reader.data + take(reader, 4)
+	cdef float_uint32 fi
+	fi.n = (ch_data[0]
+			| (ch_data[1] << 8)
+			| (ch_data[2] << 16)
+			| (<uint32>(ch_data[3]) << 24))
+	return fi.f
+
+
+cdef union double_ulong64:
+	double d
+	ulong64 n
+
+
+cdef inline double read_double(BufferReader reader) except? -1:
+	"""A double is written as 8 bytes, little-endian."""
+	cdef const unsigned char* ch_data = reader.data + take(reader, 8)
+	cdef double_ulong64 dl
+	dl.n = (ch_data[0]
+			| (<ulong64>(ch_data[1]) << 8)
+			| (<ulong64>(ch_data[2]) << 16)
+			| (<ulong64>(ch_data[3]) << 24)
+			| (<ulong64>(ch_data[4]) << 32)
+			| (<ulong64>(ch_data[5]) << 40)
+			| (<ulong64>(ch_data[6]) << 48)
+			| (<ulong64>(ch_data[7]) << 56))
+	return dl.d
+
+
+cdef inline bytes read_fixed(BufferReader reader, Py_ssize_t size):
+	"""Returns the next size bytes."""
+	cdef Py_ssize_t position = take(reader, size)
+	return PyBytes_FromStringAndSize(<const char*>(reader.data + position), size)
+
+
+cdef inline bytes read_bytes(BufferReader reader):
+	"""Bytes are encoded as a long followed by that many bytes of data."""
+	return read_fixed(reader, <Py_ssize_t>read_int(reader))
+
+
+cdef inline unicode read_string(BufferReader reader):
+	"""A string is encoded as a long followed by that many bytes of UTF-8
+	encoded character data.
+	"""
+	cdef Py_ssize_t size = <Py_ssize_t>read_int(reader)
+	cdef Py_ssize_t position = take(reader, size)
+	return PyUnicode_DecodeUTF8(<const char*>(reader.data + position), size, NULL)
+
+
+cdef inline int skip(BufferReader reader, Py_ssize_t size) except -1:
+	"""Moves past the next size bytes without reading them."""
+	take(reader, size)
+	return 0
@@ -0,0 +1,201 @@
+#cython: language_level=3
+import collections.abc
+
+from cpython.buffer cimport PyBUF_SIMPLE, PyBuffer_Release, PyObject_GetBuffer
+
+
+
+cdef class BufferReader:
+	'''
+	Reads serialized data from any object supporting the buffer protocol, e.g. bytes, bytearray or memoryview.
+	The buffer is held until the reader is garbage collected, so a bytearray cannot be resized meanwhile.
+	Besides the C level functions in read_buffer.pxd, the reader is a minimal file like object,
+	so that it can be passed to code that calls read. Reading starts at the given position.
+	'''
+
+	def __cinit__(self, data, Py_ssize_t position = 0):
+		PyObject_GetBuffer(data, &self._view, PyBUF_SIMPLE)
+		self._has_view = True
+		self.data = <const unsigned char*>self._view.buf
+		self.size = self._view.len
+		if position < 0 or position > self.size:
+			raise ValueError(f'Position = {position} is outside of the buffer of size = {self.size}.')
+		self.position = position
+
+	def __dealloc__(self):
+		if self._has_view:
+			PyBuffer_Release(&self._view)
+
+	def read(self, Py_ssize_t size = -1) -> bytes:
+		'''
+		Reads at most size bytes, all the remaining ones if size is negative.
+		:param size: number of bytes to read
+		:return: bytes read
+		'''
+		cdef Py_ssize_t start = self.position
+		cdef Py_ssize_t remaining = self.size - start
+		if size < 0 or size > remaining:
+			size = remaining
+		self.position += size
+		return (<const char*>self.data)[start:self.position]
+
+	def tell(self) -> int:
+		'''
+		:return: current position in the buffer
+		'''
+		return self.position
+
+	def seek(self, Py_ssize_t position) -> int:
+		'''
+		Moves to an absolute position in the buffer.
+		:param position: new position
+		:return: new position
+		'''
+		if position < 0 or position > self.size:
+			raise ValueError(f'Position = {position} is outside of the buffer of size = {self.size}.')
+		self.position = position
+		return position
+
+
+
+# marks fields that have not been decoded yet
+cdef object _NOT_DECODED = object()
+
+
+cdef class RecordView:
+	'''
+	Read-only mapping over a serialized record, returned by the deserialize_lazy function of the compiled code.
+	A field is decoded on its first access and cached. The offsets of fields are found by skipping over
+	the fields before them, each field is skipped at most once. The view holds the buffer until it is
+	garbage collected. It is not safe to share a view between threads.
+	'''
+
+	def __cinit__(self, data, dict field_indexes, tuple skipping_functions, tuple reading_functions):
+		self._reader = BufferReader(data)
+		self._field_indexes = field_indexes
+		self._skipping_functions = skipping_functions
+		self._reading_functions = reading_functions
+		# start of each field found so far
+		self._offsets = [0]
+		self._values = [_NOT_DECODED] * len(reading_functions)
+
+	cdef object _get(self, Py_ssize_t index):
+		value = self._values[index]
+		if value is not _NOT_DECODED:
+			return value
+		cdef BufferReader reader = self._reader
+		cdef Py_ssize_t found = len(self._offsets) - 1
+		while found < index:
+			reader.position = self._offsets[found]
+			self._skipping_functions[found](reader)
+			self._offsets.append(reader.position)
+			found += 1
+		reader.position = self._offsets[index]
+		value = self._reading_functions[index](reader)
+		if found == index:
+			# the end of the field is the start of the next one
+			self._offsets.append(reader.position)
+		self._values[index] = value
+		return value
+
+	def __getitem__(self, key):
+		index = self._field_indexes.get(key)
+		if index is None:
+			raise KeyError(key)
+		return self._get(index)
+
+	def __len__(self) -> int:
+		return len(self._reading_functions)
+
+	def __iter__(self):
+		return iter(self._field_indexes)
+
+	def __contains__(self, key) -> bool:
+		return key in self._field_indexes
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, collections.abc.Mapping):
+			return self.to_dict() == dict(other.items())
+		return NotImplemented
+
+	def __repr__(self) -> str:
+		return f'RecordView({self.to_dict()!r})'
+
+	def get(self, key, default = None):
+		'''
+		:param key: field name
+		:param default: returned if there is no such field
+		:return: decoded field
+		'''
+		index = self._field_indexes.get(key)
+		if index is None:
+			return default
+		return self._get(index)
+
+	def keys(self):
+		return self._field_indexes.keys()
+
+	def values(self) -> list:
+		return [self._get(index) for index in range(len(self._reading_functions))]
+
+	def items(self) -> list:
+		return [(key, self._get(index)) for key, index in self._field_indexes.items()]
+
+	def to_dict(self) -> dict:
+		'''
+		Decodes all the fields.
+		:return: record as returned by deserialize
+		'''
+		return dict(self.items())
+
+
+collections.abc.Mapping.register(RecordView)
+
+
+
+cdef class Record:
+	'''
+	Base of the classes generated for records by make_record_class. An instance holds the fields in slots
+	instead of a dict, which takes a fraction of the memory and is faster to access.
+	Fields named as Python keywords are stored under the name followed by an underscore, e.g. `from_`.
+	'''
+
+	def __eq__(self, other):
+		if type(other) is not type(self):
+			return NotImplemented
+		return all(getattr(self, attribute) == getattr(other, attribute) for attribute in type(self).__slots__)
+
+	def __repr__(self) -> str:
+		fields = ', '.join(f'{attribute}={getattr(self, attribute)!r}' for attribute in type(self).__slots__)
+		return f'{type(self).__qualname__}({fields})'
+
+	def _asdict(self) -> dict:
+		'''
+		Converts the record, including the records nested in it, into the dicts returned by deserialize.
+		:return: record as a dict
+		'''
+		return {
+			field: _to_dict(getattr(self, attribute))
+			for field, attribute in zip(type(self)._fields, type(self).__slots__)
+		}
+
+
+cdef object _to_dict(value):
+	if isinstance(value, Record):
+		return value._asdict()
+	if type(value) is list:
+		return [_to_dict(item) for item in value]
+	if type(value) is dict:
+		return {key: _to_dict(item) for key, item in value.items()}
+	return value
+
+
+cpdef type make_record_class(str name, tuple fields, tuple attributes):
+	'''
+	Creates a record class storing the fields in slots.
+	:param name: full name of the record
+	:param fields: names of the fields
+	:param attributes: names of the attributes holding the fields, in the same order
+	:return: record class
+	'''
+	return type(name.rpartition('.')[2], (Record,), {'__slots__': attributes, '__qualname__': name, '_fields': fields})
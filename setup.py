@@ -7,6 +7,7 @@ os.system('pip install Cython')
 
 COMPILED_MODULES = {
 	'prepare.pyx',
+	'read_buffer.pyx',
 }
 MODULES_TO_BUILD = []
 EXTENSIONS = []
@@ -41,6 +42,8 @@ setup(
 			'templates/*.jinja2',
 			'../write.pxd',
 			'../read.pxd',
+			'../read_buffer.pxd',
+			'../read_buffer.pyx',
 			'../prepare.pxd',
 			'../prepare.pyx',
 		],
@@ -57,6 +60,15 @@ setup(
 		'demo': [
 			'fastavro==0.22.6',
 		],
+		'snappy': [
+			'python-snappy>=0.5.4',
+		],
+		'zstandard': [
+			'zstandard>=0.15.0',
+		],
+		'numpy': [
+			'numpy>=1.17.0',
+		],
 	},
 	ext_modules = EXTENSIONS,
 )
@@ -48,6 +48,20 @@ cdef inline write_long(bytearray fo, datum):
     write_int(fo, datum)
 
 
+cdef inline write_long64(bytearray fo, long64 datum):
+    """Writes an int or long held in a C integer, e.g. read from a typed buffer.
+    The varint is assembled in place and appended at once."""
+    cdef ulong64 n = (<ulong64>datum << 1) ^ <ulong64>(datum >> 63)
+    cdef unsigned char ch_temp[10]
+    cdef int size = 0
+    while (n & ~0x7F) != 0:
+        ch_temp[size] = (n & 0x7f) | 0x80
+        size += 1
+        n >>= 7
+    ch_temp[size] = n
+    fo += ch_temp[:size + 1]
+
+
 cdef union float_uint32:
     float f
     uint32 n